@@ -2,6 +2,13 @@ import os
 from flask import Flask, jsonify
 from config import config
 from models.user import db
+from utils.json_provider import init_json_provider
+from utils.transaction_number import init_transaction_number_generator
+from utils.token_cache import init_token_cache
+from utils.password_hashing import init_password_hasher
+from utils.db_pools import init_db_pools
+from utils.report_runner import init_report_runner
+from utils.token_version import ensure_token_version_column
 
 def create_app(config_name=None):
     """Application factory"""
@@ -10,12 +17,29 @@ def create_app(config_name=None):
     
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    init_json_provider(app)
+    init_transaction_number_generator(app)
+    init_token_cache(app)
+    init_password_hasher(app)
+    init_report_runner(app)
     
     # Initialize extensions
     db.init_app(app)
     
+    # Import models whose tables are managed by create_all
+    import models.catalog_change  # noqa: F401
+    import models.idempotency_key  # noqa: F401
+    import models.balance_slot  # noqa: F401
+    import models.balance_ledger  # noqa: F401
+    import models.balance_snapshot  # noqa: F401
+    import models.archived_partition  # noqa: F401
+    import models.report_cache  # noqa: F401
+    import models.transaction_hourly  # noqa: F401
+    
     with app.app_context():
         db.create_all()
+        ensure_token_version_column()
+    init_db_pools(app)
     
     # Register blueprints
     from routes.health import health_bp
@@ -30,6 +54,9 @@ def create_app(config_name=None):
     from routes.dashboard import dashboard_bp
     from routes.reports import reports_bp
     from routes.cashier import cashier_bp
+    from routes.catalog import catalog_bp
+    from routes.balance import balance_bp
+    from routes.owner import owner_bp
     
     app.register_blueprint(health_bp)
     app.register_blueprint(auth_bp)
@@ -43,6 +70,9 @@ def create_app(config_name=None):
     app.register_blueprint(dashboard_bp)
     app.register_blueprint(reports_bp)
     app.register_blueprint(cashier_bp)
+    app.register_blueprint(catalog_bp)
+    app.register_blueprint(balance_bp)
+    app.register_blueprint(owner_bp)
     
     # Error handlers
     @app.errorhandler(404)
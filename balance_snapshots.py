@@ -0,0 +1,48 @@
+"""
+Snapshot saldo EDC/agent dari balance ledger.
+
+Jalankan berkala (mis. tiap malam lewat Task Scheduler/cron):
+    python balance_snapshots.py
+Sekali setelah ledger di-deploy, catat saldo yang sudah ada sebelum ledger
+sebagai opening (aman dijalankan ulang):
+    python balance_snapshots.py --init
+Cek saldo tersimpan terhadap ledger:
+    python balance_snapshots.py --check [--workers 4]
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from utils.balance_ledger import take_snapshots, record_opening_balances
+from utils.reconciliation import reconcile_balances, MODE_LEDGER
+
+def main():
+    parser = argparse.ArgumentParser(description='Balance ledger snapshots')
+    parser.add_argument('--init', action='store_true', help='Catat saldo sebelum ledger sebagai opening')
+    parser.add_argument('--check', action='store_true', help='Bandingkan saldo tersimpan dengan ledger')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--chunk-size', type=int, default=500)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.init:
+            opening = record_opening_balances()
+            print(f"✅ Opening dicatat: EDC {opening['edc']}, agent {opening['agent']}")
+
+        snapshots = take_snapshots()
+        print(f"✅ Snapshot baru: EDC {snapshots['edc']}, agent {snapshots['agent']}")
+
+        if args.check:
+            report = reconcile_balances(app, chunk_size=args.chunk_size, workers=args.workers, mode=MODE_LEDGER)
+            for kind, result in report.items():
+                print(f"{kind}: {result['checked']} dicek, {len(result['drift'])} selisih, "
+                      f"{len(result['no_baseline'])} tanpa titik awal")
+                for item in result['drift']:
+                    print(f"  id {item['owner_id']}: tersimpan {item['stored']:,.2f}, ledger {item['expected']:,.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Micro-benchmark serialisasi JSON untuk 10k transaksi.
+
+Sebelum: Transaction.to_dict() (float()/isoformat() per field) + Flask DefaultJSONProvider
+Sesudah: nilai mentah (Decimal/datetime) langsung ke FastJSONProvider
+
+Jalankan dari root project:
+    python benchmarks/bench_json.py [jumlah_transaksi]
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from models.transaction import Transaction
+from utils.json_provider import FastJSONProvider, orjson
+
+FIELDS = (
+    'id', 'transaction_number', 'edc_machine_id', 'service_id', 'agent_profile_id',
+    'user_id', 'cashier_name', 'customer_name', 'target_number', 'reference_number',
+    'amount', 'service_fee', 'bank_fee', 'extra_fee', 'net_profit', 'created_at', 'updated_at'
+)
+
+def make_transactions(count):
+    base = datetime(2025, 1, 1, 8, 0, 0)
+    transactions = []
+    for i in range(count):
+        created = base + timedelta(seconds=i * 37)
+        transactions.append(Transaction(
+            id=i + 1,
+            transaction_number=f'TRX-{i:012X}',
+            edc_machine_id=1 + i % 5,
+            service_id=1 + i % 8,
+            agent_profile_id=1,
+            user_id=2,
+            cashier_name='Kasir Satu',
+            customer_name=f'Customer {i}',
+            target_number='081234567890',
+            reference_number=None,
+            amount=Decimal('150000.00'),
+            service_fee=Decimal('5000.00'),
+            bank_fee=Decimal('2500.00'),
+            extra_fee=Decimal('0.00'),
+            net_profit=Decimal('150000.00'),
+            created_at=created,
+            updated_at=created
+        ))
+    return transactions
+
+def bench(label, fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f'{label:<52} {best * 1000:9.1f} ms   ({size / 1024:.0f} KiB)')
+    return best
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    app = Flask('bench_json')
+    default_provider = DefaultJSONProvider(app)
+    fast_provider = FastJSONProvider(app)
+
+    transactions = make_transactions(count)
+    rows = [tuple(getattr(trx, field) for field in FIELDS) for trx in transactions]
+
+    print(f'Serialisasi {count} transaksi (orjson: {"ya" if orjson else "tidak, fallback json"})')
+
+    before = bench(
+        'to_dict() + DefaultJSONProvider',
+        lambda: len(default_provider.dumps({'transactions': [trx.to_dict() for trx in transactions]}))
+    )
+    bench(
+        'to_dict() + FastJSONProvider',
+        lambda: len(fast_provider.dumps_bytes({'transactions': [trx.to_dict() for trx in transactions]}))
+    )
+    after = bench(
+        'raw row dict (Decimal/datetime) + FastJSONProvider',
+        lambda: len(fast_provider.dumps_bytes({'transactions': [dict(zip(FIELDS, row)) for row in rows]}))
+    )
+    print(f'Speedup: {before / after:.1f}x')
+
+if __name__ == '__main__':
+    main()
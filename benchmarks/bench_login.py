@@ -0,0 +1,63 @@
+"""
+Verifikasi password per detik per core saat banyak kasir login bersamaan.
+
+Membandingkan verifikasi di thread request (PASSWORD_HASH_WORKERS=0)
+dengan process pool, untuk hash lama (pbkdf2:sha256 default werkzeug)
+dan metode yang dikonfigurasi:
+    python benchmarks/bench_login.py --methods pbkdf2:sha256,scrypt:32768:8:1 --concurrency 32
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.password_hashing import PasswordHasher
+
+PASSWORD = 'Shift-Start-123'
+
+def run(hasher, password_hash, concurrency, logins):
+    latencies = []
+    lock = threading.Lock()
+
+    def login(_):
+        started = time.perf_counter()
+        assert hasher.verify(password_hash, PASSWORD)
+        with lock:
+            latencies.append(time.perf_counter() - started)
+
+    hasher.verify(password_hash, PASSWORD)  # pool start
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(login, range(logins)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return logins / elapsed, latencies[int(len(latencies) * 0.95) - 1]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--methods', default='pbkdf2:sha256,scrypt:32768:8:1')
+    parser.add_argument('--concurrency', type=int, default=32, help='Login bersamaan (thread request)')
+    parser.add_argument('--logins', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Ukuran process pool')
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    print(f'{cores} core, {args.concurrency} login bersamaan, pool {args.workers} proses')
+    print(f"{'metode':<24} {'mode':<8} {'login/s':>9} {'per core':>9} {'p95':>9}")
+    for method in args.methods.split(','):
+        password_hash = PasswordHasher(method=method, workers=0).hash(PASSWORD)
+        for mode, workers in (('thread', 0), ('pool', args.workers)):
+            hasher = PasswordHasher(method=method, workers=workers, max_pending=args.concurrency)
+            try:
+                rate, p95 = run(hasher, password_hash, args.concurrency, args.logins)
+            finally:
+                hasher.shutdown()
+            used_cores = min(cores, workers) if workers else cores
+            print(f'{method:<24} {mode:<8} {rate:>9.1f} {rate / used_cores:>9.1f} {p95 * 1000:>7.0f}ms')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Waktu hitung laporan tahunan: engine SQL (GROUP BY) vs engine NumPy.
+
+Mengisi N transaksi dan N/3 cash flow acak selama satu tahun, lalu
+menjalankan build_report() untuk rentang tahun itu dengan kedua engine dan
+memastikan hasilnya identik. Analytics store dimatikan supaya yang diukur
+murni jalur database. Berjalan di SQLite file sementara; set
+BENCH_DATABASE_URL untuk MySQL (schema harus kosong, tabel dibuat ulang).
+
+Jalankan dari root project:
+    python benchmarks/bench_report_engine.py [jumlah_transaksi] [ulangan]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import BigInteger, insert
+from sqlalchemy.ext.compiler import compiles
+
+@compiles(BigInteger, 'sqlite')
+def _sqlite_bigint(type_, compiler, **kw):
+    # SQLite hanya meng-autoincrement kolom INTEGER PRIMARY KEY
+    return 'INTEGER'
+
+from app import create_app
+from config import TestingConfig
+from models.user import db
+from models.agent_profile import AgentProfile
+from models.edc_machine import EdcMachine
+from models.service import Service
+from models.transaction import Transaction
+from models.cash_flow import CashFlow
+from utils.report_engine import ENGINE_SQL, ENGINE_NUMPY, build_report
+
+YEAR_START = datetime(2024, 1, 1)
+YEAR_END = datetime(2024, 12, 31, 23, 59, 59, 999999)
+
+def money(low, high):
+    return Decimal(random.randint(low * 100, high * 100)) / 100
+
+def seed(transactions_count):
+    random.seed(46)
+    agents = [AgentProfile(user_id=1, owner_id=1, agent_name=f'Outlet {i}') for i in range(20)]
+    machines = [EdcMachine(name=f'EDC {i}', bank_name='BRI') for i in range(50)]
+    services = [Service(name=f'Service {i}', category=('transfer', 'tarik tunai')[i % 2]) for i in range(12)]
+    db.session.add_all(agents + machines + services)
+    db.session.commit()
+
+    seconds = int((YEAR_END - YEAR_START).total_seconds())
+    batch = []
+    for index in range(transactions_count):
+        amount = money(10000, 5000000)
+        batch.append({
+            'edc_machine_id': random.choice(machines).id,
+            'service_id': random.choice(services).id,
+            'agent_profile_id': random.choice(agents).id if index % 5 else None,
+            'user_id': 1,
+            'amount': amount,
+            'service_fee': money(0, 10000),
+            'bank_fee': money(0, 6500),
+            'extra_fee': 0,
+            'net_profit': money(0, 10000),
+            'created_at': YEAR_START + timedelta(seconds=random.randint(0, seconds)),
+        })
+        if len(batch) == 5000:
+            db.session.execute(insert(Transaction), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(Transaction), batch)
+    db.session.execute(insert(CashFlow), [
+        {
+            'user_id': 1,
+            'agent_profile_id': random.choice(agents).id,
+            'type': random.choice(('cash_in', 'cash_out')),
+            'source': 'bench',
+            'amount': money(1000, 2000000),
+            'created_at': YEAR_START + timedelta(seconds=random.randint(0, seconds)),
+        }
+        for _ in range(transactions_count // 3)
+    ])
+    db.session.commit()
+
+def measure(engine, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        report = build_report(YEAR_START, YEAR_END, engine)
+        timings.append(time.perf_counter() - started)
+        db.session.rollback()
+    return report, statistics.median(timings), min(timings)
+
+def main():
+    transactions_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    directory = tempfile.mkdtemp()
+    TestingConfig.SQLALCHEMY_DATABASE_URI = os.getenv(
+        'BENCH_DATABASE_URL', f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    )
+    app = create_app('testing')
+    app.config['ANALYTICS_STORE_DIR'] = None
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        print(f'Mengisi {transactions_count} transaksi ({db.engine.dialect.name})...')
+        seed(transactions_count)
+
+        results = {}
+        for engine in (ENGINE_SQL, ENGINE_NUMPY):
+            report, median, best = measure(engine, repeat)
+            results[engine] = report
+            print(f'{engine:6} median {median * 1000:8.1f} ms   min {best * 1000:8.1f} ms')
+        print(f"Hasil identik: {'ya' if results[ENGINE_SQL] == results[ENGINE_NUMPY] else 'TIDAK'}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Jumlah statement SQL dan latency per POST /api/transactions.
+
+Statement dihitung lewat event engine (before_cursor_execute + commit),
+terpisah antara auth (cek blacklist token) dan handler. Berjalan di
+SQLite file sementara; set BENCH_DATABASE_URL untuk MySQL (schema harus
+kosong, tabel dibuat ulang).
+
+Jalankan dari root project:
+    python benchmarks/bench_transaction_posting.py [jumlah_request]
+"""
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import BigInteger, event
+from sqlalchemy.ext.compiler import compiles
+
+@compiles(BigInteger, 'sqlite')
+def _sqlite_bigint(type_, compiler, **kw):
+    # SQLite hanya meng-autoincrement kolom INTEGER PRIMARY KEY
+    return 'INTEGER'
+
+from app import create_app
+from config import TestingConfig
+from models.user import db, User
+from models.agent_profile import AgentProfile
+from models.edc_machine import EdcMachine
+from models.service import Service
+from models.service_fee import ServiceFee
+from models.bank_fee import BankFee
+from utils.jwt_handler import generate_token
+
+def seed():
+    user = User(name='Kasir Bench', email='bench@local', password='bench', role='owner')
+    db.session.add(user)
+    db.session.flush()
+    agent = AgentProfile(user_id=user.id, owner_id=user.id, agent_name='Outlet Bench', total_balance=10 ** 12)
+    edc = EdcMachine(name='EDC Bench', bank_name='BRI', saldo=10 ** 12)
+    transfer = Service(name='Transfer BRI', category='transfer')
+    tarik = Service(name='Tarik Tunai', category='tarik tunai')
+    db.session.add_all([agent, edc, transfer, tarik])
+    db.session.flush()
+    db.session.add_all([
+        ServiceFee(service_id=transfer.id, min_amount=0, max_amount=1000000, fee=5000),
+        ServiceFee(service_id=transfer.id, min_amount=1000001, max_amount=5000000, fee=10000),
+        BankFee(edc_machine_id=edc.id, service_id=transfer.id, fee=2500),
+    ])
+    db.session.commit()
+    return user, agent.id, edc.id, (transfer.id, tarik.id)
+
+def main():
+    requests_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    directory = tempfile.mkdtemp()
+    TestingConfig.SQLALCHEMY_DATABASE_URI = os.getenv(
+        'BENCH_DATABASE_URL', f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    )
+    app = create_app('testing')
+    client = app.test_client()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        user, agent_id, edc_id, service_ids = seed()
+        headers = {'Authorization': f'Bearer {generate_token(user.id, user.email)}'}
+
+        counts = Counter()
+        phase = ['auth']
+
+        @event.listens_for(db.engine, 'before_cursor_execute')
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            # Statement pertama tiap request adalah cek blacklist token
+            counts[phase[0]] += 1
+            phase[0] = 'handler'
+
+        @event.listens_for(db.engine, 'commit')
+        def _count_commit(conn):
+            counts['commit'] += 1
+
+    started = time.perf_counter()
+    for i in range(requests_count):
+        phase[0] = 'auth'
+        response = client.post('/api/transactions', headers=headers, json={
+            'edc_machine_id': edc_id,
+            'service_id': service_ids[i % 2],
+            'agent_profile_id': agent_id,
+            'customer_name': f'Customer {i}',
+            'amount': 100000 + i,
+        })
+        assert response.status_code == 201, response.get_json()
+    elapsed = time.perf_counter() - started
+
+    print(f'{requests_count} request POST /api/transactions (transfer + tarik tunai bergantian)')
+    print(f"  statement auth/request   : {counts['auth'] / requests_count:.1f}")
+    print(f"  statement handler/request: {counts['handler'] / requests_count:.1f}")
+    print(f"  commit/request           : {counts['commit'] / requests_count:.1f}")
+    print(f'  latency                  : {elapsed / requests_count * 1000:.2f} ms/request')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+"""
+Lipat saldo di balance_slots kembali ke edc_machines.saldo dan
+agent_profiles.total_balance (mode BALANCE_SHARDS > 1).
+
+Jalankan berkala (mis. tiap beberapa menit lewat Task Scheduler/cron) dan
+sekali sebelum BALANCE_SHARDS dikembalikan ke 1:
+    python compact_balances.py [--chunk-size 100]
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from utils.balance_slots import compact_balance_slots
+
+def main():
+    parser = argparse.ArgumentParser(description='Compact sharded EDC/agent balances')
+    parser.add_argument('--chunk-size', type=int, default=100, help='Jumlah EDC/agent per commit')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        folded = compact_balance_slots(chunk_size=args.chunk_size)
+
+    print(f"✅ EDC dilipat: {folded['edc']}, agent dilipat: {folded['agent']}")
+
+if __name__ == '__main__':
+    main()
@@ -3,10 +3,106 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def db_pool(name, pool_size, max_overflow, pool_timeout, statement_timeout_ms, lock_wait_timeout):
+    """Opsi pool `name`; setiap nilai bisa diganti env DB_POOL_<NAME>_<OPSI>, misalnya DB_POOL_REPORTING_SIZE"""
+    def env(key, default):
+        return int(os.getenv(f'DB_POOL_{name.upper()}_{key}', default))
+    return {
+        'pool_size': env('SIZE', pool_size),
+        'max_overflow': env('MAX_OVERFLOW', max_overflow),
+        'pool_timeout': env('TIMEOUT', pool_timeout),
+        'pool_recycle': 3600,
+        'pool_pre_ping': True,
+        # MAX_EXECUTION_TIME (ms, SELECT) dan innodb_lock_wait_timeout (detik) per koneksi MySQL
+        'statement_timeout_ms': env('STATEMENT_TIMEOUT_MS', statement_timeout_ms),
+        'lock_wait_timeout': env('LOCK_WAIT_TIMEOUT', lock_wait_timeout),
+    }
+
+# Pool koneksi per beban kerja (utils/db_pools.py): interactive = engine default
+DB_POOLS = {
+    'posting': db_pool('posting', 10, 5, 5, 5000, 5),
+    'interactive': db_pool('interactive', 10, 10, 10, 15000, 10),
+    'reporting': db_pool('reporting', 4, 0, 30, 120000, 10),
+}
+
+def replica_binds():
+    """Bind 'replica' (read replica MySQL) jika DB_REPLICA_HOST diisi; user/password/nama DB sama dengan primary"""
+    if not os.getenv('DB_REPLICA_HOST'):
+        return {}
+    return {
+        'replica': {
+            'url': (
+                f"mysql+pymysql://{os.getenv('DB_USER')}:"
+                f"{os.getenv('DB_PASSWORD')}@{os.getenv('DB_REPLICA_HOST')}:"
+                f"{os.getenv('DB_REPLICA_PORT', os.getenv('DB_PORT'))}/{os.getenv('DB_NAME')}"
+            ),
+            'pool_pre_ping': True,
+            'connect_args': {'connect_timeout': 2},
+        }
+    }
+
 class Config:
     """Base configuration"""
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Cache-Control max-age (detik) untuk endpoint katalog (services, fees, EDC)
+    CATALOG_CACHE_MAX_AGE = int(os.getenv('CATALOG_CACHE_MAX_AGE', 60))
+    # Delta katalog membaca ulang N change id sebelum `since` (change yang commit terlambat)
+    CATALOG_SYNC_OVERLAP = int(os.getenv('CATALOG_SYNC_OVERLAP', 100))
+    # JSON encoder: 'fast' (orjson + Decimal/datetime/Row native) atau 'default' (Flask)
+    JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'fast')
+    # Maksimal item per POST /api/transactions/batch
+    TRANSACTION_BATCH_MAX_ITEMS = int(os.getenv('TRANSACTION_BATCH_MAX_ITEMS', 500))
+    # Idempotency-Key: masa simpan response, batas klaim in-progress, dan lama menunggu duplikat
+    IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv('IDEMPOTENCY_KEY_TTL_HOURS', 24))
+    IDEMPOTENCY_LOCK_SECONDS = int(os.getenv('IDEMPOTENCY_LOCK_SECONDS', 60))
+    IDEMPOTENCY_WAIT_SECONDS = int(os.getenv('IDEMPOTENCY_WAIT_SECONDS', 10))
+    # Nomor transaksi: 'time_ordered' (urut waktu, insert di ujung index) atau 'random' (format lama)
+    TRANSACTION_NUMBER_SCHEME = os.getenv('TRANSACTION_NUMBER_SCHEME', 'time_ordered')
+    # Worker id 0-1023, wajib unik per proses; kosong = diturunkan dari hostname + pid
+    TRANSACTION_NUMBER_WORKER_ID = os.getenv('TRANSACTION_NUMBER_WORKER_ID')
+    # Sharded balance: >1 = kredit saldo EDC/agent ditulis ke N slot (kurangi antre row lock)
+    BALANCE_SHARDS = int(os.getenv('BALANCE_SHARDS', 1))
+    # Pemilihan slot: 'random' atau 'cashier' (user_id % BALANCE_SHARDS)
+    BALANCE_SLOT_STRATEGY = os.getenv('BALANCE_SLOT_STRATEGY', 'random')
+    # Cache token terverifikasi: jumlah token (0 = mati) dan umur maksimal (detik)
+    TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 10000))
+    TOKEN_CACHE_TTL_SECONDS = int(os.getenv('TOKEN_CACHE_TTL_SECONDS', 60))
+    # Lama cache versi token per user (detik) sebelum dibaca ulang dari DB
+    TOKEN_VERSION_CACHE_SECONDS = int(os.getenv('TOKEN_VERSION_CACHE_SECONDS', 300))
+    # Hash password: metode werkzeug + cost; hash lama di-hash ulang saat login
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    # Ukuran process pool hash (kosong = jumlah core, 0 = di thread request) dan batas antrean
+    PASSWORD_HASH_WORKERS = int(os.environ['PASSWORD_HASH_WORKERS']) if os.getenv('PASSWORD_HASH_WORKERS') else None
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 0)) or None
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv('PASSWORD_HASH_QUEUE_TIMEOUT', 5))
+    # Read replica untuk laporan/dashboard: batas lag, jendela read-your-writes, interval cek (detik)
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', 5))
+    REPLICA_READ_YOUR_WRITES_SECONDS = float(os.getenv('REPLICA_READ_YOUR_WRITES_SECONDS', 10))
+    REPLICA_CHECK_INTERVAL_SECONDS = float(os.getenv('REPLICA_CHECK_INTERVAL_SECONDS', 5))
+    DB_POOLS = DB_POOLS
+    # Engine laporan untuk data di database: 'sql' (GROUP BY) atau 'numpy' (bisa diganti ?engine=)
+    REPORT_ENGINE = os.getenv('REPORT_ENGINE', 'sql')
+    # Folder Parquet per bulan tertutup untuk laporan (export_analytics.py); kosong = mati
+    ANALYTICS_STORE_DIR = os.getenv(
+        'ANALYTICS_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'analytics_store')
+    )
+    # Thread query laporan paralel (bersama semua request, sebaiknya < ukuran pool reporting; 0 = berurutan)
+    REPORT_QUERY_WORKERS = int(os.getenv('REPORT_QUERY_WORKERS', 3))
+    # Batas waktu total satu laporan (detik); 0 = tanpa batas
+    REPORT_TIMEOUT_SECONDS = float(os.getenv('REPORT_TIMEOUT_SECONDS', 60))
+    # Cache agregat laporan untuk hari yang sudah tertutup (tabel report_cache); 0 = mati
+    REPORT_CACHE_ENABLED = os.getenv('REPORT_CACHE_ENABLED', '1') == '1'
+    # Blueprint -> pool; blueprint lain memakai pool interactive
+    DB_POOL_BLUEPRINTS = {
+        'transaction': 'posting',
+        'cash_flow': 'posting',
+        'reports': 'reporting',
+        'dashboard': 'reporting',
+        'cashier': 'reporting',
+        'balance': 'reporting',
+        'owner': 'reporting',
+    }
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -16,6 +112,11 @@ class DevelopmentConfig(Config):
         f"{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:"
         f"{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
     )
+    SQLALCHEMY_BINDS = replica_binds()
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        key: value for key, value in DB_POOLS['interactive'].items()
+        if key not in ('statement_timeout_ms', 'lock_wait_timeout')
+    }
 
 class ProductionConfig(Config):
     """Production configuration"""
@@ -25,11 +126,19 @@ class ProductionConfig(Config):
         f"{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:"
         f"{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
     )
+    SQLALCHEMY_BINDS = replica_binds()
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        key: value for key, value in DB_POOLS['interactive'].items()
+        if key not in ('statement_timeout_ms', 'lock_wait_timeout')
+    }
 
 class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    PASSWORD_HASH_WORKERS = 0
+    ANALYTICS_STORE_DIR = None
+    REPORT_CACHE_ENABLED = False
 
 config = {
     'development': DevelopmentConfig,
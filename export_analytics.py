@@ -0,0 +1,67 @@
+"""
+Ekspor bulan tertutup transactions dan cash_flows ke analytics store
+(Parquet per bulan di ANALYTICS_STORE_DIR) untuk laporan periode panjang.
+
+    python export_analytics.py                    # ekspor bulan tertutup yang belum ada / stale
+    python export_analytics.py --month 2025-03    # ekspor ulang satu bulan
+    python export_analytics.py --force            # ekspor ulang semua bulan tertutup
+    python export_analytics.py --status
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from utils.analytics_store import (
+    STORE_TABLES,
+    AnalyticsStoreError,
+    export_closed_months,
+    export_month,
+    exported_months,
+    month_path
+)
+
+def main():
+    parser = argparse.ArgumentParser(description='Export closed months to the analytics store')
+    parser.add_argument('--table', choices=tuple(STORE_TABLES), help='Hanya satu tabel (default keduanya)')
+    parser.add_argument('--month', help='Bulan YYYY-MM (diekspor ulang walaupun sudah ada)')
+    parser.add_argument('--force', action='store_true', help='Ekspor ulang semua bulan tertutup')
+    parser.add_argument('--status', action='store_true', help='Tampilkan bulan yang sudah diekspor saja')
+    args = parser.parse_args()
+
+    tables = (args.table,) if args.table else tuple(STORE_TABLES)
+    app = create_app()
+    with app.app_context():
+        try:
+            if args.month:
+                try:
+                    month = datetime.strptime(args.month, '%Y-%m').date()
+                except ValueError:
+                    print('❌ Format --month harus YYYY-MM')
+                    sys.exit(1)
+                results = [(table, month, export_month(table, month)) for table in tables]
+            elif not args.status:
+                results = export_closed_months(tables, force=args.force)
+            else:
+                results = []
+        except AnalyticsStoreError as e:
+            print(f'❌ {e}')
+            sys.exit(1)
+
+        for table, month, row_count in results:
+            if row_count is None:
+                print(f'⚠ {table} {month:%Y-%m}: data berubah selama ekspor, diulang di run berikutnya')
+            else:
+                print(f'✅ {table} {month:%Y-%m}: {row_count} baris')
+
+        for table in tables:
+            months = exported_months(table)
+            size = sum(os.path.getsize(month_path(table, month)) for month in months)
+            print(f'{table}: {len(months)} bulan di store ({size / 1024 / 1024:.1f} MB)'
+                  + (f', {months[0]:%Y-%m} s/d {months[-1]:%Y-%m}' if months else ''))
+
+if __name__ == '__main__':
+    main()
@@ -161,6 +161,9 @@ def main():
 
 
 if __name__ == "__main__":
+    # Process pool hash password (exe PyInstaller)
+    import multiprocessing
+    multiprocessing.freeze_support()
     try:
         main()
     except Exception as e:
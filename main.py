@@ -1,4 +1,5 @@
 from app import create_app
+import multiprocessing
 import traceback
 import sys
 import os
@@ -14,6 +15,8 @@ def check_env_file():
         setup_main()
 
 if __name__ == '__main__':
+    # Process pool hash password (exe PyInstaller)
+    multiprocessing.freeze_support()
     try:
         # Check and setup configuration if needed
         check_env_file()
@@ -0,0 +1,31 @@
+from models.user import db
+from datetime import datetime
+
+class ArchivedPartition(db.Model):
+    """Partisi bulanan transactions/cash_flows yang sudah dipindah ke tabel arsip"""
+    __tablename__ = 'archived_partitions'
+    __table_args__ = (
+        db.UniqueConstraint('table_name', 'partition_name', name='archived_partitions_partition'),
+    )
+    
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    table_name = db.Column(db.String(64), nullable=False)
+    partition_name = db.Column(db.String(64), nullable=False)
+    archive_table = db.Column(db.String(64), nullable=False)
+    # NULL = partisi pertama (juga berisi semua data sebelum period_end)
+    period_start = db.Column(db.Date, nullable=True)
+    period_end = db.Column(db.Date, nullable=False)  # eksklusif
+    row_count = db.Column(db.BigInteger, default=0)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'table_name': self.table_name,
+            'partition_name': self.partition_name,
+            'archive_table': self.archive_table,
+            'period_start': self.period_start.isoformat() if self.period_start else None,
+            'period_end': self.period_end.isoformat() if self.period_end else None,
+            'row_count': self.row_count or 0,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        }
@@ -0,0 +1,35 @@
+from models.user import db
+from datetime import datetime
+
+class BalanceLedger(db.Model):
+    """Mutasi saldo EDC/agent (append-only). Saldo = snapshot terakhir + SUM(delta) sesudahnya."""
+    __tablename__ = 'balance_ledger'
+    __table_args__ = (
+        db.Index('balance_ledger_owner', 'kind', 'owner_id', 'id'),
+        db.Index('balance_ledger_owner_time', 'kind', 'owner_id', 'created_at'),
+    )
+    
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    kind = db.Column(db.String(20), nullable=False)  # edc atau agent
+    owner_id = db.Column(db.BigInteger, nullable=False)
+    delta = db.Column(db.Numeric(15, 2), nullable=False)
+    source = db.Column(db.String(50), nullable=False)  # transaction, add_saldo, manual_edit, reset, opening, reconcile
+    balance_after = db.Column(db.Numeric(15, 2), nullable=True)  # diisi untuk saldo yang di-set absolut
+    transaction_id = db.Column(db.BigInteger, nullable=True)
+    cash_flow_id = db.Column(db.BigInteger, nullable=True)
+    user_id = db.Column(db.BigInteger, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'owner_id': self.owner_id,
+            'delta': float(self.delta) if self.delta else 0.00,
+            'source': self.source,
+            'balance_after': float(self.balance_after) if self.balance_after is not None else None,
+            'transaction_id': self.transaction_id,
+            'cash_flow_id': self.cash_flow_id,
+            'user_id': self.user_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
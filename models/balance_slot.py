@@ -0,0 +1,27 @@
+from models.user import db
+from datetime import datetime
+
+class BalanceSlot(db.Model):
+    """Potongan saldo EDC/agent untuk mode sharded balance (BALANCE_SHARDS > 1).
+    Saldo efektif = kolom saldo di tabel induk + SUM(amount) semua slot."""
+    __tablename__ = 'balance_slots'
+    __table_args__ = (
+        db.UniqueConstraint('kind', 'owner_id', 'slot', name='balance_slots_unique'),
+    )
+    
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    kind = db.Column(db.String(20), nullable=False)  # edc atau agent
+    owner_id = db.Column(db.BigInteger, nullable=False)
+    slot = db.Column(db.Integer, nullable=False)
+    amount = db.Column(db.Numeric(15, 2), default=0.00, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'owner_id': self.owner_id,
+            'slot': self.slot,
+            'amount': float(self.amount) if self.amount else 0.00,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,26 @@
+from models.user import db
+from datetime import datetime
+
+class BalanceSnapshot(db.Model):
+    """Saldo EDC/agent setelah semua mutasi ledger sampai ledger_id"""
+    __tablename__ = 'balance_snapshots'
+    __table_args__ = (
+        db.Index('balance_snapshots_owner', 'kind', 'owner_id', 'taken_at'),
+    )
+    
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    kind = db.Column(db.String(20), nullable=False)
+    owner_id = db.Column(db.BigInteger, nullable=False)
+    balance = db.Column(db.Numeric(15, 2), nullable=False)
+    ledger_id = db.Column(db.BigInteger, nullable=False)
+    taken_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'owner_id': self.owner_id,
+            'balance': float(self.balance) if self.balance else 0.00,
+            'ledger_id': self.ledger_id,
+            'taken_at': self.taken_at.isoformat() if self.taken_at else None
+        }
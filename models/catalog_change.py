@@ -0,0 +1,22 @@
+from models.user import db
+from datetime import datetime
+
+class CatalogChange(db.Model):
+    """Change log katalog (services, service_fees, bank_fees, edc_machines).
+    id dipakai sebagai catalog version untuk delta sync terminal."""
+    __tablename__ = 'catalog_changes'
+    
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    table_name = db.Column(db.String(50), nullable=False)
+    row_id = db.Column(db.BigInteger, nullable=False)
+    operation = db.Column(db.String(10), nullable=False)  # insert, update, delete
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'table_name': self.table_name,
+            'row_id': self.row_id,
+            'operation': self.operation,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
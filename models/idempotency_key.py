@@ -0,0 +1,32 @@
+from models.user import db
+from datetime import datetime
+
+class IdempotencyKey(db.Model):
+    """Hasil request POST yang sudah di-commit, per Idempotency-Key header"""
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'scope', 'idempotency_key', name='idempotency_keys_unique'),
+    )
+    
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    idempotency_key = db.Column(db.String(255), nullable=False)
+    user_id = db.Column(db.BigInteger, nullable=False)
+    scope = db.Column(db.String(100), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.String(20), default='in_progress', nullable=False)  # in_progress, committed, completed
+    response_status = db.Column(db.Integer, nullable=True)
+    response_body = db.Column(db.Text(16777215), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'idempotency_key': self.idempotency_key,
+            'user_id': self.user_id,
+            'scope': self.scope,
+            'status': self.status,
+            'response_status': self.response_status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None
+        }
@@ -0,0 +1,23 @@
+from models.user import db
+from datetime import datetime
+
+class ReportCacheEntry(db.Model):
+    """Agregat laporan (ReportParts) untuk rentang waktu yang sudah tertutup"""
+    __tablename__ = 'report_cache'
+    __table_args__ = (
+        db.UniqueConstraint('range_start', 'range_end', name='report_cache_range'),
+    )
+    
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    range_start = db.Column(db.Date, nullable=False)
+    range_end = db.Column(db.Date, nullable=False)  # eksklusif
+    payload = db.Column(db.Text(16777215), nullable=False)  # JSON ReportParts.to_dict()
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'range_start': self.range_start.isoformat() if self.range_start else None,
+            'range_end': self.range_end.isoformat() if self.range_end else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -0,0 +1,38 @@
+from models.user import db
+from datetime import datetime
+
+class TransactionHourly(db.Model):
+    """Rollup transaksi per jam per outlet, diperbarui setiap transaksi ditulis.
+    agent_profile_id 0 = transaksi tanpa agent; slot seperti balance_slots
+    (BALANCE_SHARDS > 1) supaya kasir satu outlet tidak antre di satu baris."""
+    __tablename__ = 'transaction_hourly'
+    __table_args__ = (
+        db.UniqueConstraint('bucket_start', 'agent_profile_id', 'slot', name='transaction_hourly_bucket'),
+    )
+    
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    agent_profile_id = db.Column(db.BigInteger, nullable=False, default=0)
+    slot = db.Column(db.Integer, nullable=False, default=0)
+    transaction_count = db.Column(db.BigInteger, nullable=False, default=0)
+    amount = db.Column(db.Numeric(18, 2), nullable=False, default=0.00)
+    service_fee = db.Column(db.Numeric(18, 2), nullable=False, default=0.00)
+    bank_fee = db.Column(db.Numeric(18, 2), nullable=False, default=0.00)
+    extra_fee = db.Column(db.Numeric(18, 2), nullable=False, default=0.00)
+    net_profit = db.Column(db.Numeric(18, 2), nullable=False, default=0.00)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'bucket_start': self.bucket_start.isoformat() if self.bucket_start else None,
+            'agent_profile_id': self.agent_profile_id or None,
+            'slot': self.slot,
+            'transaction_count': self.transaction_count,
+            'amount': float(self.amount) if self.amount else 0.00,
+            'service_fee': float(self.service_fee) if self.service_fee else 0.00,
+            'bank_fee': float(self.bank_fee) if self.bank_fee else 0.00,
+            'extra_fee': float(self.extra_fee) if self.extra_fee else 0.00,
+            'net_profit': float(self.net_profit) if self.net_profit else 0.00,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -1,7 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from utils.db_routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -14,6 +15,8 @@ class User(db.Model):
     agent_profile_id = db.Column(db.BigInteger, nullable=True)
     status = db.Column(db.String(50), default='active', nullable=False)
     remember_token = db.Column(db.String(100), nullable=True)
+    # Naik setiap semua token user dicabut (nonaktif, ganti password)
+    token_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -0,0 +1,77 @@
+"""
+Partisi bulanan dan arsip untuk transactions dan cash_flows (MySQL).
+
+    python partition_tables.py --status
+    python partition_tables.py --convert                # sekali, ubah tabel jadi partisi bulanan
+    python partition_tables.py --ahead 3                # buat partisi 3 bulan ke depan (cron bulanan)
+    python partition_tables.py --archive-older-than 12  # arsipkan partisi di luar 12 bulan terakhir
+    python partition_tables.py --table transactions --convert --ahead 6
+
+Backup database sebelum --convert: foreign key ke/dari tabel dibuang dan
+primary/unique key diperluas dengan created_at (syarat partisi MySQL).
+Tanpa foreign key, menghapus user/EDC/service tidak lagi ikut menghapus
+transaksi dan cash flow-nya (ON DELETE CASCADE); riwayat tetap tersimpan.
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from models.user import db
+from utils.partitioning import (
+    PARTITIONED_MODELS,
+    PartitioningError,
+    archive_old_partitions,
+    archive_summary,
+    convert_to_partitioned,
+    ensure_future_partitions,
+    partition_status
+)
+
+def main():
+    parser = argparse.ArgumentParser(description='Monthly partitions for transactions and cash_flows')
+    parser.add_argument('--table', choices=tuple(PARTITIONED_MODELS), help='Hanya satu tabel (default keduanya)')
+    parser.add_argument('--convert', action='store_true', help='Ubah tabel biasa menjadi partisi bulanan')
+    parser.add_argument('--ahead', type=int, default=3, help='Jumlah bulan ke depan yang dibuatkan partisi')
+    parser.add_argument('--archive-older-than', type=int, metavar='MONTHS',
+                        help='Arsipkan partisi di luar N bulan terakhir (termasuk bulan berjalan)')
+    parser.add_argument('--status', action='store_true', help='Tampilkan partisi dan arsip saja')
+    args = parser.parse_args()
+
+    tables = (args.table,) if args.table else tuple(PARTITIONED_MODELS)
+    app = create_app()
+    with app.app_context(), db.engine.connect() as connection:
+        try:
+            for table in tables:
+                if not args.status:
+                    if args.convert:
+                        result = convert_to_partitioned(connection, table, args.ahead)
+                        if result is None:
+                            print(f'{table}: sudah dipartisi')
+                        else:
+                            print(f"✅ {table}: {result['partitions']} partisi dibuat, "
+                                  f"foreign key dibuang: {', '.join(result['dropped_foreign_keys']) or '-'}, "
+                                  f"unique key diperluas: {', '.join(result['widened_unique_keys']) or '-'}")
+                    created = ensure_future_partitions(connection, table, args.ahead)
+                    if created:
+                        print(f"✅ {table}: partisi baru {', '.join(created)}")
+                    if args.archive_older_than:
+                        for item in archive_old_partitions(connection, table, args.archive_older_than):
+                            print(f"✅ {table}: {item['partition_name']} -> {item['archive_table']} "
+                                  f"({item['row_count']} baris)")
+
+                print(f'{table}:')
+                for item in partition_status(connection, table):
+                    print(f"  {item['partition']:<10} < {item['less_than']:<12} ~{item['rows']} baris")
+        except PartitioningError as e:
+            print(f'❌ {e}')
+            sys.exit(1)
+
+        for table, summary in archive_summary().items():
+            print(f"arsip {table}: {summary['partitions']} partisi, {summary['rows']} baris "
+                  f"(sebelum {summary['archived_before']})")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""
+Isi rollup transaksi per jam (transaction_hourly) untuk heatmap dan
+intraday.
+
+Sekali setelah deploy, isi rollup dari transaksi lama (dilewati jika
+rollup sudah berisi):
+    python rebuild_hourly_rollup.py
+Hitung ulang seluruh rollup (mis. setelah data transaksi diubah lewat SQL
+langsung):
+    python rebuild_hourly_rollup.py --rebuild
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from models.user import db
+from utils.hourly_rollup import ensure_hourly_rollup, rebuild_hourly_rollup
+
+def main():
+    parser = argparse.ArgumentParser(description='Hourly transaction rollup')
+    parser.add_argument('--rebuild', action='store_true', help='Hitung ulang walaupun rollup sudah berisi')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.rebuild:
+            rebuild_hourly_rollup()
+            db.session.commit()
+        else:
+            ensure_hourly_rollup()
+
+    print('✅ Rollup per jam siap')
+
+if __name__ == '__main__':
+    main()
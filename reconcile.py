@@ -0,0 +1,57 @@
+"""
+Rekonsiliasi saldo EDC (saldo) dan agent (total_balance) terhadap
+transaksi dan ledger.
+
+    python reconcile.py                     # laporan selisih
+    python reconcile.py --fix               # koreksi saldo yang selisih
+    python reconcile.py --kind edc --workers 8 --chunk-size 1000 --output drift.json
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from utils.balance_ledger import BALANCE_KINDS
+from utils.reconciliation import reconcile_balances
+
+def main():
+    parser = argparse.ArgumentParser(description='Reconcile EDC/agent balances')
+    parser.add_argument('--kind', choices=BALANCE_KINDS, help='Hanya edc atau agent (default keduanya)')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--chunk-size', type=int, default=500, help='Jumlah id per worker task')
+    parser.add_argument('--fix', action='store_true', help='Terapkan koreksi')
+    parser.add_argument('--fix-batch-size', type=int, default=50, help='Jumlah koreksi per commit')
+    parser.add_argument('--output', help='Simpan laporan lengkap ke file JSON')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        report = reconcile_balances(
+            app,
+            kinds=(args.kind,) if args.kind else BALANCE_KINDS,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            fix=args.fix,
+            fix_batch_size=args.fix_batch_size
+        )
+
+    for kind, result in report.items():
+        print(f"{kind}: {result['checked']} dicek, {result['drift_count']} selisih "
+              f"(total {result['total_difference']:,.2f}), {result['fixed']} dikoreksi, "
+              f"{len(result['no_baseline'])} tanpa checkpoint")
+        for item in result['drift'][:20]:
+            print(f"  id {item['owner_id']}: tersimpan {item['stored']:,.2f}, "
+                  f"seharusnya {item['expected']:,.2f}, selisih {item['difference']:,.2f}")
+        if result['drift_count'] > 20:
+            print(f"  ... {result['drift_count'] - 20} lainnya")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f'✅ Laporan disimpan ke {args.output}')
+
+if __name__ == '__main__':
+    main()
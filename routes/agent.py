@@ -1,17 +1,16 @@
 from flask import Blueprint, request
-from models.user import db, User
+from models.user import db
 from models.agent_profile import AgentProfile
 from utils.response import success_response, error_response
 from utils.jwt_handler import token_required
+from utils.current_user import user_has_role
+from utils.balance_slots import KIND_AGENT, with_pending
 
 agent_bp = Blueprint('agent', __name__, url_prefix='/api/agents')
 
 def check_owner_role(user_id):
     """Check if user has owner role"""
-    user = User.query.get(user_id)
-    if not user or user.role != 'owner':
-        return False
-    return True
+    return user_has_role(user_id, 'owner')
 
 @agent_bp.route('', methods=['POST'])
 @token_required
@@ -45,7 +44,7 @@ def get_agents():
         agents = AgentProfile.query.filter_by(user_id=user_id).all()
         
         return success_response(
-            data=[agent.to_dict() for agent in agents],
+            data=with_pending(KIND_AGENT, [agent.to_dict() for agent in agents], 'total_balance'),
             message='Data agent profile berhasil diambil',
             status_code=200
         )
@@ -83,7 +82,7 @@ def get_agent(agent_id):
             )
         
         return success_response(
-            data=agent.to_dict(),
+            data=with_pending(KIND_AGENT, [agent.to_dict()], 'total_balance')[0],
             message='Data agent profile berhasil diambil',
             status_code=200
         )
@@ -185,7 +184,7 @@ def update_agent(agent_id):
         db.session.commit()
 
         return success_response(
-            data=agent.to_dict(),
+            data=with_pending(KIND_AGENT, [agent.to_dict()], 'total_balance')[0],
             message='Agent profile berhasil diubah',
             status_code=200
         )
@@ -5,9 +5,17 @@ from models.agent_profile import AgentProfile
 from utils.response import success_response, error_response
 from utils.validators import (
     validate_email, validate_password, validate_name,
-    hash_password, check_password, ValidationError
+    hash_password, check_password, password_needs_rehash, ValidationError
 )
-from utils.jwt_handler import generate_token, token_required
+from utils.password_hashing import PasswordHasherBusy
+from utils.jwt_handler import generate_token, token_required, forget_verified_token
+from utils.current_user import load_current_user, user_has_role
+from utils.token_version import revoke_user_tokens, remember_token_version
+from utils.listing import USER_LISTING
+from utils.balance_slots import KIND_AGENT, with_pending
+from utils.balance_ledger import record_balance_change, SOURCE_OPENING, ZERO
+from utils.catalog_sync import record_catalog_delete
+from sqlalchemy import func, select
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
@@ -155,6 +163,7 @@ def register():
             )
             db.session.add(new_agent)
             db.session.flush()  # Get agent ID
+            record_balance_change(KIND_AGENT, new_agent.id, ZERO, SOURCE_OPENING, user_id=new_user.id, balance_after=ZERO)
             
             # Assign agent to user
             new_user.agent_profile_id = new_agent.id
@@ -167,6 +176,13 @@ def register():
             status_code=201
         )
     
+    except PasswordHasherBusy as e:
+        db.session.rollback()
+        return error_response(
+            message=str(e),
+            error='SERVER_BUSY',
+            status_code=503
+        )
     except Exception as e:
         db.session.rollback()
         return error_response(
@@ -232,8 +248,19 @@ def login():
                 status_code=403
             )
         
+        # Hash lama (metode/cost berbeda dari config) di-hash ulang selagi password asli ada
+        if password_needs_rehash(user.password):
+            try:
+                user.password = hash_password(password)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+        
         # Generate token
-        token = generate_token(user.id, user.email)
+        token = generate_token(
+            user.id, user.email,
+            role=user.role, agent_profile_id=user.agent_profile_id, token_version=user.token_version
+        )
         
         return success_response(
             data={
@@ -244,6 +271,12 @@ def login():
             status_code=200
         )
     
+    except PasswordHasherBusy as e:
+        return error_response(
+            message=str(e),
+            error='SERVER_BUSY',
+            status_code=503
+        )
     except Exception as e:
         return error_response(
             message='Terjadi kesalahan saat login',
@@ -252,6 +285,25 @@ def login():
             status_code=500
         )
 
+def _attach_agent_profiles(users_data):
+    """Ganti agent_profile (berisi agent_profile_id) dengan profil agent; user tanpa agent tidak punya key ini"""
+    agent_ids = {user['agent_profile'] for user in users_data if user['agent_profile']}
+    agents = {}
+    if agent_ids:
+        agent_rows = db.session.execute(
+            select(
+                AgentProfile.id, AgentProfile.agent_name, AgentProfile.address,
+                AgentProfile.phone, AgentProfile.total_balance
+            ).where(AgentProfile.id.in_(agent_ids))
+        ).all()
+        agents = {agent.id: agent._asdict() for agent in agent_rows}
+        with_pending(KIND_AGENT, list(agents.values()), 'total_balance')
+    for user_dict in users_data:
+        agent = agents.get(user_dict.pop('agent_profile'))
+        if agent is not None:
+            user_dict['agent_profile'] = agent
+    return users_data
+
 @auth_bp.route('/users', methods=['GET'])
 @token_required
 def get_all_users():
@@ -266,10 +318,12 @@ def get_all_users():
     - status: filter by status (active, inactive)
     - page: page number (default: 1)
     - per_page: items per page (default: 50)
+    - fields: comma separated field names, boleh termasuk agent_profile
+      (default: semua field + agent_profile)
     """
     try:
         # Get current user
-        current_user = User.query.get(request.user_id)
+        current_user = load_current_user()
         if not current_user:
             return error_response(
                 message='User tidak ditemukan',
@@ -280,51 +334,47 @@ def get_all_users():
         # Get query parameters
         role_filter = request.args.get('role')
         status_filter = request.args.get('status')
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 50))
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = max(1, int(request.args.get('per_page', 50)))
         
-        # Build query
-        query = User.query
+        try:
+            listing = USER_LISTING.from_request(request)
+        except ValidationError as e:
+            return error_response(
+                message=str(e),
+                error='INVALID_FIELDS',
+                status_code=400
+            )
+        
+        # Build filters
+        filters = []
         
-        # Apply filters
         if role_filter:
-            query = query.filter(User.role == role_filter.lower())
+            filters.append(User.role == role_filter.lower())
         
         if status_filter:
-            query = query.filter(User.status == status_filter.lower())
+            filters.append(User.status == status_filter.lower())
         
-        # Paginate
-        users = query.paginate(page=page, per_page=per_page, error_out=False)
+        total = db.session.query(func.count(User.id)).filter(*filters).scalar() or 0
+        users_data = listing.fetch(
+            listing.select().where(*filters)
+            .order_by(User.id).limit(per_page).offset((page - 1) * per_page)
+        )
+        if 'agent_profile' in listing.computed:
+            _attach_agent_profiles(users_data)
         
-        # Convert to dict and include agent info
-        users_data = []
-        for user in users.items:
-            user_dict = user.to_dict()
-            
-            # Add agent profile info if exists
-            if user.agent_profile_id:
-                agent = AgentProfile.query.get(user.agent_profile_id)
-                if agent:
-                    user_dict['agent_profile'] = {
-                        'id': agent.id,
-                        'agent_name': agent.agent_name,
-                        'address': agent.address,
-                        'phone': agent.phone,
-                        'total_balance': agent.total_balance
-                    }
-            
-            users_data.append(user_dict)
+        total_pages = (total + per_page - 1) // per_page if total > 0 else 0
         
         return success_response(
             data={
                 'users': users_data,
                 'pagination': {
-                    'page': users.page,
-                    'per_page': users.per_page,
-                    'total_pages': users.pages,
-                    'total_items': users.total,
-                    'has_next': users.has_next,
-                    'has_prev': users.has_prev
+                    'page': page,
+                    'per_page': per_page,
+                    'total_pages': total_pages,
+                    'total_items': total,
+                    'has_next': page < total_pages,
+                    'has_prev': page > 1
                 }
             },
             message='Data users berhasil diambil',
@@ -370,7 +420,7 @@ def logout():
             )
         
         # Get current user
-        current_user = User.query.get(request.user_id)
+        current_user = load_current_user()
         if not current_user:
             return error_response(
                 message='User tidak ditemukan',
@@ -405,6 +455,7 @@ def logout():
         
         db.session.add(blacklist_entry)
         db.session.commit()
+        forget_verified_token(token)
         
         return success_response(
             data={
@@ -433,8 +484,7 @@ def update_user(user_id):
         current_user_id = request.user_id
         
         # Check if current user is owner
-        current_user = User.query.get(current_user_id)
-        if not current_user or current_user.role != 'owner':
+        if not user_has_role(current_user_id, 'owner'):
             return error_response(
                 message='Hanya owner yang dapat mengubah user',
                 error='FORBIDDEN',
@@ -459,6 +509,10 @@ def update_user(user_id):
                 status_code=400
             )
         
+        revoke_tokens = False
+        # Role dan agent_profile_id ikut di claim token
+        claims_before = (user.role, user.agent_profile_id)
+        
         # Update fields
         if 'name' in data:
             name = data.get('name', '').strip()
@@ -520,6 +574,7 @@ def update_user(user_id):
                     )
                 from utils.validators import hash_password
                 user.password = hash_password(password)
+                revoke_tokens = True
         
         if 'role' in data:
             role = data.get('role', '').lower()
@@ -541,8 +596,14 @@ def update_user(user_id):
                     error='INVALID_STATUS',
                     status_code=400
                 )
+            if status == 'inactive' and user.status != 'inactive':
+                revoke_tokens = True
             user.status = status
         
+        # Nonaktif, ganti password, atau claim token berubah: semua sesi user ini dicabut
+        if revoke_tokens or (user.role, user.agent_profile_id) != claims_before:
+            revoke_user_tokens(user.id)
+        
         db.session.commit()
         
         return success_response(
@@ -551,6 +612,13 @@ def update_user(user_id):
             status_code=200
         )
     
+    except PasswordHasherBusy as e:
+        db.session.rollback()
+        return error_response(
+            message=str(e),
+            error='SERVER_BUSY',
+            status_code=503
+        )
     except Exception as e:
         db.session.rollback()
         return error_response(
@@ -568,8 +636,7 @@ def delete_user(user_id):
         current_user_id = request.user_id
         
         # Check if current user is owner
-        current_user = User.query.get(current_user_id)
-        if not current_user or current_user.role != 'owner':
+        if not user_has_role(current_user_id, 'owner'):
             return error_response(
                 message='Hanya owner yang dapat menghapus user',
                 error='FORBIDDEN',
@@ -593,8 +660,11 @@ def delete_user(user_id):
                 status_code=400
             )
         
+        # Agent, EDC dan bank fee milik user ikut terhapus (ON DELETE CASCADE)
+        record_catalog_delete('users', user_id)
         db.session.delete(user)
         db.session.commit()
+        remember_token_version(user_id, None)
         
         return success_response(
             data=None,
@@ -0,0 +1,243 @@
+from flask import Blueprint, request, current_app
+from models.user import db
+from models.balance_ledger import BalanceLedger
+from utils.response import success_response, error_response
+from utils.jwt_handler import token_required
+from utils.current_user import user_has_role
+from utils.balance_slots import BALANCE_COLUMNS, current_balance
+from utils.balance_ledger import (
+    balance_at, daily_balances, take_snapshots
+)
+from utils.reconciliation import reconcile_balances, EXPECTED_BALANCES, MODE_SOURCE
+from sqlalchemy import select
+from datetime import datetime, timedelta
+
+balance_bp = Blueprint('balance', __name__, url_prefix='/api/balances')
+
+def check_owner_role(user_id):
+    """Check if user has owner role"""
+    return user_has_role(user_id, 'owner')
+
+def invalid_kind_response(kind):
+    return error_response(
+        message=f'Jenis saldo tidak dikenal: {kind}. Gunakan edc atau agent',
+        error='INVALID_INPUT',
+        status_code=400
+    )
+
+@balance_bp.route('/<kind>/<int:owner_id>/ledger', methods=['GET'])
+@token_required
+def get_balance_ledger(kind, owner_id):
+    """
+    Get riwayat mutasi saldo EDC (kind=edc) atau agent (kind=agent), terbaru dulu
+    Params:
+    - limit (default 50), before_id (untuk halaman berikutnya)
+    """
+    try:
+        if kind not in BALANCE_COLUMNS:
+            return invalid_kind_response(kind)
+
+        limit = min(request.args.get('limit', 50, type=int), 500)
+        before_id = request.args.get('before_id', type=int)
+
+        statement = select(BalanceLedger).where(
+            BalanceLedger.kind == kind,
+            BalanceLedger.owner_id == owner_id
+        )
+        if before_id:
+            statement = statement.where(BalanceLedger.id < before_id)
+        entries = db.session.execute(
+            statement.order_by(BalanceLedger.id.desc()).limit(limit)
+        ).scalars().all()
+
+        return success_response(
+            data={
+                'balance': float(current_balance(kind, owner_id)),
+                'entries': [entry.to_dict() for entry in entries],
+                'next_before_id': entries[-1].id if len(entries) == limit else None
+            },
+            message='Riwayat saldo berhasil diambil',
+            status_code=200
+        )
+    except Exception as e:
+        return error_response(
+            message='Terjadi kesalahan saat mengambil riwayat saldo',
+            error='INTERNAL_ERROR',
+            details={'error': str(e)},
+            status_code=500
+        )
+
+@balance_bp.route('/<kind>/<int:owner_id>/at', methods=['GET'])
+@token_required
+def get_balance_at(kind, owner_id):
+    """
+    Get saldo pada waktu tertentu (null jika sebelum saldo awal tercatat di ledger)
+    Params:
+    - time: ISO datetime UTC (contoh 2025-01-31T23:59:59)
+    """
+    try:
+        if kind not in BALANCE_COLUMNS:
+            return invalid_kind_response(kind)
+
+        try:
+            at = datetime.fromisoformat(request.args.get('time', ''))
+        except ValueError:
+            return error_response(
+                message='Parameter time harus format ISO datetime',
+                error='INVALID_INPUT',
+                status_code=400
+            )
+
+        balance = balance_at(kind, owner_id, at)
+        return success_response(
+            data={
+                'kind': kind,
+                'owner_id': owner_id,
+                'time': at.isoformat(),
+                'balance': float(balance) if balance is not None else None
+            },
+            message='Saldo berhasil diambil',
+            status_code=200
+        )
+    except Exception as e:
+        return error_response(
+            message='Terjadi kesalahan saat mengambil saldo',
+            error='INTERNAL_ERROR',
+            details={'error': str(e)},
+            status_code=500
+        )
+
+@balance_bp.route('/<kind>/<int:owner_id>/daily', methods=['GET'])
+@token_required
+def get_daily_balances(kind, owner_id):
+    """
+    Get saldo awal/akhir per hari (UTC)
+    Params:
+    - start_date, end_date: YYYY-MM-DD (default 30 hari terakhir, maksimal 366 hari)
+    """
+    try:
+        if kind not in BALANCE_COLUMNS:
+            return invalid_kind_response(kind)
+
+        try:
+            end_date = datetime.strptime(request.args['end_date'], '%Y-%m-%d').date() \
+                if request.args.get('end_date') else datetime.utcnow().date()
+            start_date = datetime.strptime(request.args['start_date'], '%Y-%m-%d').date() \
+                if request.args.get('start_date') else end_date - timedelta(days=29)
+        except ValueError:
+            return error_response(
+                message='Format tanggal harus YYYY-MM-DD',
+                error='INVALID_INPUT',
+                status_code=400
+            )
+
+        if start_date > end_date or (end_date - start_date).days > 365:
+            return error_response(
+                message='Rentang tanggal tidak valid (maksimal 366 hari)',
+                error='INVALID_INPUT',
+                status_code=400
+            )
+
+        return success_response(
+            data={
+                'kind': kind,
+                'owner_id': owner_id,
+                'daily': daily_balances(kind, owner_id, start_date, end_date)
+            },
+            message='Saldo harian berhasil diambil',
+            status_code=200
+        )
+    except Exception as e:
+        return error_response(
+            message='Terjadi kesalahan saat mengambil saldo harian',
+            error='INTERNAL_ERROR',
+            details={'error': str(e)},
+            status_code=500
+        )
+
+@balance_bp.route('/snapshots', methods=['POST'])
+@token_required
+def create_balance_snapshots():
+    """
+    Owner-only: buat snapshot saldo untuk semua EDC/agent yang berubah
+    """
+    try:
+        if not check_owner_role(request.user_id):
+            return error_response(
+                message='Hanya owner yang dapat membuat snapshot saldo',
+                error='FORBIDDEN',
+                status_code=403
+            )
+
+        return success_response(
+            data={
+                'snapshots': take_snapshots()
+            },
+            message='Snapshot saldo berhasil dibuat',
+            status_code=201
+        )
+    except Exception as e:
+        db.session.rollback()
+        return error_response(
+            message='Terjadi kesalahan saat membuat snapshot saldo',
+            error='INTERNAL_ERROR',
+            details={'error': str(e)},
+            status_code=500
+        )
+
+@balance_bp.route('/reconcile', methods=['GET', 'POST'])
+@token_required
+def reconcile():
+    """
+    Owner-only: rekonsiliasi saldo EDC/agent terhadap transaksi dan ledger
+    GET: laporan selisih. POST {"fix": true}: koreksi saldo yang selisih.
+    Params:
+    - kind: edc/agent (default keduanya), chunk_size (default 500), workers (default 4)
+    - mode: source (default, dihitung ulang dari transaksi) atau ledger
+      (dibandingkan dengan saldo menurut balance ledger)
+    """
+    try:
+        if not check_owner_role(request.user_id):
+            return error_response(
+                message='Hanya owner yang dapat melakukan rekonsiliasi saldo',
+                error='FORBIDDEN',
+                status_code=403
+            )
+
+        kind = request.args.get('kind')
+        if kind and kind not in BALANCE_COLUMNS:
+            return invalid_kind_response(kind)
+
+        mode = request.args.get('mode', MODE_SOURCE)
+        if mode not in EXPECTED_BALANCES:
+            return error_response(
+                message=f'Mode rekonsiliasi tidak dikenal: {mode}. Gunakan {" atau ".join(EXPECTED_BALANCES)}',
+                error='INVALID_INPUT',
+                status_code=400
+            )
+
+        fix = request.method == 'POST' and bool((request.get_json(silent=True) or {}).get('fix'))
+
+        report = reconcile_balances(
+            current_app._get_current_object(),
+            kinds=(kind,) if kind else tuple(BALANCE_COLUMNS),
+            chunk_size=max(request.args.get('chunk_size', 500, type=int), 1),
+            workers=min(max(request.args.get('workers', 4, type=int), 1), 16),
+            fix=fix,
+            user_id=request.user_id,
+            mode=mode
+        )
+
+        return success_response(
+            data=report,
+            message='Saldo berhasil dikoreksi' if fix else 'Rekonsiliasi saldo selesai',
+            status_code=200
+        )
+    except Exception as e:
+        db.session.rollback()
+        return error_response(
+            message='Terjadi kesalahan saat rekonsiliasi saldo',
+            error='INTERNAL_ERROR',
+            details={'error': str(e)},
+            status_code=500
+        )
@@ -6,11 +6,14 @@ from models.bank_fee import BankFee
 from models.agent_profile import AgentProfile
 from utils.response import success_response, error_response
 from utils.jwt_handler import token_required
+from utils.catalog_cache import conditional_catalog
+from utils.catalog_sync import record_catalog_change
 
 bank_fee_bp = Blueprint('bank_fee', __name__, url_prefix='/api/bank-fees')
 
 @bank_fee_bp.route('', methods=['GET'])
 @token_required
+@conditional_catalog('bank_fees', private=True)
 def get_bank_fees():
     """Get all bank fees (accessible by all authenticated users)"""
     try:
@@ -125,6 +128,8 @@ def create_bank_fee():
         )
         
         db.session.add(new_fee)
+        db.session.flush()
+        record_catalog_change('bank_fees', new_fee.id, 'insert')
         db.session.commit()
         
         return success_response(
@@ -182,6 +187,7 @@ def update_bank_fee(fee_id):
                     status_code=400
                 )
         
+        record_catalog_change('bank_fees', fee_obj.id, 'update')
         db.session.commit()
         
         return success_response(
@@ -214,6 +220,7 @@ def delete_bank_fee(fee_id):
             )
         
         db.session.delete(fee_obj)
+        record_catalog_change('bank_fees', fee_id, 'delete')
         db.session.commit()
         
         return success_response(
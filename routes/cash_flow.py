@@ -1,9 +1,15 @@
 from flask import Blueprint, request
-from models.user import db, User
+from models.user import db
 from models.agent_profile import AgentProfile
 from models.cash_flow import CashFlow
 from utils.response import success_response, error_response
+from utils.validators import ValidationError
 from utils.jwt_handler import token_required
+from utils.current_user import user_has_role
+from utils.listing import CASH_FLOW_LISTING
+from utils.partitioning import partitioned_entity, find_archived
+from utils.idempotency import idempotent
+from sqlalchemy import func
 
 cash_flow_bp = Blueprint('cash_flow', __name__, url_prefix='/api/cash-flows')
 
@@ -18,16 +24,27 @@ def check_agent_ownership(user_id, agent_id):
         return True
     
     # If user is owner role and agent.owner_id matches
-    user = User.query.get(user_id)
-    if user and user.role == 'owner' and agent.owner_id == user_id:
+    if agent.owner_id == user_id and user_has_role(user_id, 'owner'):
         return True
     
     return False
 
+def archived_response():
+    return error_response(
+        message='Cash flow sudah diarsip dan tidak dapat diubah atau dihapus',
+        error='ARCHIVED',
+        status_code=409
+    )
+
 @cash_flow_bp.route('', methods=['GET'])
 @token_required
 def get_cash_flows():
-    """Get cash flows for user's agents"""
+    """
+    Get cash flows for user's agents
+    Params:
+    - agent_id, type (cash_in/cash_out), limit, offset
+    - fields: comma separated field names (default: all fields)
+    """
     try:
         user_id = request.user_id
         agent_id = request.args.get('agent_id')
@@ -35,7 +52,18 @@ def get_cash_flows():
         limit = request.args.get('limit', 50, type=int)
         offset = request.args.get('offset', 0, type=int)
         
-        query = CashFlow.query.filter_by(user_id=user_id)
+        try:
+            listing = CASH_FLOW_LISTING.from_request(request)
+        except ValidationError as e:
+            return error_response(
+                message=str(e),
+                error='INVALID_FIELDS',
+                status_code=400
+            )
+        
+        # Termasuk cash flow di tabel arsip (utils/partitioning.py)
+        source = partitioned_entity(CashFlow)
+        filters = [source.user_id == user_id]
         
         if agent_id:
             if not check_agent_ownership(user_id, int(agent_id)):
@@ -44,7 +72,7 @@ def get_cash_flows():
                     error='FORBIDDEN',
                     status_code=403
                 )
-            query = query.filter_by(agent_profile_id=int(agent_id))
+            filters.append(source.agent_profile_id == int(agent_id))
         
         if cash_type:
             if cash_type not in ['cash_in', 'cash_out']:
@@ -53,14 +81,17 @@ def get_cash_flows():
                     error='INVALID_INPUT',
                     status_code=400
                 )
-            query = query.filter_by(type=cash_type)
+            filters.append(source.type == cash_type)
         
-        total = query.count()
-        cash_flows = query.order_by(CashFlow.created_at.desc()).limit(limit).offset(offset).all()
+        total = db.session.query(func.count(source.id)).filter(*filters).scalar()
+        cash_flows = listing.fetch(
+            listing.select(source).where(*filters)
+            .order_by(source.created_at.desc()).limit(limit).offset(offset)
+        )
         
         return success_response(
             data={
-                "cash_flows": [cf.to_dict() for cf in cash_flows],
+                "cash_flows": cash_flows,
                 "total": total,
                 "limit": limit,
                 "offset": offset
@@ -83,7 +114,8 @@ def get_cash_flow(cash_flow_id):
     try:
         user_id = request.user_id
         
-        cash_flow = CashFlow.query.get(cash_flow_id)
+        # Cash flow di bulan yang sudah diarsip tetap bisa dibaca
+        cash_flow = CashFlow.query.get(cash_flow_id) or find_archived(CashFlow, cash_flow_id)
         
         if not cash_flow:
             return error_response(
@@ -115,10 +147,15 @@ def get_cash_flow(cash_flow_id):
 
 @cash_flow_bp.route('', methods=['POST'])
 @token_required
+@idempotent('cash_flows.create')
 def create_cash_flow():
     """
     Create new cash flow
     
+    Headers:
+    - Idempotency-Key (optional): retry dengan key yang sama mengembalikan
+      response pertama tanpa membuat cash flow baru
+    
     Request body:
     {
         "agent_profile_id": 1,  // optional
@@ -215,6 +252,8 @@ def update_cash_flow(cash_flow_id):
         cash_flow = CashFlow.query.get(cash_flow_id)
         
         if not cash_flow:
+            if find_archived(CashFlow, cash_flow_id) is not None:
+                return archived_response()
             return error_response(
                 message='Cash flow tidak ditemukan',
                 error='NOT_FOUND',
@@ -294,6 +333,8 @@ def delete_cash_flow(cash_flow_id):
         cash_flow = CashFlow.query.get(cash_flow_id)
         
         if not cash_flow:
+            if find_archived(CashFlow, cash_flow_id) is not None:
+                return archived_response()
             return error_response(
                 message='Cash flow tidak ditemukan',
                 error='NOT_FOUND',
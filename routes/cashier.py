@@ -5,6 +5,7 @@ from models.cash_flow import CashFlow
 from models.transaction import Transaction
 from models.service import Service
 from utils.response import success_response, error_response
+from utils.db_routing import replica_reads
 from datetime import datetime, timedelta
 from sqlalchemy import func
 
@@ -35,6 +36,7 @@ def parse_date_range(request_obj):
 
 
 @cashier_bp.route('/uangmasuk', methods=['GET'])
+@replica_reads
 def get_uang_masuk():
     """
     Endpoint to get aggregated total transfer amount (before fees) for a card (single response)
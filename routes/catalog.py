@@ -0,0 +1,64 @@
+from flask import Blueprint, request
+from utils.response import success_response, error_response
+from utils.jwt_handler import token_required
+from utils.catalog_sync import build_catalog_snapshot, build_catalog_changes, current_catalog_version
+
+catalog_bp = Blueprint('catalog', __name__, url_prefix='/api/catalog')
+
+@catalog_bp.route('/snapshot', methods=['GET'])
+@token_required
+def get_catalog_snapshot():
+    """
+    Get full catalog (services, service fees, bank fees, active EDC machines)
+    in one versioned document. Simpan `version` untuk delta sync berikutnya.
+    """
+    try:
+        return success_response(
+            data=build_catalog_snapshot(),
+            message='Snapshot katalog berhasil diambil',
+            status_code=200
+        )
+    except Exception as e:
+        return error_response(
+            message='Terjadi kesalahan saat mengambil snapshot katalog',
+            error='INTERNAL_ERROR',
+            details={'error': str(e)},
+            status_code=500
+        )
+
+@catalog_bp.route('/changes', methods=['GET'])
+@token_required
+def get_catalog_changes():
+    """
+    Get catalog changes since a version
+    Params:
+    - since: int (catalog version dari snapshot/delta sebelumnya)
+    """
+    try:
+        since = request.args.get('since', type=int)
+        if since is None or since < 0:
+            return error_response(
+                message='Parameter since wajib diisi dengan angka >= 0',
+                error='INVALID_INPUT',
+                status_code=400
+            )
+
+        if since > current_catalog_version():
+            return error_response(
+                message='Version katalog tidak dikenal, ambil ulang snapshot',
+                error='SNAPSHOT_REQUIRED',
+                status_code=410
+            )
+
+        return success_response(
+            data=build_catalog_changes(since),
+            message='Perubahan katalog berhasil diambil',
+            status_code=200
+        )
+    except Exception as e:
+        return error_response(
+            message='Terjadi kesalahan saat mengambil perubahan katalog',
+            error='INTERNAL_ERROR',
+            details={'error': str(e)},
+            status_code=500
+        )
@@ -7,6 +7,9 @@ from models.transaction import Transaction
 from models.cash_flow import CashFlow
 from utils.response import success_response, error_response
 from utils.jwt_handler import token_required
+from utils.db_routing import replica_reads
+from utils.partitioning import partitioned_entity
+from utils.balance_slots import KIND_EDC, pending_grand_total
 from datetime import datetime, timedelta
 from sqlalchemy import func
 
@@ -37,6 +40,7 @@ def parse_date_range(request_obj):
 
 @dashboard_bp.route('', methods=['GET'])
 @token_required
+@replica_reads
 def get_dashboard():
     """
     Get main dashboard metrics
@@ -69,14 +73,16 @@ def get_dashboard():
         ).scalar() or 0
         
         # SALDO metrics (cumulative from all time)
-        edc_saldo = db.session.query(func.sum(EdcMachine.saldo)).scalar() or 0.00
+        edc_saldo = (db.session.query(func.sum(EdcMachine.saldo)).scalar() or 0) + pending_grand_total(KIND_EDC)
         
-        cash_in_all = db.session.query(func.sum(CashFlow.amount)).filter(
-            CashFlow.type == 'cash_in'
+        # Saldo tunai dihitung dari seluruh cash flow, termasuk yang sudah diarsip
+        cash_flows = partitioned_entity(CashFlow)
+        cash_in_all = db.session.query(func.sum(cash_flows.amount)).filter(
+            cash_flows.type == 'cash_in'
         ).scalar() or 0.00
         
-        cash_out_all = db.session.query(func.sum(CashFlow.amount)).filter(
-            CashFlow.type == 'cash_out'
+        cash_out_all = db.session.query(func.sum(cash_flows.amount)).filter(
+            cash_flows.type == 'cash_out'
         ).scalar() or 0.00
         
         # Convert to float to avoid Decimal - float error
@@ -90,15 +96,17 @@ def get_dashboard():
             User.role == 'kasir'
         ).scalar() or 0
         
+        transactions = partitioned_entity(Transaction, start, end)
+        
         # TOP SERVICES BY REVENUE in range
         top_by_revenue = db.session.query(
             Service.id.label('service_id'),
             Service.name,
-            func.sum(Transaction.amount).label('revenue'),
-            func.count(Transaction.id).label('count')
-        ).join(Transaction, Service.id == Transaction.service_id).filter(
-            Transaction.created_at.between(start, end)
-        ).group_by(Service.id, Service.name).order_by(func.sum(Transaction.amount).desc()).limit(5).all()
+            func.sum(transactions.amount).label('revenue'),
+            func.count(transactions.id).label('count')
+        ).join(transactions, Service.id == transactions.service_id).filter(
+            transactions.created_at.between(start, end)
+        ).group_by(Service.id, Service.name).order_by(func.sum(transactions.amount).desc()).limit(5).all()
         
         top_by_revenue_data = [
             {
@@ -114,11 +122,11 @@ def get_dashboard():
         top_by_volume = db.session.query(
             Service.id.label('service_id'),
             Service.name,
-            func.sum(Transaction.amount).label('revenue'),
-            func.count(Transaction.id).label('count')
-        ).join(Transaction, Service.id == Transaction.service_id).filter(
-            Transaction.created_at.between(start, end)
-        ).group_by(Service.id, Service.name).order_by(func.count(Transaction.id).desc()).limit(5).all()
+            func.sum(transactions.amount).label('revenue'),
+            func.count(transactions.id).label('count')
+        ).join(transactions, Service.id == transactions.service_id).filter(
+            transactions.created_at.between(start, end)
+        ).group_by(Service.id, Service.name).order_by(func.count(transactions.id).desc()).limit(5).all()
         
         top_by_volume_data = [
             {
@@ -132,12 +140,12 @@ def get_dashboard():
         
         # DAILY TREND
         daily_trend_rows = db.session.query(
-            func.date(Transaction.created_at).label('date'),
-            func.sum(Transaction.amount).label('revenue'),
-            func.count(Transaction.id).label('count')
+            func.date(transactions.created_at).label('date'),
+            func.sum(transactions.amount).label('revenue'),
+            func.count(transactions.id).label('count')
         ).filter(
-            Transaction.created_at.between(start, end)
-        ).group_by(func.date(Transaction.created_at)).order_by(func.date(Transaction.created_at)).all()
+            transactions.created_at.between(start, end)
+        ).group_by(func.date(transactions.created_at)).order_by(func.date(transactions.created_at)).all()
         
         # Build daily trend period
         daily_trend = []
@@ -218,6 +226,7 @@ def get_dashboard():
 
 @dashboard_bp.route('/cashier', methods=['GET'])
 @token_required
+@replica_reads
 def get_cashier_dashboard():
     """
     Get cashier daily dashboard (today only) - GLOBAL DATA (no user filtering)
@@ -280,11 +289,13 @@ def get_cashier_dashboard():
         total_fees_today = total_service_fee_today + total_bank_fee_today + total_extra_fee_today
 
         # Recompute saldo_tunai from cash flow (all time) and derive cash_on_hand
-        cash_in_all = db.session.query(func.sum(CashFlow.amount)).filter(
-            CashFlow.type == 'cash_in'
+        # Saldo tunai dihitung dari seluruh cash flow, termasuk yang sudah diarsip
+        cash_flows = partitioned_entity(CashFlow)
+        cash_in_all = db.session.query(func.sum(cash_flows.amount)).filter(
+            cash_flows.type == 'cash_in'
         ).scalar() or 0.00
-        cash_out_all = db.session.query(func.sum(CashFlow.amount)).filter(
-            CashFlow.type == 'cash_out'
+        cash_out_all = db.session.query(func.sum(cash_flows.amount)).filter(
+            cash_flows.type == 'cash_out'
         ).scalar() or 0.00
         cash_in_all = float(cash_in_all)
         cash_out_all = float(cash_out_all)
@@ -321,6 +332,7 @@ def get_cashier_dashboard():
 
 @dashboard_bp.route('/cashier/transactions', methods=['GET'])
 @token_required
+@replica_reads
 def get_cashier_transactions():
     """
     Get cashier transactions today with pagination
@@ -418,6 +430,7 @@ def get_cashier_transactions():
 
 @dashboard_bp.route('/cards/total-revenue-today', methods=['GET'])
 @token_required
+@replica_reads
 def get_total_revenue_today():
     """
     Get total revenue for today
@@ -448,17 +461,20 @@ def get_total_revenue_today():
 
 @dashboard_bp.route('/cards/saldo-tunai', methods=['GET'])
 @token_required
+@replica_reads
 def get_saldo_tunai():
     """
     Get current cash balance (saldo tunai)
     """
     try:
-        cash_in_all = db.session.query(func.sum(CashFlow.amount)).filter(
-            CashFlow.type == 'cash_in'
+        # Saldo tunai dihitung dari seluruh cash flow, termasuk yang sudah diarsip
+        cash_flows = partitioned_entity(CashFlow)
+        cash_in_all = db.session.query(func.sum(cash_flows.amount)).filter(
+            cash_flows.type == 'cash_in'
         ).scalar() or 0.00
         
-        cash_out_all = db.session.query(func.sum(CashFlow.amount)).filter(
-            CashFlow.type == 'cash_out'
+        cash_out_all = db.session.query(func.sum(cash_flows.amount)).filter(
+            cash_flows.type == 'cash_out'
         ).scalar() or 0.00
         
         # Convert to float to avoid Decimal - float error
@@ -486,12 +502,13 @@ def get_saldo_tunai():
 
 @dashboard_bp.route('/cards/saldo-edc', methods=['GET'])
 @token_required
+@replica_reads
 def get_saldo_edc():
     """
     Get total EDC machine balance (saldo EDC)
     """
     try:
-        edc_saldo = db.session.query(func.sum(EdcMachine.saldo)).scalar() or 0.00
+        edc_saldo = (db.session.query(func.sum(EdcMachine.saldo)).scalar() or 0) + pending_grand_total(KIND_EDC)
         
         return success_response(
             data={
@@ -510,6 +527,7 @@ def get_saldo_edc():
 
 @dashboard_bp.route('/cards/total-transactions-today', methods=['GET'])
 @token_required
+@replica_reads
 def get_total_transactions_today():
     """
     Get total transactions count for today
@@ -540,6 +558,7 @@ def get_total_transactions_today():
 
 @dashboard_bp.route('/cards/recent-transactions', methods=['GET'])
 @token_required
+@replica_reads
 def get_recent_transactions():
     """
     Get recent transactions (latest 10)
@@ -1,10 +1,20 @@
 from flask import Blueprint, request
-from models.user import db, User
+from models.user import db
 from models.agent_profile import AgentProfile
 from models.edc_machine import EdcMachine
 from models.cash_flow import CashFlow
 from utils.response import success_response, error_response
 from utils.jwt_handler import token_required
+from utils.current_user import user_has_role
+from utils.catalog_cache import conditional_catalog
+from utils.catalog_sync import record_catalog_change, record_catalog_delete
+from utils.listing import EDC_MACHINE_LISTING
+from utils.validators import ValidationError
+from utils.balance_slots import KIND_EDC, KIND_AGENT, with_pending, clear_slots
+from utils.balance_ledger import (
+    record_balance_change, record_balance_reset,
+    SOURCE_OPENING, SOURCE_ADD_SALDO, SOURCE_MANUAL_EDIT, SOURCE_RESET
+)
 from decimal import Decimal, InvalidOperation
 
 edc_bp = Blueprint('edc', __name__, url_prefix='/api/edc-machines')
@@ -121,6 +131,10 @@ def create_edc_machine():
         )
         
         db.session.add(new_edc)
+        db.session.flush()
+        record_catalog_change('edc_machines', new_edc.id, 'insert')
+        opening = Decimal(str(saldo))
+        record_balance_change(KIND_EDC, new_edc.id, opening, SOURCE_OPENING, user_id=request.user_id, balance_after=opening)
         db.session.commit()
         
         return success_response(
@@ -140,21 +154,35 @@ def create_edc_machine():
 
 @edc_bp.route('', methods=['GET'])
 @token_required
+@conditional_catalog('edc_machines', private=True, max_age=0)
 def get_edc_machines():
-    """Get all EDC machines (accessible by all authenticated users)"""
+    """
+    Get all EDC machines (accessible by all authenticated users)
+    Params:
+    - agent_id: filter by agent profile id (optional)
+    - fields: comma separated field names (default: all fields)
+    """
     try:
         user_id = request.user_id
         agent_id = request.args.get('agent_id')
         
+        try:
+            listing = EDC_MACHINE_LISTING.from_request(request)
+        except ValidationError as e:
+            return error_response(
+                message=str(e),
+                error='INVALID_FIELDS',
+                status_code=400
+            )
+        
+        statement = listing.select()
         if agent_id:
             # Get EDC machines for specific agent
-            machines = EdcMachine.query.filter_by(agent_profile_id=int(agent_id)).all()
-        else:
-            # Get all EDC machines (no ownership restriction)
-            machines = EdcMachine.query.all()
+            statement = statement.where(EdcMachine.agent_profile_id == int(agent_id))
+        # No agent filter: all EDC machines (no ownership restriction)
         
         return success_response(
-            data=[machine.to_dict() for machine in machines],
+            data=listing.fetch(statement.order_by(EdcMachine.id)),
             message='Data EDC machine berhasil diambil',
             status_code=200
         )
@@ -184,7 +212,7 @@ def get_edc_machine(machine_id):
         # No ownership check - accessible by all authenticated users
         
         return success_response(
-            data=machine.to_dict(),
+            data=with_pending(KIND_EDC, [machine.to_dict()], 'saldo')[0],
             message='Data EDC machine berhasil diambil',
             status_code=200
         )
@@ -214,8 +242,7 @@ def update_edc_machine(machine_id):
             )
         
         # Check if user is owner
-        user = User.query.get(user_id)
-        if not user or user.role != 'owner':
+        if not user_has_role(user_id, 'owner'):
             return error_response(
                 message='Hanya owner yang dapat mengubah EDC machine',
                 error='FORBIDDEN',
@@ -289,7 +316,11 @@ def update_edc_machine(machine_id):
                         error='INVALID_INPUT',
                         status_code=400
                     )
+                # Catat selisih terhadap saldo lama sebelum saldo ditimpa
+                record_balance_reset(KIND_EDC, {machine.id: saldo}, SOURCE_MANUAL_EDIT, user_id=request.user_id)
                 machine.saldo = saldo
+                # Saldo di-set absolut: potongan saldo di slot tidak berlaku lagi
+                clear_slots(KIND_EDC, [machine.id])
             except (ValueError, TypeError):
                 return error_response(
                     message='Saldo harus berupa angka',
@@ -307,10 +338,11 @@ def update_edc_machine(machine_id):
                 )
             machine.status = status
         
+        record_catalog_change('edc_machines', machine.id, 'update')
         db.session.commit()
         
         return success_response(
-            data=machine.to_dict(),
+            data=with_pending(KIND_EDC, [machine.to_dict()], 'saldo')[0],
             message='EDC machine berhasil diubah',
             status_code=200
         )
@@ -338,6 +370,7 @@ def delete_edc_machine(machine_id):
                 status_code=404
             )
         
+        record_catalog_delete('edc_machines', machine_id)
         db.session.delete(machine)
         db.session.commit()
         
@@ -372,8 +405,7 @@ def add_edc_saldo(machine_id):
         user_id = request.user_id
 
         # Only owner allowed
-        user = User.query.get(user_id)
-        if not user or user.role != 'owner':
+        if not user_has_role(user_id, 'owner'):
             return error_response(
                 message='Hanya owner yang dapat menambah saldo EDC',
                 error='FORBIDDEN',
@@ -422,10 +454,11 @@ def add_edc_saldo(machine_id):
             current = Decimal('0')
 
         machine.saldo = current + amount
+        record_balance_change(KIND_EDC, machine.id, amount, SOURCE_ADD_SALDO, user_id=user_id)
         db.session.commit()
 
         return success_response(
-            data=machine.to_dict(),
+            data=with_pending(KIND_EDC, [machine.to_dict()], 'saldo')[0],
             message='Saldo EDC berhasil ditambahkan',
             status_code=200
         )
@@ -451,12 +484,20 @@ def reset_all_balances():
         # NOTE: No authentication/validation by design — this endpoint is intentionally open
         # and will reset all EDC balances, agent tunai and delete cash flow records.
 
+        # Ledger: saldo lama dicatat sebagai delta negatif
+        record_balance_reset(KIND_EDC, None, SOURCE_RESET)
+        record_balance_reset(KIND_AGENT, None, SOURCE_RESET)
+
         # Bulk reset EDC saldo -> 0
         edc_updated = db.session.query(EdcMachine).update({EdcMachine.saldo: 0})
 
         # Bulk reset agent total_balance -> 0
         agents_updated = db.session.query(AgentProfile).update({AgentProfile.total_balance: 0})
 
+        # Saldo yang masih tersebar di slot ikut di-reset
+        clear_slots(KIND_EDC)
+        clear_slots(KIND_AGENT)
+
         # Delete all cash flow records
         cashflows_deleted = db.session.query(CashFlow).delete()
 
@@ -1,4 +1,7 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, current_app
+from models.user import db
+from utils.db_routing import REPLICA_BIND, replica_status
+from utils.db_pools import pool_status
 
 health_bp = Blueprint('health', __name__, url_prefix='/api')
 
@@ -10,3 +13,31 @@ def health_check():
         'message': 'API is running',
         'status': 'healthy'
     }), 200
+
+@health_bp.route('/health/token-cache', methods=['GET'])
+def token_cache_stats():
+    """Statistik cache token terverifikasi (hit/miss untuk tuning ukuran dan TTL)"""
+    cache = current_app.extensions.get('token_cache')
+    return jsonify({
+        'success': True,
+        'message': 'Statistik token cache',
+        'data': cache.stats() if cache else None
+    }), 200
+
+@health_bp.route('/health/replica', methods=['GET'])
+def replica_health():
+    """Status read replica (lag dan apakah dipakai untuk laporan/dashboard)"""
+    return jsonify({
+        'success': True,
+        'message': 'Status read replica',
+        'data': replica_status() if REPLICA_BIND in db.engines else None
+    }), 200
+
+@health_bp.route('/health/db-pools', methods=['GET'])
+def db_pool_health():
+    """Status connection pool per beban kerja (posting, interactive, reporting)"""
+    return jsonify({
+        'success': True,
+        'message': 'Status connection pool',
+        'data': pool_status()
+    }), 200
@@ -0,0 +1,67 @@
+from flask import Blueprint, request
+from utils.response import success_response, error_response
+from utils.jwt_handler import token_required
+from utils.current_user import user_has_role
+from utils.db_routing import replica_reads
+from utils.owner_overview import owner_overview
+from utils.report_runner import ReportTimeout
+from routes.reports import parse_report_date_range
+
+owner_bp = Blueprint('owner', __name__, url_prefix='/api/owners')
+
+@owner_bp.route('/me/overview', methods=['GET'])
+@token_required
+@replica_reads
+def get_owner_overview():
+    """
+    Get KPI semua outlet milik owner yang login, per outlet dan gabungan
+    Params:
+    - period: daily, weekly, monthly, yearly, custom (default: monthly)
+    - start_date, end_date: YYYY-MM-DD (for custom period)
+    """
+    try:
+        user_id = request.user_id
+        if not user_has_role(user_id, 'owner'):
+            return error_response(
+                message='Hanya owner yang dapat melihat ringkasan outlet',
+                error='FORBIDDEN',
+                status_code=403
+            )
+
+        start, end, period_name = parse_report_date_range(request)
+        if not start or not end:
+            return error_response(
+                message='Parameter periode tidak valid. Gunakan period=custom dengan start_date dan end_date, atau period=daily/weekly/monthly/yearly',
+                error='INVALID_PERIOD',
+                status_code=400
+            )
+
+        # Grouped query per agent_profile_id untuk semua outlet sekaligus (utils/owner_overview.py)
+        overview = owner_overview(user_id, start, end)
+
+        return success_response(
+            data={
+                'period': {
+                    'name': period_name,
+                    'start_date': start.strftime('%Y-%m-%d'),
+                    'end_date': end.strftime('%Y-%m-%d'),
+                    'days': (end - start).days + 1
+                },
+                **overview
+            },
+            message='Ringkasan outlet berhasil diambil',
+            status_code=200
+        )
+    except ReportTimeout as e:
+        return error_response(
+            message=str(e),
+            error='REPORT_TIMEOUT',
+            status_code=504
+        )
+    except Exception as e:
+        return error_response(
+            message='Terjadi kesalahan saat mengambil ringkasan outlet',
+            error='INTERNAL_ERROR',
+            details={'error': str(e)},
+            status_code=500
+        )
@@ -1,14 +1,12 @@
-from flask import Blueprint, request
-from models.user import db, User
-from models.agent_profile import AgentProfile
-from models.edc_machine import EdcMachine
-from models.service import Service
-from models.transaction import Transaction
-from models.cash_flow import CashFlow
+from flask import Blueprint, request, current_app
 from utils.response import success_response, error_response
 from utils.jwt_handler import token_required
+from utils.db_routing import replica_reads
+from utils.report_engine import ENGINE_SQL, available_engines, build_report
+from utils.report_runner import ReportTimeout
+from utils.hourly_rollup import INTRADAY_INTERVALS, heatmap, intraday
+from utils.report_vectorized import np
 from datetime import datetime, timedelta
-from sqlalchemy import func
 
 reports_bp = Blueprint('reports', __name__, url_prefix='/api/reports')
 
@@ -77,6 +75,7 @@ def parse_report_date_range(request_obj):
 
 @reports_bp.route('', methods=['GET'])
 @token_required
+@replica_reads
 def get_reports():
     """
     Get comprehensive reports for different periods
@@ -84,6 +83,7 @@ def get_reports():
     - period: daily, weekly, monthly, yearly, custom (default: monthly)
     - start_date: YYYY-MM-DD (for custom period)
     - end_date: YYYY-MM-DD (for custom period)
+    - engine: sql atau numpy (default: config REPORT_ENGINE)
     """
     try:
         start, end, period_name = parse_report_date_range(request)
@@ -94,148 +94,75 @@ def get_reports():
                 status_code=400
             )
 
-        # ===== REVENUE & TRANSACTIONS =====
-        total_revenue_result = db.session.query(func.sum(Transaction.amount)).filter(
-            Transaction.created_at.between(start, end)
-        ).scalar()
-        total_revenue = float(total_revenue_result) if total_revenue_result is not None else 0.00
-
-        total_transactions = db.session.query(func.count(Transaction.id)).filter(
-            Transaction.created_at.between(start, end)
-        ).scalar() or 0
-
-        avg_transaction_amount = total_revenue / total_transactions if total_transactions > 0 else 0.00
-
-        # ===== FEES BREAKDOWN =====
-        total_service_fee_result = db.session.query(func.sum(Transaction.service_fee)).filter(
-            Transaction.created_at.between(start, end)
-        ).scalar()
-        total_service_fee = float(total_service_fee_result) if total_service_fee_result is not None else 0.00
-
-        total_bank_fee_result = db.session.query(func.sum(Transaction.bank_fee)).filter(
-            Transaction.created_at.between(start, end)
-        ).scalar()
-        total_bank_fee = float(total_bank_fee_result) if total_bank_fee_result is not None else 0.00
-
-        total_extra_fee_result = db.session.query(func.sum(Transaction.extra_fee)).filter(
-            Transaction.created_at.between(start, end)
-        ).scalar()
-        total_extra_fee = float(total_extra_fee_result) if total_extra_fee_result is not None else 0.00
-
-        total_fees = total_service_fee + total_bank_fee + total_extra_fee
-
-        # ===== NET PROFIT =====
-        total_net_profit_result = db.session.query(func.sum(Transaction.net_profit)).filter(
-            Transaction.created_at.between(start, end)
-        ).scalar()
-        total_net_profit = float(total_net_profit_result) if total_net_profit_result is not None else 0.00
-
-        # ===== CASH FLOW =====
-        cash_in_result = db.session.query(func.sum(CashFlow.amount)).filter(
-            CashFlow.type == 'cash_in',
-            CashFlow.created_at.between(start, end)
-        ).scalar()
-        cash_in_period = float(cash_in_result) if cash_in_result is not None else 0.00
-
-        cash_out_result = db.session.query(func.sum(CashFlow.amount)).filter(
-            CashFlow.type == 'cash_out',
-            CashFlow.created_at.between(start, end)
-        ).scalar()
-        cash_out_period = float(cash_out_result) if cash_out_result is not None else 0.00
-
-        net_cash_flow = cash_in_period - cash_out_period
-
-        # ===== SERVICE BREAKDOWN =====
-        service_breakdown = db.session.query(
-            Service.id.label('service_id'),
-            Service.name,
-            Service.category,
-            func.sum(Transaction.amount).label('revenue'),
-            func.count(Transaction.id).label('count'),
-            func.sum(Transaction.service_fee).label('service_fee_total'),
-            func.sum(Transaction.bank_fee).label('bank_fee_total'),
-            func.sum(Transaction.net_profit).label('net_profit_total')
-        ).join(Transaction, Service.id == Transaction.service_id).filter(
-            Transaction.created_at.between(start, end)
-        ).group_by(Service.id, Service.name, Service.category).order_by(func.sum(Transaction.amount).desc()).all()
-
-        service_data = []
-        for row in service_breakdown:
-            service_data.append({
-                'service_id': row[0],
-                'name': row[1],
-                'category': row[2],
-                'revenue': float(row[3]) if row[3] is not None else 0.00,
-                'transaction_count': int(row[4]) if row[4] is not None else 0,
-                'service_fee_total': float(row[5]) if row[5] is not None else 0.00,
-                'bank_fee_total': float(row[6]) if row[6] is not None else 0.00,
-                'net_profit_total': float(row[7]) if row[7] is not None else 0.00
-            })
-
-        # ===== DAILY BREAKDOWN (for weekly/monthly reports) =====
-        daily_breakdown = []
-        if (end - start).days > 1:  # Only for periods longer than 1 day
-            daily_rows = db.session.query(
-                func.date(Transaction.created_at).label('date'),
-                func.sum(Transaction.amount).label('revenue'),
-                func.count(Transaction.id).label('count'),
-                func.sum(Transaction.net_profit).label('net_profit')
-            ).filter(
-                Transaction.created_at.between(start, end)
-            ).group_by(func.date(Transaction.created_at)).order_by(func.date(Transaction.created_at)).all()
-
-            # Fill in missing dates with zero values
-            cursor = start.replace(hour=0, minute=0, second=0, microsecond=0)
-            daily_dict = {str(row[0]): row for row in daily_rows}
+        engine = request.args.get('engine') or current_app.config.get('REPORT_ENGINE', ENGINE_SQL)
+        if engine not in available_engines():
+            return error_response(
+                message=f'Engine laporan tidak tersedia. Pilihan: {", ".join(available_engines())}',
+                error='INVALID_ENGINE',
+                status_code=400
+            )
 
-            while cursor.date() <= end.date():
-                date_str = cursor.strftime('%Y-%m-%d')
-                row = daily_dict.get(date_str)
-                daily_breakdown.append({
-                    'date': date_str,
-                    'revenue': float(row[1]) if row and row[1] is not None else 0.00,
-                    'transaction_count': int(row[2]) if row and row[2] is not None else 0,
-                    'net_profit': float(row[3]) if row and row[3] is not None else 0.00
-                })
-                cursor += timedelta(days=1)
+        # Hari tertutup dari cache laporan, bulan tertutup dari analytics store, sisanya dari database (utils/report_engine.py)
+        report = build_report(start, end, engine)
 
-        # ===== EDC MACHINE PERFORMANCE =====
-        edc_performance = db.session.query(
-            EdcMachine.id.label('edc_id'),
-            EdcMachine.name,
-            func.sum(Transaction.amount).label('revenue'),
-            func.count(Transaction.id).label('count')
-        ).join(Transaction, EdcMachine.id == Transaction.edc_machine_id).filter(
-            Transaction.created_at.between(start, end)
-        ).group_by(EdcMachine.id, EdcMachine.name).order_by(func.sum(Transaction.amount).desc()).all()
+        return success_response(
+            data={
+                'period': {
+                    'name': period_name,
+                    'start_date': start.strftime('%Y-%m-%d'),
+                    'end_date': end.strftime('%Y-%m-%d'),
+                    'days': (end - start).days + 1
+                },
+                **report
+            },
+            message='Laporan berhasil diambil',
+            status_code=200
+        )
+    except ReportTimeout as e:
+        return error_response(
+            message=str(e),
+            error='REPORT_TIMEOUT',
+            status_code=504
+        )
+    except Exception as e:
+        return error_response(
+            message='Terjadi kesalahan saat mengambil laporan',
+            error='INTERNAL_ERROR',
+            details={'error': str(e)},
+            status_code=500
+        )
 
-        edc_data = []
-        for row in edc_performance:
-            edc_data.append({
-                'edc_id': row[0],
-                'name': row[1],
-                'revenue': float(row[2]) if row[2] is not None else 0.00,
-                'transaction_count': int(row[3]) if row[3] is not None else 0
-            })
+def numpy_unavailable_response():
+    return error_response(
+        message='Fitur ini membutuhkan numpy yang belum terpasang di server',
+        error='FEATURE_UNAVAILABLE',
+        status_code=503
+    )
 
-        # ===== AGENT PERFORMANCE (if multi-agent enabled in future) =====
-        agent_performance = db.session.query(
-            AgentProfile.id.label('agent_id'),
-            AgentProfile.agent_name,
-            func.sum(Transaction.amount).label('revenue'),
-            func.count(Transaction.id).label('count')
-        ).join(Transaction, AgentProfile.id == Transaction.agent_profile_id).filter(
-            Transaction.created_at.between(start, end)
-        ).group_by(AgentProfile.id, AgentProfile.agent_name).order_by(func.sum(Transaction.amount).desc()).all()
+@reports_bp.route('/heatmap', methods=['GET'])
+@token_required
+@replica_reads
+def get_heatmap():
+    """
+    Get jumlah transaksi, amount dan fee per hari (Senin..Minggu) x jam (0..23)
+    Params:
+    - period: daily, weekly, monthly, yearly, custom (default: monthly)
+    - start_date, end_date: YYYY-MM-DD (for custom period)
+    - agent_id: hanya satu outlet (opsional)
+    """
+    try:
+        start, end, period_name = parse_report_date_range(request)
+        if not start or not end:
+            return error_response(
+                message='Parameter periode tidak valid. Gunakan period=custom dengan start_date dan end_date, atau period=daily/weekly/monthly/yearly',
+                error='INVALID_PERIOD',
+                status_code=400
+            )
+        if np is None:
+            return numpy_unavailable_response()
 
-        agent_data = []
-        for row in agent_performance:
-            agent_data.append({
-                'agent_id': row[0],
-                'agent_name': row[1],
-                'revenue': float(row[2]) if row[2] is not None else 0.00,
-                'transaction_count': int(row[3]) if row[3] is not None else 0
-            })
+        # Dari rollup per jam (utils/hourly_rollup.py)
+        data = heatmap(start, end, request.args.get('agent_id', type=int))
 
         return success_response(
             data={
@@ -245,33 +172,63 @@ def get_reports():
                     'end_date': end.strftime('%Y-%m-%d'),
                     'days': (end - start).days + 1
                 },
-                'summary': {
-                    'total_revenue': float(total_revenue),
-                    'total_transactions': int(total_transactions),
-                    'avg_transaction_amount': float(avg_transaction_amount),
-                    'total_fees': float(total_fees),
-                    'total_net_profit': float(total_net_profit),
-                    'cash_in': float(cash_in_period),
-                    'cash_out': float(cash_out_period),
-                    'net_cash_flow': float(net_cash_flow)
-                },
-                'fees_breakdown': {
-                    'service_fee': float(total_service_fee),
-                    'bank_fee': float(total_bank_fee),
-                    'extra_fee': float(total_extra_fee)
-                },
-                'service_breakdown': service_data,
-                'daily_breakdown': daily_breakdown,
-                'edc_performance': edc_data,
-                'agent_performance': agent_data
+                **data
             },
-            message='Laporan berhasil diambil',
+            message='Heatmap berhasil diambil',
             status_code=200
         )
     except Exception as e:
         return error_response(
-            message='Terjadi kesalahan saat mengambil laporan',
+            message='Terjadi kesalahan saat mengambil heatmap',
             error='INTERNAL_ERROR',
             details={'error': str(e)},
             status_code=500
-        )
\ No newline at end of file
+        )
+
+@reports_bp.route('/intraday', methods=['GET'])
+@token_required
+@replica_reads
+def get_intraday():
+    """
+    Get seri transaksi sepanjang satu hari per bucket menit
+    Params:
+    - date: YYYY-MM-DD (default: hari ini)
+    - interval: 5, 15 atau 60 menit (default: 60)
+    - agent_id: hanya satu outlet (opsional)
+    """
+    try:
+        date_param = request.args.get('date')
+        try:
+            day = datetime.strptime(date_param, '%Y-%m-%d').date() if date_param else datetime.now().date()
+        except ValueError:
+            return error_response(
+                message='Format date tidak valid. Gunakan YYYY-MM-DD',
+                error='INVALID_DATE_FORMAT',
+                status_code=400
+            )
+
+        interval = request.args.get('interval', 60, type=int)
+        if interval not in INTRADAY_INTERVALS:
+            return error_response(
+                message=f'Interval tidak valid. Pilihan: {", ".join(map(str, INTRADAY_INTERVALS))} menit',
+                error='INVALID_INTERVAL',
+                status_code=400
+            )
+        if np is None:
+            return numpy_unavailable_response()
+
+        # Interval 60 dari rollup per jam, 5/15 dari transaksi hari itu (utils/hourly_rollup.py)
+        data = intraday(day, interval, request.args.get('agent_id', type=int))
+
+        return success_response(
+            data={'date': day.strftime('%Y-%m-%d'), **data},
+            message='Data intraday berhasil diambil',
+            status_code=200
+        )
+    except Exception as e:
+        return error_response(
+            message='Terjadi kesalahan saat mengambil data intraday',
+            error='INTERNAL_ERROR',
+            details={'error': str(e)},
+            status_code=500
+        )
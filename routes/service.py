@@ -1,20 +1,21 @@
 from flask import Blueprint, request
-from models.user import db, User
+from models.user import db
 from models.service import Service
 from models.service_fee import ServiceFee
 from utils.response import success_response, error_response
 from utils.jwt_handler import token_required
+from utils.current_user import user_has_role
+from utils.catalog_cache import conditional_catalog
+from utils.catalog_sync import record_catalog_change, record_catalog_delete
 
 service_bp = Blueprint('service', __name__, url_prefix='/api/services')
 
 def check_admin_role(user_id):
     """Check if user is admin (can manage services)"""
-    user = User.query.get(user_id)
-    if not user or user.role not in ['owner', 'admin']:
-        return False
-    return True
+    return user_has_role(user_id, 'owner', 'admin')
 
 @service_bp.route('', methods=['GET'])
+@conditional_catalog('services')
 def get_services():
     """Get all services (public endpoint)"""
     try:
@@ -114,6 +115,8 @@ def create_service():
         )
         
         db.session.add(new_service)
+        db.session.flush()
+        record_catalog_change('services', new_service.id, 'insert')
         db.session.commit()
         
         return success_response(
@@ -190,6 +193,7 @@ def update_service(service_id):
         if 'requires_target' in data:
             service.requires_target = data.get('requires_target', False)
         
+        record_catalog_change('services', service.id, 'update')
         db.session.commit()
         
         return success_response(
@@ -230,6 +234,7 @@ def delete_service(service_id):
                 status_code=404
             )
         
+        record_catalog_delete('services', service_id)
         db.session.delete(service)
         db.session.commit()
         
@@ -1,20 +1,21 @@
 from flask import Blueprint, request
-from models.user import db, User
+from models.user import db
 from models.service import Service
 from models.service_fee import ServiceFee
 from utils.response import success_response, error_response
 from utils.jwt_handler import token_required
+from utils.current_user import user_has_role
+from utils.catalog_cache import conditional_catalog
+from utils.catalog_sync import record_catalog_change
 
 service_fee_bp = Blueprint('service_fee', __name__, url_prefix='/api/service-fees')
 
 def check_admin_role(user_id):
     """Check if user is admin"""
-    user = User.query.get(user_id)
-    if not user or user.role not in ['owner', 'admin']:
-        return False
-    return True
+    return user_has_role(user_id, 'owner', 'admin')
 
 @service_fee_bp.route('', methods=['GET'])
+@conditional_catalog('service_fees')
 def get_service_fees():
     """Get all service fees"""
     try:
@@ -142,6 +143,8 @@ def create_service_fee():
         )
         
         db.session.add(new_fee)
+        db.session.flush()
+        record_catalog_change('service_fees', new_fee.id, 'insert')
         db.session.commit()
         
         return success_response(
@@ -250,6 +253,7 @@ def update_service_fee(fee_id):
                 status_code=400
             )
         
+        record_catalog_change('service_fees', fee_obj.id, 'update')
         db.session.commit()
         
         return success_response(
@@ -291,6 +295,7 @@ def delete_service_fee(fee_id):
             )
         
         db.session.delete(fee_obj)
+        record_catalog_change('service_fees', fee_id, 'delete')
         db.session.commit()
         
         return success_response(
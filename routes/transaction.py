@@ -1,15 +1,18 @@
-from flask import Blueprint, request, send_file
-from models.user import db, User
+from flask import Blueprint, request, send_file, current_app
+from models.user import db
 from models.agent_profile import AgentProfile
-from models.edc_machine import EdcMachine
 from models.service import Service
-from models.service_fee import ServiceFee
-from models.bank_fee import BankFee
 from models.transaction import Transaction
-from models.cash_flow import CashFlow
-from utils.response import success_response, error_response
+from utils.response import success_response, error_response, wants_compact_response
+from utils.validators import ValidationError
 from utils.jwt_handler import token_required
-import uuid
+from utils.current_user import load_current_user
+from utils.db_pools import use_db_pool, POOL_REPORTING
+from utils.listing import TRANSACTION_LISTING
+from utils.partitioning import partitioned_entity, find_archived
+from utils.transaction_posting import post_transaction, post_transaction_batch, PostingError
+from utils.idempotency import idempotent
+from sqlalchemy import func, select
 from datetime import datetime, timedelta
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter, A4
@@ -28,64 +31,49 @@ def check_agent_ownership(user_id, agent_id):
     return True
 
 def generate_transaction_number():
-    """Generate unique transaction number"""
-    return f"TRX-{uuid.uuid4().hex[:12].upper()}"
-
-def get_service_fee(service_id, amount):
-    """
-    Get service fee berdasarkan service_id dan amount
-    Mencari fee yang sesuai dengan range amount
-    """
-    try:
-        service_fee = ServiceFee.query.filter(
-            ServiceFee.service_id == service_id,
-            ServiceFee.min_amount <= amount,
-            ServiceFee.max_amount >= amount
-        ).first()
-        
-        if service_fee:
-            return float(service_fee.fee)
-        return 0.00
-    except Exception:
-        return 0.00
-
-def get_bank_fee(edc_machine_id, service_id):
-    """
-    Get bank fee berdasarkan edc_machine_id dan service_id
-    """
-    try:
-        bank_fee = BankFee.query.filter(
-            BankFee.edc_machine_id == edc_machine_id,
-            BankFee.service_id == service_id
-        ).first()
-        
-        if bank_fee:
-            return float(bank_fee.fee)
-        return 0.00
-    except Exception:
-        return 0.00
+    """Generate unique transaction number (scheme dari config TRANSACTION_NUMBER_SCHEME)"""
+    return current_app.extensions['transaction_number']()
 
 @transaction_bp.route('', methods=['GET'])
 @token_required
 def get_transactions():
-    """Get all transactions (accessible by all authenticated users)"""
+    """
+    Get all transactions (accessible by all authenticated users)
+    Params:
+    - agent_id, limit, offset
+    - fields: comma separated field names (default: all fields)
+    """
     try:
         agent_id = request.args.get('agent_id')
         limit = request.args.get('limit', 50, type=int)
         offset = request.args.get('offset', 0, type=int)
         
-        query = Transaction.query
+        try:
+            listing = TRANSACTION_LISTING.from_request(request)
+        except ValidationError as e:
+            return error_response(
+                message=str(e),
+                error='INVALID_FIELDS',
+                status_code=400
+            )
+        
+        # Termasuk transaksi di tabel arsip (utils/partitioning.py)
+        source = partitioned_entity(Transaction)
+        filters = []
         
         if agent_id:
-            query = query.filter_by(agent_profile_id=int(agent_id))
+            filters.append(source.agent_profile_id == int(agent_id))
         # No ownership restriction - all authenticated users can see all transactions
         
-        total = query.count()
-        transactions = query.order_by(Transaction.created_at.desc()).limit(limit).offset(offset).all()
+        total = db.session.query(func.count(source.id)).filter(*filters).scalar()
+        transactions = listing.fetch(
+            listing.select(source).where(*filters)
+            .order_by(source.created_at.desc()).limit(limit).offset(offset)
+        )
         
         return success_response(
             data={
-                "transactions": [trx.to_dict() for trx in transactions],
+                "transactions": transactions,
                 "total": total,
                 "limit": limit,
                 "offset": offset
@@ -106,7 +94,8 @@ def get_transactions():
 def get_transaction(transaction_id):
     """Get specific transaction (accessible by all authenticated users)"""
     try:
-        transaction = Transaction.query.get(transaction_id)
+        # Transaksi di bulan yang sudah diarsip tetap bisa dibaca
+        transaction = Transaction.query.get(transaction_id) or find_archived(Transaction, transaction_id)
         
         if not transaction:
             return error_response(
@@ -133,19 +122,34 @@ def get_transaction(transaction_id):
 @transaction_bp.route('/today', methods=['GET'])
 @token_required
 def get_today_transactions():
-    """Get all transactions for today (cashier endpoint - accessible by all authenticated users)"""
+    """
+    Get all transactions for today (cashier endpoint - accessible by all authenticated users)
+    Params:
+    - fields: comma separated field names (default: all fields)
+    """
     try:
         today = datetime.now().date()
         tomorrow = today + timedelta(days=1)
         
-        transactions = Transaction.query.filter(
-            Transaction.created_at >= today,
-            Transaction.created_at < tomorrow
-        ).order_by(Transaction.created_at.desc()).all()
+        try:
+            listing = TRANSACTION_LISTING.from_request(request)
+        except ValidationError as e:
+            return error_response(
+                message=str(e),
+                error='INVALID_FIELDS',
+                status_code=400
+            )
+        
+        transactions = listing.fetch(
+            listing.select().where(
+                Transaction.created_at >= today,
+                Transaction.created_at < tomorrow
+            ).order_by(Transaction.created_at.desc())
+        )
         
         return success_response(
             data={
-                "transactions": [trx.to_dict() for trx in transactions],
+                "transactions": transactions,
                 "total": len(transactions)
             },
             message='Data transaksi hari ini berhasil diambil',
@@ -161,6 +165,7 @@ def get_today_transactions():
 
 @transaction_bp.route('/report/daily/pdf', methods=['GET'])
 @token_required
+@use_db_pool(POOL_REPORTING)
 def download_daily_report_pdf():
     """Download PDF report of today's transactions"""
     try:
@@ -168,14 +173,30 @@ def download_daily_report_pdf():
         tomorrow = today + timedelta(days=1)
         
         # Get current user info
-        current_user = User.query.get(request.user_id)
+        current_user = load_current_user()
         cashier_name = current_user.name if current_user else "Unknown"
         
-        # Get today's transactions
-        transactions = Transaction.query.filter(
-            Transaction.created_at >= today,
-            Transaction.created_at < tomorrow
-        ).order_by(Transaction.created_at.asc()).all()
+        # Get today's transactions (only the columns the report needs, as plain rows)
+        transactions = db.session.execute(
+            select(
+                Transaction.created_at,
+                Transaction.transaction_number,
+                Transaction.cashier_name,
+                Transaction.customer_name,
+                Transaction.service_id,
+                Transaction.amount,
+                Transaction.service_fee,
+                Transaction.bank_fee,
+                Transaction.extra_fee,
+                Transaction.net_profit
+            ).where(
+                Transaction.created_at >= today,
+                Transaction.created_at < tomorrow
+            ).order_by(Transaction.created_at.asc())
+        ).all()
+        
+        # Service names in one query instead of one lookup per row
+        service_names = dict(db.session.execute(select(Service.id, Service.name)).all())
         
         # Get unique cashier names from transactions
         cashier_names = list(set(trx.cashier_name for trx in transactions if trx.cashier_name))
@@ -260,9 +281,7 @@ def download_daily_report_pdf():
             
             # Table rows
             for i, trx in enumerate(transactions, 1):
-                # Get service name
-                service = Service.query.get(trx.service_id)
-                service_name = service.name if service else "Unknown"
+                service_name = service_names.get(trx.service_id, "Unknown")
                 
                 row = [
                     str(i),
@@ -339,20 +358,22 @@ def download_daily_report_pdf():
 
 @transaction_bp.route('', methods=['POST'])
 @token_required
+@idempotent('transactions.create')
 def create_transaction():
     """
     Create new transaction
     Service fee dan bank fee akan otomatis terisi berdasarkan:
     - Service fee: dari tabel service_fees berdasarkan service_id dan amount range
     - Bank fee: dari tabel bank_fees berdasarkan edc_machine_id dan service_id
+    
+    Params:
+    - profile=compact (atau header Prefer: return=minimal): tanpa fee_calculation
+    
+    Headers:
+    - Idempotency-Key (optional): retry dengan key yang sama mengembalikan
+      response pertama tanpa membuat transaksi baru
     """
     try:
-        user_id = request.user_id
-        
-        # Get current user info for cashier name
-        current_user = User.query.get(user_id)
-        cashier_name = current_user.name if current_user else "Unknown"
-        
         data = request.get_json()
         
         if not data:
@@ -362,220 +383,112 @@ def create_transaction():
                 status_code=400
             )
         
-        edc_machine_id = data.get('edc_machine_id')
-        service_id = data.get('service_id')
-        agent_profile_id = data.get('agent_profile_id')  # Optional now
-        customer_name = data.get('customer_name', '').strip()
-        target_number = data.get('target_number', '').strip() if data.get('target_number') else None
-        reference_number = data.get('reference_number', '').strip() if data.get('reference_number') else None
-        amount = data.get('amount', 0)
-        extra_fee = data.get('extra_fee', 0)  # extra_fee bisa di-set manual
-        
-        # Validate required fields
-        if not edc_machine_id or not service_id:
-            return error_response(
-                message='edc_machine_id dan service_id wajib diisi',
-                error='MISSING_FIELDS',
-                status_code=400
-            )
-        
         # No ownership check - accessible by all authenticated users
-        
-        # Check EDC machine exists
-        edc = EdcMachine.query.get(edc_machine_id)
-        if not edc:
+        try:
+            transaction_data = post_transaction(data, request.user_id, generate_transaction_number)
+        except PostingError as e:
+            db.session.rollback()
             return error_response(
-                message='EDC machine tidak ditemukan',
-                error='NOT_FOUND',
-                status_code=404
+                message=e.message,
+                error=e.error,
+                status_code=e.status_code
             )
+        db.session.commit()
         
-        # Check service exists
-        service = Service.query.get(service_id)
-        if not service:
-            return error_response(
-                message='Service tidak ditemukan',
-                error='NOT_FOUND',
-                status_code=404
-            )
+        if not wants_compact_response():
+            # total = amount (yang diterima customer) + service_fee + bank_fee + extra_fee
+            # net profit = amount yang diterima dikurangi extra fee
+            transaction_data['fee_calculation'] = {
+                "service_fee_source": "auto-calculated",
+                "bank_fee_source": "auto-calculated",
+                "calculation_details": {
+                    "amount": f"nilai final yang diterima customer (tidak dipotong)",
+                    "service_fee": "otomatis dari service_fees tabel (amount range)",
+                    "bank_fee": "otomatis dari bank_fees tabel (edc + service)",
+                    "extra_fee": "biaya tambahan manual (opsional)",
+                    "total_received": f"amount + service_fee + bank_fee + extra_fee = {transaction_data['total_received']}",
+                    "net_profit": f"amount - extra_fee = {transaction_data['net_profit']}"
+                }
+            }
         
-        # Get agent profile untuk cek uang tunai (jika ada)
-        agent = None
-        if agent_profile_id is not None:
-            try:
-                agent_profile_id = int(agent_profile_id)
-            except (ValueError, TypeError):
-                return error_response(
-                    message='agent_profile_id harus berupa angka',
-                    error='INVALID_INPUT',
-                    status_code=400
-                )
-            agent = AgentProfile.query.get(agent_profile_id)
-            if not agent:
-                return error_response(
-                    message='Agent profile tidak ditemukan',
-                    error='NOT_FOUND',
-                    status_code=404
-                )
+        return success_response(
+            data=transaction_data,
+            message='Transaction berhasil dibuat dengan fee otomatis',
+            status_code=201
+        )
+    
+    except Exception as e:
+        db.session.rollback()
+        return error_response(
+            message='Terjadi kesalahan saat membuat transaction',
+            error='INTERNAL_ERROR',
+            details={'error': str(e)},
+            status_code=500
+        )
+
+@transaction_bp.route('/batch', methods=['POST'])
+@token_required
+@idempotent('transactions.batch')
+def create_transactions_batch():
+    """
+    Create many transactions at once (sync antrian transaksi terminal)
+    
+    Request body:
+    {
+        "transactions": [
+            {"edc_machine_id": 1, "service_id": 2, "agent_profile_id": 1, "amount": 100000, ...},
+            ...
+        ]
+    }
+    
+    Setiap item diproses seperti POST /api/transactions. Item yang gagal
+    validasi dilaporkan per item; item yang valid disimpan dalam satu
+    DB transaction.
+    """
+    try:
+        user_id = request.user_id
         
-        # Validate amount
-        try:
-            amount = float(amount)
-            extra_fee = float(extra_fee)
-            
-            if amount <= 0:
-                return error_response(
-                    message='Amount harus lebih dari 0',
-                    error='INVALID_INPUT',
-                    status_code=400
-                )
-            
-            if extra_fee < 0:
-                return error_response(
-                    message='Extra fee tidak boleh negatif',
-                    error='INVALID_INPUT',
-                    status_code=400
-                )
-        except (ValueError, TypeError):
+        data = request.get_json()
+        items = data.get('transactions') if isinstance(data, dict) else None
+        
+        if not items or not isinstance(items, list):
             return error_response(
-                message='Amount harus berupa angka',
-                error='INVALID_INPUT',
+                message='Field transactions wajib diisi berupa list',
+                error='INVALID_REQUEST',
                 status_code=400
             )
         
-        # VALIDASI SALDO: Pastikan saldo EDC atau uang tunai cukup sesuai service category
-        edc_saldo = float(edc.saldo) if edc.saldo else 0.00
-        agent_tunai = float(agent.total_balance) if agent and agent.total_balance else 0.00
+        max_items = current_app.config.get('TRANSACTION_BATCH_MAX_ITEMS', 500)
+        if len(items) > max_items:
+            return error_response(
+                message=f'Maksimal {max_items} transaksi per batch',
+                error='BATCH_TOO_LARGE',
+                status_code=413
+            )
         
-        if service.category and service.category.lower() == "transfer":
-            # Transfer: butuh saldo EDC cukup
-            if edc_saldo < amount:
-                return error_response(
-                    message=f'Saldo EDC tidak cukup. Saldo tersedia: {edc_saldo}, Amount dibutuhkan: {amount}',
-                    error='INSUFFICIENT_BALANCE',
-                    status_code=400
-                )
-        elif service.category and service.category.lower() == "tarik tunai":
-            # Tarik tunai: agent opsional. Jika agent diberikan, pastikan saldo tunai cukup.
-            if agent:
-                if agent_tunai < amount:
-                    return error_response(
-                        message=f'Uang tunai tidak cukup. Saldo tersedia: {agent_tunai}, Amount dibutuhkan: {amount}',
-                        error='INSUFFICIENT_BALANCE',
-                        status_code=400
-                    )
-        
-        # AUTO-FILL: Get service fee dari database berdasarkan amount range
-        service_fee = get_service_fee(service_id, amount)
-        
-        # AUTO-FILL: Get bank fee dari database berdasarkan edc_machine_id dan service_id
-        bank_fee = get_bank_fee(edc_machine_id, service_id)
-        
-        # Calculate total yang harus dikumpulkan (amount adalah nilai final, tidak boleh dipotong)
-        # total = amount (yang diterima customer) + service_fee + bank_fee + extra_fee
-        total_received = amount + service_fee + bank_fee + extra_fee
-        
-        # Net profit = amount yang diterima dikurangi extra fee
-        net_profit = amount - extra_fee
-        
-        # Info yang di-return untuk user
-        fee_info = {
-            "service_fee_source": "auto-calculated",
-            "bank_fee_source": "auto-calculated",
-            "calculation_details": {
-                "amount": f"nilai final yang diterima customer (tidak dipotong)",
-                "service_fee": "otomatis dari service_fees tabel (amount range)",
-                "bank_fee": "otomatis dari bank_fees tabel (edc + service)",
-                "extra_fee": "biaya tambahan manual (opsional)",
-                "total_received": f"amount + service_fee + bank_fee + extra_fee = {total_received}",
-                "net_profit": f"amount - extra_fee = {net_profit}"
-            }
-        }
-        
-        new_transaction = Transaction(
-            transaction_number=generate_transaction_number(),
-            edc_machine_id=edc_machine_id,
-            service_id=service_id,
-            agent_profile_id=agent_profile_id,
-            user_id=user_id,
-            cashier_name=cashier_name,
-            customer_name=customer_name if customer_name else None,
-            target_number=target_number,
-            reference_number=reference_number,
-            amount=amount,
-            service_fee=service_fee,
-            bank_fee=bank_fee,
-            extra_fee=extra_fee,
-            net_profit=net_profit
-        )
+        current_user = load_current_user()
+        cashier_name = current_user.name if current_user else "Unknown"
         
-        db.session.add(new_transaction)
+        results = post_transaction_batch(items, user_id, cashier_name, generate_transaction_number)
         db.session.commit()
         
-        # Update EDC machine saldo dan create cash flow berdasarkan service category (jika agent ada)
-        try:
-            if service.category and service.category.lower() == "transfer":
-                # Transfer: saldo EDC berkurang, uang tunai bertambah (cash_in)
-                edc.saldo = float(edc.saldo) - amount
-                db.session.add(edc)
-                if agent:
-                    agent.total_balance = float(agent.total_balance) + amount
-                    db.session.add(agent)
-                    
-                    # Catat cash_in (uang masuk)
-                    cash_flow = CashFlow(
-                        agent_profile_id=agent_profile_id,
-                        user_id=user_id,
-                        type="cash_in",
-                        source=f"Transfer EDC - {service.name}",
-                        amount=amount,
-                        description=f"Transfer dari EDC. Transaction: {new_transaction.transaction_number}"
-                    )
-                    db.session.add(cash_flow)
-                
-            elif service.category and service.category.lower() == "tarik tunai":
-                # Tarik tunai: uang tunai berkurang (jika ada agent), saldo EDC bertambah (cash_out)
-                if agent:
-                    agent.total_balance = float(agent.total_balance) - amount
-                    db.session.add(agent)
-                
-                # Catat cash_out (uang keluar) — agent_profile_id boleh None
-                cash_flow = CashFlow(
-                    agent_profile_id=agent_profile_id if agent else None,
-                    user_id=user_id,
-                    type="cash_out",
-                    source=f"Tarik Tunai - {service.name}",
-                    amount=amount,
-                    description=f"Tarik tunai. Transaction: {new_transaction.transaction_number}"
-                )
-                db.session.add(cash_flow)
-                
-                edc.saldo = float(edc.saldo) + amount
-                db.session.add(edc)
-            
-            db.session.commit()
-        except Exception as e:
-            db.session.rollback()
-            return error_response(
-                message='Terjadi kesalahan saat update saldo dan cash flow',
-                error='INTERNAL_ERROR',
-                details={'error': str(e)},
-                status_code=500
-            )
-        
-        transaction_data = new_transaction.to_dict()
-        transaction_data['fee_calculation'] = fee_info
+        succeeded = sum(1 for result in results if result['success'])
         
         return success_response(
-            data=transaction_data,
-            message='Transaction berhasil dibuat dengan fee otomatis',
-            status_code=201
+            data={
+                'results': results,
+                'total': len(results),
+                'succeeded': succeeded,
+                'failed': len(results) - succeeded
+            },
+            message=f'{succeeded} dari {len(results)} transaksi berhasil dibuat',
+            status_code=200
         )
     
     except Exception as e:
         db.session.rollback()
         return error_response(
-            message='Terjadi kesalahan saat membuat transaction',
+            message='Terjadi kesalahan saat membuat batch transaction',
             error='INTERNAL_ERROR',
             details={'error': str(e)},
             status_code=500
@@ -601,6 +514,12 @@ def delete_transaction(transaction_id):
         transaction = Transaction.query.get(transaction_id)
         
         if not transaction:
+            if find_archived(Transaction, transaction_id) is not None:
+                return error_response(
+                    message='Transaction sudah diarsip dan tidak dapat dihapus',
+                    error='ARCHIVED',
+                    status_code=409
+                )
             return error_response(
                 message='Transaction tidak ditemukan',
                 error='NOT_FOUND',
@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import BigInteger
+from sqlalchemy.ext.compiler import compiles
+
+from app import create_app
+from models.user import db
+
+PASSWORD = 'Secret123'
+
+
+# SQLite only auto-increments INTEGER PRIMARY KEY, the models use BIGINT ids
+@compiles(BigInteger, 'sqlite')
+def _sqlite_big_integer(type_, compiler, **kw):
+    return 'INTEGER'
+
+
+def auth_headers(client, email, password=PASSWORD):
+    resp = client.post('/api/auth/login', json={'email': email, 'password': password})
+    assert resp.status_code == 200, resp.get_json()
+    return {'Authorization': 'Bearer ' + resp.get_json()['data']['token']}
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        # Tables of models imported by the blueprints
+        db.create_all()
+    # Token versions are cached per process; always read them from this app's DB
+    app.config['TOKEN_VERSION_CACHE_SECONDS'] = 0
+    yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def outlet(client):
+    """Owner + kasir with one agent, one EDC, a transfer and a tarik tunai service and their fees"""
+    resp = client.post('/api/auth/register', json={'name': 'Owner Test', 'email': 'owner@test.local', 'password': PASSWORD})
+    owner = resp.get_json()['data']
+    headers = auth_headers(client, 'owner@test.local')
+    client.post('/api/auth/register', json={
+        'name': 'Kasir Test', 'email': 'kasir@test.local', 'password': PASSWORD,
+        'role': 'kasir', 'owner_id': owner['id']
+    })
+
+    transfer = client.post('/api/services', json={'name': 'Transfer BRI', 'category': 'transfer'}, headers=headers).get_json()['data']
+    tarik = client.post('/api/services', json={'name': 'Tarik Tunai', 'category': 'tarik tunai'}, headers=headers).get_json()['data']
+    agent = client.get('/api/agents', headers=headers).get_json()['data'][0]
+    edc = client.post('/api/edc-machines', json={
+        'agent_profile_id': agent['id'], 'name': 'EDC 1', 'bank_name': 'BRI', 'saldo': 5000000
+    }, headers=headers).get_json()['data']
+    client.post('/api/service-fees', json={'service_id': transfer['id'], 'min_amount': 0, 'max_amount': 10000000, 'fee': 5000}, headers=headers)
+    client.post('/api/bank-fees', json={'edc_machine_id': edc['id'], 'service_id': transfer['id'], 'fee': 2500}, headers=headers)
+
+    return SimpleNamespace(
+        owner_id=owner['id'],
+        agent_id=agent['id'],
+        edc_id=edc['id'],
+        transfer_id=transfer['id'],
+        tarik_id=tarik['id'],
+        headers=headers,
+        kasir_headers=auth_headers(client, 'kasir@test.local'),
+    )
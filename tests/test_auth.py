@@ -0,0 +1,96 @@
+import pytest
+
+import utils.token_version as token_version
+from utils.password_hashing import PasswordHasher, PasswordHasherBusy
+from tests.conftest import auth_headers
+
+
+@pytest.fixture
+def busy_hasher(monkeypatch):
+    def busy(self, function, *args):
+        raise PasswordHasherBusy('Server sedang sibuk, silakan coba lagi')
+    monkeypatch.setattr(PasswordHasher, '_run', busy)
+
+
+def assert_server_busy(resp):
+    assert resp.status_code == 503, resp.get_json()
+    assert resp.get_json()['error'] == 'SERVER_BUSY'
+
+
+def test_register_returns_503_when_hasher_is_busy(client, outlet, busy_hasher):
+    assert_server_busy(client.post('/api/auth/register', json={
+        'name': 'Kasir Dua', 'email': 'kasir2@test.local', 'password': 'Secret123', 'role': 'kasir',
+        'owner_id': outlet.owner_id
+    }, headers=outlet.headers))
+
+
+def test_password_change_returns_503_when_hasher_is_busy(client, outlet, busy_hasher):
+    assert_server_busy(client.put(f'/api/auth/users/{kasir_id(client, outlet)}', json={'password': 'Secret456'}, headers=outlet.headers))
+    # Nothing was changed: the kasir token is still valid
+    assert client.get('/api/auth/users', headers=outlet.kasir_headers).status_code != 401
+
+
+@pytest.fixture
+def cached_versions(app, monkeypatch):
+    # Default cache: revocation in this process must not wait for it to expire
+    app.config['TOKEN_VERSION_CACHE_SECONDS'] = 300
+    monkeypatch.setattr(token_version, '_versions', {})
+
+
+def kasir_id(client, outlet):
+    users = client.get('/api/auth/users', headers=outlet.headers).get_json()['data']
+    return next(user['id'] for user in users['users'] if user['email'] == 'kasir@test.local')
+
+
+def can_read(client, headers):
+    return client.get('/api/transactions', headers=headers).status_code == 200
+
+
+@pytest.mark.parametrize('change', [{'password': 'Secret456'}, {'status': 'inactive'}, {'role': 'owner'}])
+def test_revoked_token_is_rejected(client, outlet, cached_versions, change):
+    assert can_read(client, outlet.kasir_headers)
+
+    resp = client.put(f'/api/auth/users/{kasir_id(client, outlet)}', json=change, headers=outlet.headers)
+    assert resp.status_code == 200, resp.get_json()
+
+    resp = client.get('/api/transactions', headers=outlet.kasir_headers)
+    assert resp.status_code == 401
+    assert can_read(client, outlet.headers)
+
+
+def test_new_login_after_password_change_is_accepted(client, outlet, cached_versions):
+    client.put(f'/api/auth/users/{kasir_id(client, outlet)}', json={'password': 'Secret456'}, headers=outlet.headers)
+
+    assert can_read(client, auth_headers(client, 'kasir@test.local', 'Secret456'))
+
+
+def test_rejected_update_does_not_revoke(client, outlet, cached_versions):
+    resp = client.put(f'/api/auth/users/{kasir_id(client, outlet)}', json={'password': 'Secret456', 'role': 'admin'},
+                      headers=outlet.headers)
+    assert resp.status_code == 400
+
+    assert can_read(client, outlet.kasir_headers)
+
+
+def test_sparse_user_listing_matches_full_listing(client, outlet):
+    full = client.get('/api/auth/users?role=kasir', headers=outlet.headers).get_json()['data']
+    sparse = client.get('/api/auth/users?role=kasir&fields=email,agent_profile', headers=outlet.headers).get_json()['data']
+
+    assert sparse['pagination'] == full['pagination']
+    assert [user['email'] for user in full['users']] == ['kasir@test.local']
+    assert sparse['users'] == [
+        {key: user[key] for key in ('email', 'agent_profile') if key in user} for user in full['users']
+    ]
+    assert full['users'][0]['agent_profile']['id'] == outlet.agent_id
+
+
+def test_unknown_user_field_is_rejected(client, outlet):
+    resp = client.get('/api/auth/users?fields=password_hash', headers=outlet.headers)
+    assert resp.status_code == 400
+    assert resp.get_json()['error'] == 'INVALID_FIELDS'
+
+
+def test_name_change_keeps_sessions(client, outlet, cached_versions):
+    resp = client.put(f'/api/auth/users/{kasir_id(client, outlet)}', json={'name': 'Kasir Baru', 'role': 'kasir'}, headers=outlet.headers)
+    assert resp.status_code == 200, resp.get_json()
+    assert can_read(client, outlet.kasir_headers)
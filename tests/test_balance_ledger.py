@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+from models.user import db
+from models.agent_profile import AgentProfile
+from models.edc_machine import EdcMachine
+from models.balance_ledger import BalanceLedger
+from utils.balance_ledger import (
+    record_opening_balances, record_balance_change, balance_at, SOURCE_OPENING, SOURCE_ADD_SALDO
+)
+from utils.balance_slots import KIND_EDC
+
+
+def seed_pre_ledger_edc(app, outlet, saldo=500000):
+    """EDC row written before the ledger existed (no ledger entries at all)"""
+    with app.app_context():
+        edc = EdcMachine(agent_profile_id=outlet.agent_id, name='EDC Lama', bank_name='BCA', saldo=saldo)
+        db.session.add(edc)
+        db.session.commit()
+        return edc.id
+
+
+def ledger_check(client, outlet):
+    resp = client.get('/api/balances/reconcile?mode=ledger', headers=outlet.headers)
+    assert resp.status_code == 200
+    return resp.get_json()['data']
+
+
+def test_pre_ledger_balance_is_reported_as_no_baseline(client, app, outlet):
+    edc_id = seed_pre_ledger_edc(app, outlet)
+
+    report = ledger_check(client, outlet)
+
+    assert report['edc']['no_baseline'] == [edc_id]
+    assert report['edc']['drift'] == []
+    resp = client.get(f'/api/balances/edc/{edc_id}/at', query_string={'time': datetime.utcnow().isoformat()}, headers=outlet.headers)
+    assert resp.get_json()['data']['balance'] is None
+
+
+def test_opening_balances_are_recorded_once(client, app, outlet):
+    edc_id = seed_pre_ledger_edc(app, outlet)
+
+    with app.app_context():
+        assert record_opening_balances() == {'edc': 1, 'agent': 0}
+        assert record_opening_balances() == {'edc': 0, 'agent': 0}
+        opening = db.session.query(BalanceLedger).filter_by(kind=KIND_EDC, owner_id=edc_id).one()
+        assert opening.source == SOURCE_OPENING
+        assert float(opening.balance_after) == 500000
+        assert balance_at(KIND_EDC, edc_id, datetime.utcnow() + timedelta(seconds=1)) == 500000
+        assert balance_at(KIND_EDC, edc_id, opening.created_at - timedelta(seconds=1)) is None
+
+    report = ledger_check(client, outlet)
+    assert report['edc']['no_baseline'] == []
+    assert report['edc']['drift'] == []
+
+
+def test_opening_keeps_ledger_sum_equal_to_balance(client, app, outlet):
+    edc_id = seed_pre_ledger_edc(app, outlet)
+    with app.app_context():
+        # Mutation logged after the ledger shipped, before the opening was recorded
+        edc = db.session.get(EdcMachine, edc_id)
+        edc.saldo += 20000
+        record_balance_change(KIND_EDC, edc_id, 20000, SOURCE_ADD_SALDO)
+        db.session.commit()
+
+        record_opening_balances()
+        total = db.session.query(db.func.sum(BalanceLedger.delta)).filter_by(kind=KIND_EDC, owner_id=edc_id).scalar()
+        assert float(total) == 520000
+
+    assert ledger_check(client, outlet)['edc']['drift'] == []
+
+
+def test_new_outlets_start_with_a_baseline(client, app, outlet):
+    client.post('/api/transactions', json={
+        'edc_machine_id': outlet.edc_id, 'service_id': outlet.transfer_id,
+        'agent_profile_id': outlet.agent_id, 'amount': 100000
+    }, headers=outlet.kasir_headers)
+
+    report = ledger_check(client, outlet)
+
+    for kind in ('edc', 'agent'):
+        assert report[kind]['checked'] == 1
+        assert report[kind]['no_baseline'] == []
+        assert report[kind]['drift'] == []
+    with app.app_context():
+        assert float(db.session.get(AgentProfile, outlet.agent_id).total_balance) == 100000
@@ -0,0 +1,101 @@
+import pytest
+
+from models.user import db
+from models.balance_slot import BalanceSlot
+from utils.balance_slots import (
+    BALANCE_COLUMNS, KIND_AGENT, KIND_EDC, compact_balance_slots, current_balances
+)
+
+
+def post_transaction(client, outlet, service_id, amount):
+    resp = client.post('/api/transactions', json={
+        'edc_machine_id': outlet.edc_id, 'service_id': service_id,
+        'agent_profile_id': outlet.agent_id, 'amount': amount
+    }, headers=outlet.kasir_headers)
+    assert resp.status_code == 201, resp.get_json()
+
+
+def edc_listing(client, outlet, fields=None):
+    query = {'fields': fields} if fields else {}
+    resp = client.get('/api/edc-machines', query_string=query, headers=outlet.headers)
+    assert resp.status_code == 200, resp.get_json()
+    return resp.get_json()['data']
+
+
+@pytest.mark.parametrize('fields', [None, 'saldo', 'id,saldo', 'name,saldo'])
+def test_listing_includes_slot_credits_for_any_field_subset(client, app, outlet, sharded, fields):
+    post_transaction(client, outlet, outlet.transfer_id, 300000)
+    # Tarik tunai credits the EDC, which goes to a slot when sharded
+    post_transaction(client, outlet, outlet.tarik_id, 100000)
+
+    [machine] = edc_listing(client, outlet, fields)
+    assert machine['saldo'] == 5000000 - 300000 + 100000
+    if fields:
+        assert sorted(machine) == sorted(fields.split(','))
+
+
+@pytest.fixture
+def sharded(app):
+    app.config['BALANCE_SHARDS'] = 4
+
+
+def stored_and_slots(app, kind, owner_id):
+    with app.app_context():
+        model, column = BALANCE_COLUMNS[kind]
+        stored = getattr(db.session.get(model, owner_id), column)
+        slots = db.session.query(db.func.coalesce(db.func.sum(BalanceSlot.amount), 0)).filter_by(kind=kind, owner_id=owner_id).scalar()
+        return float(stored or 0), float(slots)
+
+
+def agent_balance(client, outlet):
+    [agent] = client.get('/api/agents', headers=outlet.headers).get_json()['data']
+    return agent['total_balance']
+
+
+def test_credit_goes_to_a_slot_and_counts_in_reads(client, app, outlet, sharded):
+    post_transaction(client, outlet, outlet.transfer_id, 300000)
+
+    # Transfer debits the EDC row and credits agent cash through a slot
+    assert stored_and_slots(app, KIND_AGENT, outlet.agent_id) == (0, 300000)
+    assert stored_and_slots(app, KIND_EDC, outlet.edc_id) == (4700000, 0)
+    assert agent_balance(client, outlet) == 300000
+    edc = client.get(f'/api/edc-machines/{outlet.edc_id}', headers=outlet.headers).get_json()['data']
+    assert edc['saldo'] == 4700000
+
+
+def test_debit_folds_slots_when_the_row_is_short(client, app, outlet, sharded):
+    post_transaction(client, outlet, outlet.transfer_id, 300000)
+    post_transaction(client, outlet, outlet.tarik_id, 200000)
+
+    assert stored_and_slots(app, KIND_AGENT, outlet.agent_id) == (100000, 0)
+    assert stored_and_slots(app, KIND_EDC, outlet.edc_id) == (4700000, 200000)
+
+
+def test_debit_beyond_row_plus_slots_is_rejected(client, app, outlet, sharded):
+    post_transaction(client, outlet, outlet.transfer_id, 300000)
+
+    resp = client.post('/api/transactions', json={
+        'edc_machine_id': outlet.edc_id, 'service_id': outlet.tarik_id,
+        'agent_profile_id': outlet.agent_id, 'amount': 300001
+    }, headers=outlet.kasir_headers)
+
+    assert resp.status_code == 400
+    assert resp.get_json()['error'] == 'INSUFFICIENT_BALANCE'
+    assert agent_balance(client, outlet) == 300000
+
+
+def test_compaction_folds_all_slots_without_changing_balances(client, app, outlet, sharded):
+    for service_id, amount in ((outlet.transfer_id, 300000), (outlet.tarik_id, 50000), (outlet.transfer_id, 20000)):
+        post_transaction(client, outlet, service_id, amount)
+    with app.app_context():
+        before = {kind: current_balances(kind) for kind in BALANCE_COLUMNS}
+
+        compact_balance_slots()
+
+        assert {kind: current_balances(kind) for kind in BALANCE_COLUMNS} == before
+        assert db.session.query(BalanceSlot).filter(BalanceSlot.amount != 0).count() == 0
+    assert stored_and_slots(app, KIND_AGENT, outlet.agent_id) == (270000, 0)
+    assert stored_and_slots(app, KIND_EDC, outlet.edc_id) == (4730000, 0)
+
+    report = client.get('/api/balances/reconcile', headers=outlet.headers).get_json()['data']
+    assert report['edc']['drift'] == [] and report['agent']['drift'] == []
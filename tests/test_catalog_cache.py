@@ -0,0 +1,93 @@
+import pytest
+from sqlalchemy import text
+
+from models.user import db
+from models.edc_machine import EdcMachine
+
+
+def etag(client, outlet, url):
+    resp = client.get(url, headers=outlet.headers)
+    assert resp.status_code == 200
+    return resp.headers['ETag']
+
+
+def is_fresh(client, outlet, url, tag):
+    resp = client.get(url, headers={**outlet.headers, 'If-None-Match': tag})
+    return resp.status_code == 304
+
+
+def test_unchanged_listing_is_not_modified_until_an_edit(client, outlet):
+    tag = etag(client, outlet, '/api/services')
+    assert is_fresh(client, outlet, '/api/services', tag)
+    assert not is_fresh(client, outlet, '/api/services?category=transfer', tag)
+
+    resp = client.put(f'/api/services/{outlet.tarik_id}', json={'name': 'Tarik Tunai BRI'}, headers=outlet.headers)
+    assert resp.status_code == 200, resp.get_json()
+
+    assert not is_fresh(client, outlet, '/api/services', tag)
+
+
+def test_service_delete_invalidates_cascaded_fee_tables(client, outlet):
+    tags = {url: etag(client, outlet, url) for url in ('/api/service-fees', '/api/bank-fees')}
+    assert all(is_fresh(client, outlet, url, tag) for url, tag in tags.items())
+
+    client.delete(f'/api/services/{outlet.transfer_id}', headers=outlet.headers)
+
+    for url, tag in tags.items():
+        assert not is_fresh(client, outlet, url, tag), url
+
+
+def test_edc_delete_invalidates_bank_fees(client, outlet):
+    tag = etag(client, outlet, '/api/bank-fees')
+
+    client.delete(f'/api/edc-machines/{outlet.edc_id}', headers=outlet.headers)
+
+    assert not is_fresh(client, outlet, '/api/bank-fees', tag)
+
+
+@pytest.mark.parametrize('shards', [1, 4])
+def test_batch_posting_invalidates_edc_listing(client, app, outlet, shards):
+    app.config['BALANCE_SHARDS'] = shards
+
+    # Transfer debits the EDC row, tarik tunai credits it (a slot when sharded)
+    for service_id in (outlet.transfer_id, outlet.tarik_id):
+        tag = etag(client, outlet, '/api/edc-machines')
+        resp = client.post('/api/transactions/batch', json={'transactions': [{
+            'edc_machine_id': outlet.edc_id, 'service_id': service_id,
+            'agent_profile_id': outlet.agent_id, 'amount': 100000
+        }]}, headers=outlet.kasir_headers)
+        assert resp.status_code in (200, 201), resp.get_json()
+
+        assert not is_fresh(client, outlet, '/api/edc-machines', tag)
+
+
+def test_write_from_another_process_changes_etag(client, app, outlet):
+    tag = etag(client, outlet, '/api/edc-machines')
+    assert is_fresh(client, outlet, '/api/edc-machines', tag)
+
+    # Plain SQL on its own connection: no session listener of this process runs
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(text('UPDATE edc_machines SET saldo = saldo + 1 WHERE id = :id'), {'id': outlet.edc_id})
+
+    assert not is_fresh(client, outlet, '/api/edc-machines', tag)
+
+
+def test_reconcile_fix_changes_edc_etag(client, app, outlet):
+    with app.app_context():
+        db.session.get(EdcMachine, outlet.edc_id).saldo = 123
+        db.session.commit()
+    tag = etag(client, outlet, '/api/edc-machines')
+
+    resp = client.post('/api/balances/reconcile', json={'fix': True}, headers=outlet.headers)
+    assert resp.get_json()['data']['edc']['fixed'] == 1
+
+    assert not is_fresh(client, outlet, '/api/edc-machines', tag)
+
+
+def test_validation_is_etag_only(client, outlet):
+    resp = client.get('/api/services', headers=outlet.headers)
+    assert 'Last-Modified' not in resp.headers
+
+    resp = client.get('/api/services', headers={**outlet.headers, 'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+    assert resp.status_code == 200
@@ -0,0 +1,66 @@
+from models.user import db
+from models.catalog_change import CatalogChange
+from models.service import Service
+
+
+def changes_since(client, outlet, since):
+    resp = client.get('/api/catalog/changes', query_string={'since': since}, headers=outlet.headers)
+    assert resp.status_code == 200, resp.get_json()
+    return resp.get_json()['data']
+
+
+def snapshot_version(client, outlet):
+    return client.get('/api/catalog/snapshot', headers=outlet.headers).get_json()['data']['version']
+
+
+def test_service_delete_logs_cascaded_fees(client, app, outlet):
+    version = snapshot_version(client, outlet)
+
+    assert client.delete(f'/api/services/{outlet.transfer_id}', headers=outlet.headers).status_code == 200
+
+    delta = changes_since(client, outlet, version)
+    assert delta['services']['deletes'] == [outlet.transfer_id]
+    assert len(delta['service_fees']['deletes']) == 1
+    assert len(delta['bank_fees']['deletes']) == 1
+
+
+def test_edc_delete_logs_cascaded_bank_fees(client, app, outlet):
+    version = snapshot_version(client, outlet)
+
+    assert client.delete(f'/api/edc-machines/{outlet.edc_id}', headers=outlet.headers).status_code == 200
+
+    delta = changes_since(client, outlet, version)
+    assert delta['edc_machines']['deletes'] == [outlet.edc_id]
+    assert len(delta['bank_fees']['deletes']) == 1
+
+
+def test_late_committed_change_is_not_skipped(client, app, outlet):
+    with app.app_context():
+        service = Service(name='Top Up', category='topup')
+        db.session.add(service)
+        db.session.flush()
+        # Ids allocated by two concurrent transactions; the higher one commits first
+        early_id = db.session.query(db.func.max(CatalogChange.id)).scalar() + 1
+        db.session.add(CatalogChange(id=early_id + 1, table_name='services', row_id=outlet.tarik_id, operation='update'))
+        db.session.commit()
+        service_id = service.id
+
+    seen = changes_since(client, outlet, 0)['version']
+    assert seen == early_id + 1
+
+    with app.app_context():
+        db.session.add(CatalogChange(id=early_id, table_name='services', row_id=service_id, operation='insert'))
+        db.session.commit()
+
+    delta = changes_since(client, outlet, seen)
+    assert service_id in [item['id'] for item in delta['services']['updates']]
+
+
+def test_delete_after_overlapping_insert_is_sent(client, app, outlet):
+    resp = client.post('/api/services', json={'name': 'Top Up', 'category': 'topup'}, headers=outlet.headers)
+    service_id = resp.get_json()['data']['id']
+    seen = snapshot_version(client, outlet)
+
+    client.delete(f'/api/services/{service_id}', headers=outlet.headers)
+
+    assert changes_since(client, outlet, seen)['services']['deletes'] == [service_id]
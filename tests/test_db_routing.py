@@ -0,0 +1,58 @@
+import pytest
+from flask import g
+from sqlalchemy import create_engine
+
+import utils.db_routing as db_routing
+import utils.jwt_handler as jwt_handler
+from models.user import db
+
+
+@pytest.fixture
+def broken_replica(app, monkeypatch):
+    # Answers the health check, but every report query fails (no tables)
+    engine = create_engine('sqlite://')
+    app.config['REPLICA_READ_YOUR_WRITES_SECONDS'] = 0
+    with app.app_context():
+        db.engines[db_routing.REPLICA_BIND] = engine
+    monkeypatch.setattr(db_routing, '_replica_state', {'checked_at': None, 'healthy': False, 'lag': None, 'error': None})
+    yield engine
+    with app.app_context():
+        db.engines.pop(db_routing.REPLICA_BIND)
+    engine.dispose()
+
+
+def test_failed_replica_read_is_retried_on_primary(client, app, outlet, broken_replica):
+    resp = client.get('/api/owners/me/overview', headers=outlet.headers)
+
+    assert resp.status_code == 200, resp.get_json()
+    with app.app_context():
+        status = db_routing.replica_status(broken_replica)
+    assert status['healthy'] is False
+    assert 'no such table' in status['error']
+
+
+def test_unhealthy_replica_is_skipped_until_next_check(client, app, outlet, broken_replica, monkeypatch):
+    assert client.get('/api/owners/me/overview', headers=outlet.headers).status_code == 200
+
+    def fail(state):
+        raise AssertionError('replica used while marked unhealthy')
+    monkeypatch.setattr(db_routing, 'mark_replica_unhealthy', fail)
+    assert client.get('/api/owners/me/overview', headers=outlet.headers).status_code == 200
+
+
+@pytest.mark.parametrize('path, pool', [
+    ('/api/transactions/report/daily/pdf', 'reporting'),
+    ('/api/transactions', 'posting'),
+    ('/api/auth/users', 'interactive'),
+])
+def test_pool_is_chosen_before_the_token_check(client, outlet, monkeypatch, path, pool):
+    seen = []
+    check = jwt_handler.check_token_version
+
+    def record_pool(payload):
+        seen.append(g.db_pool)
+        return check(payload)
+
+    monkeypatch.setattr(jwt_handler, 'check_token_version', record_pool)
+    client.get(path, headers=outlet.headers)
+    assert seen == [pool]
@@ -0,0 +1,134 @@
+from datetime import datetime, time, timedelta
+
+import pytest
+from sqlalchemy import delete, func, select, update
+
+from models.user import db
+from models.transaction import Transaction
+from models.transaction_hourly import TransactionHourly
+import utils.hourly_rollup as hourly_rollup
+from utils.hourly_rollup import rebuild_hourly_rollup
+from utils.report_parts import TRANSACTION_SUMS
+
+ROLLUP_SUMS = ('transaction_count', *TRANSACTION_SUMS)
+
+
+def item(outlet, service_id, amount):
+    return {
+        'edc_machine_id': outlet.edc_id, 'service_id': service_id,
+        'agent_profile_id': outlet.agent_id, 'amount': amount
+    }
+
+
+def post(client, outlet, service_id, amount):
+    resp = client.post('/api/transactions', json=item(outlet, service_id, amount), headers=outlet.kasir_headers)
+    assert resp.status_code == 201, resp.get_json()
+    return resp.get_json()['data']['id']
+
+
+def rollup_state():
+    """{(hour, agent): sums} across slots, leaving out rows that dropped to zero"""
+    rows = db.session.execute(
+        select(
+            TransactionHourly.bucket_start, TransactionHourly.agent_profile_id,
+            *(func.sum(getattr(TransactionHourly, name)) for name in ROLLUP_SUMS)
+        ).group_by(TransactionHourly.bucket_start, TransactionHourly.agent_profile_id)
+    )
+    return {(row[0], row[1]): tuple(float(value) for value in row[2:]) for row in rows if row[2]}
+
+
+def assert_rollup_matches_transactions(app):
+    with app.app_context():
+        incremental = rollup_state()
+        rebuild_hourly_rollup()
+        assert incremental == rollup_state()
+        db.session.rollback()
+        return incremental
+
+
+@pytest.mark.parametrize('shards', [1, 4])
+def test_rollup_follows_create_delete_and_batch(client, app, outlet, shards):
+    app.config['BALANCE_SHARDS'] = shards
+    first = post(client, outlet, outlet.transfer_id, 100000)
+    post(client, outlet, outlet.transfer_id, 250000)
+    post(client, outlet, outlet.tarik_id, 50000)
+    assert client.delete(f'/api/transactions/{first}', headers=outlet.headers).status_code == 200
+    resp = client.post('/api/transactions/batch', json={'transactions': [
+        item(outlet, outlet.transfer_id, 70000), item(outlet, outlet.tarik_id, 20000)
+    ]}, headers=outlet.kasir_headers)
+    assert resp.get_json()['data']['succeeded'] == 2
+
+    state = assert_rollup_matches_transactions(app)
+    assert sum(sums[0] for sums in state.values()) == 4
+    assert sum(sums[1] for sums in state.values()) == 250000 + 50000 + 70000 + 20000
+
+
+def test_rollup_follows_moved_transactions(client, app, outlet):
+    transaction_id = post(client, outlet, outlet.transfer_id, 100000)
+    post(client, outlet, outlet.transfer_id, 200000)
+    with app.app_context():
+        db.session.get(Transaction, transaction_id).created_at -= timedelta(days=2)
+        db.session.commit()
+
+    assert len(assert_rollup_matches_transactions(app)) == 2
+
+
+def test_bulk_update_and_delete_refresh_only_touched_buckets(client, app, outlet, monkeypatch):
+    ids = [post(client, outlet, outlet.transfer_id, amount) for amount in (100000, 200000, 300000)]
+    with app.app_context():
+        # An hour the bulk statements never touch must keep its rollup row
+        untouched = datetime.utcnow().replace(microsecond=0) - timedelta(days=10)
+        db.session.get(Transaction, ids[2]).created_at = untouched
+        db.session.commit()
+
+    def fail():
+        raise AssertionError('bulk change rebuilt the whole rollup')
+    monkeypatch.setattr(hourly_rollup, 'rebuild_hourly_rollup', fail)
+    with app.app_context():
+        db.session.execute(
+            update(Transaction).where(Transaction.id == ids[0])
+            .values(created_at=untouched + timedelta(days=3), amount=150000)
+        )
+        db.session.execute(delete(Transaction).where(Transaction.id == ids[1]))
+        db.session.commit()
+    monkeypatch.undo()
+
+    state = assert_rollup_matches_transactions(app)
+    assert sorted(sums[1] for sums in state.values()) == [150000, 300000]
+
+
+@pytest.fixture
+def yesterday(client, app, outlet):
+    day = datetime.utcnow().date() - timedelta(days=1)
+    moments = (time(9, 5), time(9, 40), time(14, 20))
+    ids = [post(client, outlet, outlet.transfer_id, amount) for amount in (100000, 200000, 300000)]
+    with app.app_context():
+        for transaction_id, moment in zip(ids, moments):
+            db.session.get(Transaction, transaction_id).created_at = datetime.combine(day, moment)
+        db.session.commit()
+    return day
+
+
+def intraday_counts(client, outlet, day, interval):
+    resp = client.get('/api/reports/intraday', query_string={'date': day.isoformat(), 'interval': interval},
+                      headers=outlet.headers)
+    assert resp.status_code == 200, resp.get_json()
+    return {bucket['time']: bucket['transaction_count'] for bucket in resp.get_json()['data']['buckets'] if bucket['transaction_count']}
+
+
+def test_intraday_buckets(client, outlet, yesterday):
+    assert intraday_counts(client, outlet, yesterday, 60) == {'09:00': 2, '14:00': 1}
+    assert intraday_counts(client, outlet, yesterday, 15) == {'09:00': 1, '09:30': 1, '14:15': 1}
+
+
+def test_heatmap_cells(client, outlet, yesterday):
+    resp = client.get('/api/reports/heatmap', query_string={
+        'period': 'custom', 'start_date': yesterday.isoformat(), 'end_date': yesterday.isoformat()
+    }, headers=outlet.headers)
+    assert resp.status_code == 200, resp.get_json()
+    data = resp.get_json()['data']
+
+    counts = data['transaction_count'][yesterday.weekday()]
+    assert (counts[9], counts[14], sum(counts)) == (2, 1, 3)
+    assert data['amount'][yesterday.weekday()][9] == 300000
+    assert sum(map(sum, data['transaction_count'])) == 3
@@ -0,0 +1,140 @@
+import hashlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select, delete
+
+import utils.idempotency as idempotency
+from models.user import db, User
+from models.transaction import Transaction
+from models.idempotency_key import IdempotencyKey
+from utils.db_pools import pool_engine
+
+keys = IdempotencyKey.__table__
+
+
+def payload(outlet, amount=100000):
+    return {
+        'edc_machine_id': outlet.edc_id, 'service_id': outlet.transfer_id,
+        'agent_profile_id': outlet.agent_id, 'amount': amount
+    }
+
+
+def post(client, outlet, body, key='key-1'):
+    return client.post('/api/transactions', json=body, headers={**outlet.kasir_headers, 'Idempotency-Key': key})
+
+
+def transaction_count(app):
+    with app.app_context():
+        return db.session.query(Transaction).count()
+
+
+def key_row(app, key='key-1'):
+    with app.app_context():
+        with pool_engine().connect() as conn:
+            return conn.execute(select(keys).where(keys.c.idempotency_key == key)).first()
+
+
+def test_retry_replays_first_response(client, app, outlet):
+    first = post(client, outlet, payload(outlet))
+    assert first.status_code == 201
+
+    retry = post(client, outlet, payload(outlet))
+    assert retry.status_code == 201
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.get_json()['data']['transaction_number'] == first.get_json()['data']['transaction_number']
+    assert transaction_count(app) == 1
+    assert key_row(app).status == 'completed'
+
+
+def test_key_reused_with_different_body_is_rejected(client, app, outlet):
+    assert post(client, outlet, payload(outlet)).status_code == 201
+
+    resp = post(client, outlet, payload(outlet, amount=200000))
+    assert resp.status_code == 422
+    assert resp.get_json()['error'] == 'IDEMPOTENCY_KEY_REUSED'
+    assert transaction_count(app) == 1
+
+
+def test_stale_claim_is_taken_over(client, app, outlet):
+    app.config['IDEMPOTENCY_WAIT_SECONDS'] = 0
+    body = app.json.dumps(payload(outlet)).encode()
+    with app.app_context():
+        user_id = db.session.query(User.id).filter_by(email='kasir@test.local').scalar()
+        with pool_engine().begin() as conn:
+            # Worker that died before its handler committed anything
+            conn.execute(insert(keys).values(
+                idempotency_key='key-1', user_id=user_id, scope='transactions.create',
+                request_hash=hashlib.sha256(body).hexdigest(), status='in_progress',
+                created_at=datetime.utcnow() - timedelta(minutes=5), expires_at=datetime.utcnow() + timedelta(hours=1)
+            ))
+
+    assert post(client, outlet, payload(outlet)).status_code == 201
+    assert transaction_count(app) == 1
+
+
+def test_committed_claim_without_response_is_not_rerun(client, app, outlet, monkeypatch):
+    app.config['IDEMPOTENCY_WAIT_SECONDS'] = 0
+    # Process dies between the business commit and storing the response
+    monkeypatch.setattr(idempotency, '_complete', lambda claim_id, response: None)
+    assert post(client, outlet, payload(outlet)).status_code == 201
+    monkeypatch.undo()
+    assert key_row(app).status == 'committed'
+
+    with app.app_context():
+        with pool_engine().begin() as conn:
+            conn.execute(keys.update().values(created_at=datetime.utcnow() - timedelta(minutes=5)))
+
+    resp = post(client, outlet, payload(outlet))
+    assert resp.status_code == 409
+    assert resp.get_json()['error'] == 'IDEMPOTENCY_RESPONSE_UNAVAILABLE'
+    assert transaction_count(app) == 1
+
+
+def test_handler_whose_claim_was_taken_over_does_not_commit(client, app, outlet, monkeypatch):
+    claim = idempotency._claim
+
+    def claim_then_lose(user_id, scope, key, request_hash):
+        claim_id, existing = claim(user_id, scope, key, request_hash)
+        # Slow handler: another request takes the stale claim over meanwhile
+        with pool_engine().begin() as conn:
+            conn.execute(delete(keys).where(keys.c.id == claim_id))
+            conn.execute(insert(keys).values(
+                id=claim_id + 1, idempotency_key=key, user_id=user_id, scope=scope, request_hash=request_hash,
+                status='in_progress', created_at=datetime.utcnow(), expires_at=datetime.utcnow() + timedelta(hours=1)
+            ))
+        return claim_id, existing
+
+    monkeypatch.setattr(idempotency, '_claim', claim_then_lose)
+    resp = post(client, outlet, payload(outlet))
+
+    assert resp.status_code == 409
+    assert resp.get_json()['error'] == 'IDEMPOTENCY_IN_PROGRESS'
+    assert transaction_count(app) == 0
+    assert key_row(app).status == 'in_progress'
+
+
+def test_waiting_on_another_process_leaves_no_event_behind(client, app, outlet):
+    app.config['IDEMPOTENCY_WAIT_SECONDS'] = 0.5
+    body = app.json.dumps(payload(outlet)).encode()
+    with app.app_context():
+        user_id = db.session.query(User.id).filter_by(email='kasir@test.local').scalar()
+        with pool_engine().begin() as conn:
+            # Fresh claim owned by a worker in another process
+            conn.execute(insert(keys).values(
+                idempotency_key='key-1', user_id=user_id, scope='transactions.create',
+                request_hash=hashlib.sha256(body).hexdigest(), status='in_progress',
+                created_at=datetime.utcnow(), expires_at=datetime.utcnow() + timedelta(hours=1)
+            ))
+
+    resp = post(client, outlet, payload(outlet))
+    assert resp.status_code == 409
+    assert resp.get_json()['error'] == 'IDEMPOTENCY_IN_PROGRESS'
+    assert idempotency._events == {}
+
+    # The other process finishes: the next wait picks it up from the database
+    with app.app_context():
+        with pool_engine().begin() as conn:
+            conn.execute(keys.update().values(status='completed', response_status=201, response_body='{"success": true}'))
+    assert post(client, outlet, payload(outlet)).headers['Idempotent-Replayed'] == 'true'
+    assert idempotency._events == {}
+    assert transaction_count(app) == 0
@@ -0,0 +1,35 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from sqlalchemy import literal, select
+
+from models.user import db
+from utils.json_provider import JSON_PROVIDERS
+
+
+@pytest.mark.parametrize('name', sorted(JSON_PROVIDERS))
+def test_providers_encode_the_same_types(app, name):
+    with app.app_context():
+        row = db.session.execute(select(literal(7).label('id'), literal('BRI').label('bank'))).first()
+    payload = {
+        'money': Decimal('2500.50'),
+        'time': datetime(2024, 1, 2, 3, 4, 5),
+        'row': row,
+        'count': np.int64(3),
+        'ratio': np.float64(0.25),
+        'series': np.array([1, 2, 3]),
+    }
+
+    encoded = JSON_PROVIDERS[name](app).dumps(payload)
+
+    assert json.loads(encoded) == {
+        'money': 2500.5,
+        'time': '2024-01-02T03:04:05',
+        'row': {'id': 7, 'bank': 'BRI'},
+        'count': 3,
+        'ratio': 0.25,
+        'series': [1, 2, 3],
+    }
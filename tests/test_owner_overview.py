@@ -0,0 +1,68 @@
+import pytest
+
+from models.user import db
+from models.agent_profile import AgentProfile
+from models.edc_machine import EdcMachine
+
+
+@pytest.fixture
+def second_outlet(client, app, outlet):
+    """Another outlet of the same owner, and an outlet of a different owner"""
+    resp = client.post('/api/auth/register', json={
+        'name': 'Owner Lain', 'email': 'owner2@test.local', 'password': 'Secret123', 'role': 'owner'
+    })
+    assert resp.status_code == 201, resp.get_json()
+    with app.app_context():
+        agent = AgentProfile(user_id=outlet.owner_id, owner_id=outlet.owner_id, agent_name='Outlet Dua', total_balance=0)
+        db.session.add(agent)
+        db.session.flush()
+        edc = EdcMachine(agent_profile_id=agent.id, name='EDC Dua', bank_name='BNI', saldo=1000000)
+        db.session.add(edc)
+        db.session.commit()
+        return agent.id, edc.id
+
+
+def post_transaction(client, outlet, agent_id, edc_id, service_id, amount):
+    resp = client.post('/api/transactions', json={
+        'edc_machine_id': edc_id, 'service_id': service_id, 'agent_profile_id': agent_id, 'amount': amount
+    }, headers=outlet.kasir_headers)
+    assert resp.status_code == 201, resp.get_json()
+
+
+def overview(client, outlet):
+    resp = client.get('/api/owners/me/overview', query_string={'period': 'daily'}, headers=outlet.headers)
+    assert resp.status_code == 200, resp.get_json()
+    return resp.get_json()['data']
+
+
+@pytest.mark.parametrize('shards', [1, 4])
+def test_overview_per_outlet_and_consolidated(client, app, outlet, second_outlet, shards):
+    app.config['BALANCE_SHARDS'] = shards
+    agent_id, edc_id = second_outlet
+    post_transaction(client, outlet, outlet.agent_id, outlet.edc_id, outlet.transfer_id, 300000)
+    post_transaction(client, outlet, outlet.agent_id, outlet.edc_id, outlet.tarik_id, 100000)
+    # Fee tiers exist for transfers only; the bank fee only for the first EDC
+    post_transaction(client, outlet, agent_id, edc_id, outlet.transfer_id, 50000)
+
+    data = overview(client, outlet)
+    outlets = {row['agent_profile_id']: row for row in data['outlets']}
+    assert sorted(outlets) == [outlet.agent_id, agent_id]
+
+    first, second = outlets[outlet.agent_id], outlets[agent_id]
+    assert (first['transaction_count'], first['revenue']) == (2, 400000)
+    assert (first['service_fee'], first['bank_fee']) == (5000, 2500)
+    assert (first['balance'], first['edc_count'], first['edc_saldo']) == (200000, 1, 4800000)
+    assert (second['transaction_count'], second['revenue'], second['service_fee'], second['bank_fee']) == (1, 50000, 5000, 0)
+    assert (second['balance'], second['edc_saldo']) == (50000, 950000)
+    # Sorted by revenue
+    assert [row['agent_profile_id'] for row in data['outlets']] == [outlet.agent_id, agent_id]
+
+    consolidated = data['consolidated']
+    assert consolidated['outlet_count'] == 2
+    for name in ('transaction_count', 'revenue', 'service_fee', 'bank_fee', 'net_profit', 'balance', 'edc_count', 'edc_saldo'):
+        assert consolidated[name] == first[name] + second[name], name
+
+
+def test_overview_is_owner_only(client, outlet):
+    resp = client.get('/api/owners/me/overview', headers=outlet.kasir_headers)
+    assert resp.status_code == 403
@@ -0,0 +1,61 @@
+from datetime import date
+
+from sqlalchemy import text
+
+from models.user import db
+from models.archived_partition import ArchivedPartition
+
+
+def create_transactions(client, outlet, *amounts):
+    ids = []
+    for amount in amounts:
+        resp = client.post('/api/transactions', json={
+            'edc_machine_id': outlet.edc_id, 'service_id': outlet.transfer_id,
+            'agent_profile_id': outlet.agent_id, 'amount': amount
+        }, headers=outlet.kasir_headers)
+        ids.append(resp.get_json()['data']['id'])
+    return ids
+
+
+def archive_rows(app, transaction_ids):
+    """What partition_tables.py does from another process: catalog row first, then move the rows"""
+    ids = ', '.join(str(i) for i in transaction_ids)
+    with app.app_context():
+        db.session.add(ArchivedPartition(
+            table_name='transactions', partition_name='p202401', archive_table='transactions_archive_202401',
+            period_start=None, period_end=date(2099, 1, 1), row_count=len(transaction_ids)
+        ))
+        db.session.commit()
+        with db.engine.begin() as connection:
+            connection.execute(text(f'CREATE TABLE transactions_archive_202401 AS SELECT * FROM transactions WHERE id IN ({ids})'))
+            connection.execute(text(f'DELETE FROM transactions WHERE id IN ({ids})'))
+
+
+def listed_ids(client, outlet):
+    resp = client.get('/api/transactions', query_string={'fields': 'id', 'limit': 100}, headers=outlet.headers)
+    return sorted(item['id'] for item in resp.get_json()['data']['transactions'])
+
+
+def test_archive_from_another_process_is_visible_on_next_request(client, app, outlet):
+    ids = create_transactions(client, outlet, 100000, 200000, 300000)
+    # Warm the per-process archive catalog
+    assert listed_ids(client, outlet) == ids
+
+    archive_rows(app, ids[:2])
+
+    assert listed_ids(client, outlet) == ids
+
+
+def test_archived_rows_by_id_are_read_only(client, app, outlet):
+    ids = create_transactions(client, outlet, 100000, 200000)
+    archive_rows(app, ids[:1])
+
+    resp = client.get(f'/api/transactions/{ids[0]}', headers=outlet.headers)
+    assert resp.status_code == 200
+    assert resp.get_json()['data']['amount'] == 100000
+
+    resp = client.delete(f'/api/transactions/{ids[0]}', headers=outlet.headers)
+    assert resp.status_code == 409
+    assert resp.get_json()['error'] == 'ARCHIVED'
+
+    assert client.get('/api/transactions/9999', headers=outlet.headers).status_code == 404
@@ -0,0 +1,103 @@
+from models.user import db
+from models.agent_profile import AgentProfile
+from models.edc_machine import EdcMachine
+
+
+def reconcile(client, outlet, fix=False, mode='source'):
+    if fix:
+        resp = client.post('/api/balances/reconcile', json={'fix': True}, query_string={'mode': mode}, headers=outlet.headers)
+    else:
+        resp = client.get('/api/balances/reconcile', query_string={'mode': mode}, headers=outlet.headers)
+    assert resp.status_code == 200
+    return resp.get_json()['data']
+
+
+def post_transaction(client, outlet, service_id, amount):
+    resp = client.post('/api/transactions', json={
+        'edc_machine_id': outlet.edc_id, 'service_id': service_id,
+        'agent_profile_id': outlet.agent_id, 'amount': amount
+    }, headers=outlet.kasir_headers)
+    assert resp.status_code == 201, resp.get_json()
+
+
+def balances(app, outlet, edc_id=None):
+    with app.app_context():
+        edc = db.session.get(EdcMachine, edc_id or outlet.edc_id)
+        agent = db.session.get(AgentProfile, outlet.agent_id)
+        return float(edc.saldo), float(agent.total_balance)
+
+
+def test_owner_without_checkpoint_is_never_fixed(client, app, outlet):
+    # Balance written before the ledger existed: no opening entry yet
+    with app.app_context():
+        edc = EdcMachine(agent_profile_id=outlet.agent_id, name='EDC Lama', bank_name='BCA', saldo=500000)
+        db.session.add(edc)
+        db.session.commit()
+        edc_id = edc.id
+
+    report = reconcile(client, outlet)
+    assert report['edc']['no_baseline'] == [edc_id]
+    assert report['edc']['drift'] == []
+
+    report = reconcile(client, outlet, fix=True)
+    assert report['edc']['fixed'] == 0
+    assert balances(app, outlet, edc_id)[0] == 500000
+
+
+def test_checkpoint_plus_transactions_has_no_drift(client, app, outlet):
+    post_transaction(client, outlet, outlet.transfer_id, 100000)
+    post_transaction(client, outlet, outlet.transfer_id, 250000)
+    post_transaction(client, outlet, outlet.tarik_id, 50000)
+    client.post(f'/api/edc-machines/{outlet.edc_id}/add-saldo', json={'amount': 10000}, headers=outlet.headers)
+
+    assert balances(app, outlet) == (5000000 - 350000 + 50000 + 10000, 350000 - 50000)
+    report = reconcile(client, outlet)
+    for kind in ('edc', 'agent'):
+        assert report[kind]['checked'] == 1
+        assert report[kind]['drift'] == []
+        assert report[kind]['no_baseline'] == []
+
+
+def test_fix_sets_drifted_balance_to_expected(client, app, outlet):
+    post_transaction(client, outlet, outlet.transfer_id, 100000)
+    with app.app_context():
+        # Write that bypassed the ledger
+        db.session.get(EdcMachine, outlet.edc_id).saldo = 123
+        db.session.commit()
+
+    report = reconcile(client, outlet)
+    assert report['edc']['drift'] == [{
+        'owner_id': outlet.edc_id, 'stored': 123.0, 'expected': 4900000.0, 'difference': 123.0 - 4900000
+    }]
+    assert report['agent']['drift'] == []
+
+    report = reconcile(client, outlet, fix=True)
+    assert report['edc']['fixed'] == 1
+    assert balances(app, outlet) == (4900000, 100000)
+    assert reconcile(client, outlet)['edc']['drift'] == []
+    assert client.get('/api/balances/reconcile?mode=ledger', headers=outlet.headers).get_json()['data']['edc']['drift'] == []
+
+
+def test_ledger_mode_uses_the_same_runner_and_report(client, app, outlet):
+    post_transaction(client, outlet, outlet.transfer_id, 100000)
+    with app.app_context():
+        # Written without a ledger entry
+        db.session.get(AgentProfile, outlet.agent_id).total_balance = 150000
+        db.session.commit()
+
+    report = reconcile(client, outlet, mode='ledger')
+    assert report['agent']['drift'] == [{
+        'owner_id': outlet.agent_id, 'stored': 150000.0, 'expected': 100000.0, 'difference': 50000.0
+    }]
+    assert (report['agent']['drift_count'], report['agent']['total_difference']) == (1, 50000.0)
+    assert report['edc']['drift'] == []
+
+    assert reconcile(client, outlet, fix=True, mode='ledger')['agent']['fixed'] == 1
+    assert balances(app, outlet) == (4900000, 100000)
+    assert reconcile(client, outlet, mode='ledger')['agent']['drift'] == []
+
+
+def test_unknown_reconcile_mode_is_rejected(client, outlet):
+    resp = client.get('/api/balances/reconcile', query_string={'mode': 'audit'}, headers=outlet.headers)
+    assert resp.status_code == 400
+    assert resp.get_json()['error'] == 'INVALID_INPUT'
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.user import db
+from models.cash_flow import CashFlow
+from models.report_cache import ReportCacheEntry
+from models.transaction import Transaction
+
+DAYS_AGO = (5, 3, 3, 0)
+
+
+@pytest.fixture
+def history(client, app, outlet):
+    """Transfers on closed days (backdated after posting) plus one today"""
+    now = datetime.utcnow()
+    for days_ago, amount in zip(DAYS_AGO, (100000, 200000, 300000, 400000)):
+        resp = client.post('/api/transactions', json={
+            'edc_machine_id': outlet.edc_id, 'service_id': outlet.transfer_id,
+            'agent_profile_id': outlet.agent_id, 'amount': amount
+        }, headers=outlet.kasir_headers)
+        transaction_id = resp.get_json()['data']['id']
+        with app.app_context():
+            transaction = db.session.get(Transaction, transaction_id)
+            transaction.created_at = now - timedelta(days=days_ago)
+            cash_flow = db.session.query(CashFlow).filter(CashFlow.description.contains(transaction.transaction_number)).one()
+            cash_flow.created_at = transaction.created_at
+            db.session.commit()
+    return now
+
+
+def report(client, app, outlet, cached):
+    app.config['REPORT_CACHE_ENABLED'] = cached
+    today = datetime.now().date()
+    resp = client.get('/api/reports', query_string={
+        'period': 'custom',
+        'start_date': (today - timedelta(days=7)).isoformat(),
+        'end_date': today.isoformat()
+    }, headers=outlet.headers)
+    assert resp.status_code == 200, resp.get_json()
+    return resp.get_json()['data']
+
+
+def cache_entries(app):
+    with app.app_context():
+        return db.session.query(ReportCacheEntry).count()
+
+
+def test_cached_report_matches_live_report(client, app, outlet, history):
+    live = report(client, app, outlet, cached=False)
+    assert live['summary']['total_transactions'] == 4
+
+    assert report(client, app, outlet, cached=True) == live
+    assert cache_entries(app) == 1
+    # Served from the cache entry this time
+    assert report(client, app, outlet, cached=True) == live
+
+
+def test_commit_to_a_closed_day_invalidates_the_cache(client, app, outlet, history):
+    before = report(client, app, outlet, cached=True)
+    assert cache_entries(app) == 1
+
+    with app.app_context():
+        app.config['REPORT_CACHE_ENABLED'] = True
+        transaction = db.session.query(Transaction).order_by(Transaction.created_at).first()
+        assert transaction.created_at < history - timedelta(days=4)
+        transaction.created_at = history - timedelta(days=1)
+        db.session.commit()
+    assert cache_entries(app) == 0
+
+    cached = report(client, app, outlet, cached=True)
+    assert cached == report(client, app, outlet, cached=False)
+    assert cached['daily_breakdown'] != before['daily_breakdown']
+
+
+def test_deleting_a_closed_day_transaction_is_reflected(client, app, outlet, history):
+    report(client, app, outlet, cached=True)
+    with app.app_context():
+        transaction_id = db.session.query(Transaction.id).order_by(Transaction.created_at).limit(1).scalar()
+
+    assert client.delete(f'/api/transactions/{transaction_id}', headers=outlet.headers).status_code == 200
+
+    cached = report(client, app, outlet, cached=True)
+    assert cached['summary']['total_transactions'] == 3
+    assert cached == report(client, app, outlet, cached=False)
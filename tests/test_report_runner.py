@@ -0,0 +1,66 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine, literal, select
+
+from models.user import db
+from utils.report_runner import ReportQueryRunner, ReportTimeout
+
+
+@pytest.fixture
+def pooled_engine(app, tmp_path):
+    """File database with a real connection pool, so queries can run on worker threads"""
+    engine = create_engine(f'sqlite:///{tmp_path / "reports.db"}')
+    with app.app_context():
+        default = db.engines[None]
+        db.engines[None] = engine
+        yield engine
+        db.engines[None] = default
+    engine.dispose()
+
+
+def statements(count):
+    return [select(literal(index)) for index in range(count)]
+
+
+def slow_fetch(seconds):
+    def fetch(result):
+        time.sleep(seconds)
+        return result.scalar()
+    return fetch
+
+
+def test_parallel_results_match_sequential_order(pooled_engine):
+    parallel = ReportQueryRunner(workers=3)
+    try:
+        assert parallel.run(statements(6)) == ReportQueryRunner(workers=0).run(statements(6))
+    finally:
+        parallel.shutdown()
+
+
+def test_independent_queries_overlap(pooled_engine):
+    runner = ReportQueryRunner(workers=3)
+    try:
+        started = time.monotonic()
+        assert runner.run(statements(3), fetch=slow_fetch(0.3)) == [0, 1, 2]
+        assert time.monotonic() - started < 0.6
+    finally:
+        runner.shutdown()
+
+
+def test_report_budget_raises_timeout(pooled_engine):
+    runner = ReportQueryRunner(workers=2, timeout=0.1)
+    try:
+        with pytest.raises(ReportTimeout):
+            with runner.budget():
+                runner.run(statements(2), fetch=slow_fetch(0.5))
+    finally:
+        runner.shutdown()
+
+
+def test_in_memory_database_runs_in_the_session(app):
+    # StaticPool connections cannot be shared across threads
+    runner = ReportQueryRunner(workers=3)
+    with app.app_context():
+        assert runner.run(statements(3)) == [[(0,)], [(1,)], [(2,)]]
+    assert runner._executor is None
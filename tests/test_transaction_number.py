@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+from utils.transaction_number import (
+    TimeOrderedTransactionNumber,
+    RandomTransactionNumber,
+    build_generator,
+    MAX_SEQUENCE,
+)
+
+
+def test_time_ordered_numbers_are_sorted_and_unique():
+    generate = TimeOrderedTransactionNumber(worker_id=7)
+    numbers = [generate() for _ in range(10000)]
+
+    assert numbers == sorted(numbers)
+    assert len(set(numbers)) == len(numbers)
+    assert all(n.startswith('TRX-') and len(n) == 17 for n in numbers)
+
+
+def test_time_ordered_survives_clock_going_backwards():
+    now = [1750000000000]
+    generate = TimeOrderedTransactionNumber(worker_id=1, clock=lambda: now[0])
+    first = generate()
+    now[0] -= 5000
+    second = generate()
+
+    assert second > first
+
+
+def test_sequence_overflow_moves_to_next_millisecond():
+    generate = TimeOrderedTransactionNumber(worker_id=1, clock=lambda: 1750000000000)
+    ids = [generate.next_id() for _ in range(MAX_SEQUENCE + 3)]
+
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+
+
+def test_time_ordered_is_unique_across_threads_and_workers():
+    generators = [TimeOrderedTransactionNumber(worker_id=w) for w in (1, 2)]
+    numbers = []
+    lock = threading.Lock()
+
+    def work(generate):
+        local = [generate() for _ in range(2000)]
+        with lock:
+            numbers.extend(local)
+
+    threads = [threading.Thread(target=work, args=(g,)) for g in generators for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(set(numbers)) == len(numbers) == 12000
+
+
+def test_build_generator_schemes():
+    assert isinstance(build_generator('random'), RandomTransactionNumber)
+    assert build_generator('random')().startswith('TRX-')
+    with pytest.raises(ValueError):
+        build_generator('unknown')
+    with pytest.raises(ValueError):
+        TimeOrderedTransactionNumber(worker_id=1024)
@@ -0,0 +1,171 @@
+import pytest
+from sqlalchemy import update
+
+from models.user import db
+from models.agent_profile import AgentProfile
+from models.balance_ledger import BalanceLedger
+from models.cash_flow import CashFlow
+from models.edc_machine import EdcMachine
+from models.service_fee import ServiceFee
+from models.transaction import Transaction
+
+FEE_FIELDS = ('amount', 'service_fee', 'bank_fee', 'extra_fee', 'total_received', 'net_profit')
+
+
+def item(outlet, service_id, amount, **extra):
+    return {
+        'edc_machine_id': outlet.edc_id, 'service_id': service_id,
+        'agent_profile_id': outlet.agent_id, 'amount': amount, **extra
+    }
+
+
+def post_batch(client, outlet, items):
+    resp = client.post('/api/transactions/batch', json={'transactions': items}, headers=outlet.kasir_headers)
+    assert resp.status_code == 200, resp.get_json()
+    return resp.get_json()['data']
+
+
+def balances(app, outlet):
+    with app.app_context():
+        edc = db.session.get(EdcMachine, outlet.edc_id)
+        agent = db.session.get(AgentProfile, outlet.agent_id)
+        return float(edc.saldo), float(agent.total_balance)
+
+
+def row_counts(app):
+    with app.app_context():
+        return db.session.query(Transaction).count(), db.session.query(CashFlow).count()
+
+
+def test_batch_posts_valid_items_and_reports_failures(client, app, outlet):
+    data = post_batch(client, outlet, [
+        item(outlet, outlet.transfer_id, 100000),
+        item(outlet, outlet.transfer_id, 250000, extra_fee=1000),
+        item(outlet, outlet.tarik_id, 50000),
+        item(outlet, 9999, 10000),
+        item(outlet, outlet.tarik_id, 10000000),
+    ])
+
+    assert (data['total'], data['succeeded'], data['failed']) == (5, 3, 2)
+    assert [result['success'] for result in data['results']] == [True, True, True, False, False]
+    assert data['results'][3]['error'] == 'NOT_FOUND'
+    assert data['results'][4]['error'] == 'INSUFFICIENT_BALANCE'
+    second = data['results'][1]
+    assert (second['service_fee'], second['bank_fee'], second['extra_fee']) == (5000, 2500, 1000)
+    assert second['total_received'] == 250000 + 5000 + 2500 + 1000
+    assert second['net_profit'] == 250000 - 1000
+
+    assert balances(app, outlet) == (5000000 - 350000 + 50000, 350000 - 50000)
+    assert row_counts(app) == (3, 3)
+
+
+def test_batch_items_see_balances_of_earlier_items(client, app, outlet):
+    # The tarik tunai only fits because the transfer before it adds cash
+    data = post_batch(client, outlet, [
+        item(outlet, outlet.transfer_id, 300000),
+        item(outlet, outlet.tarik_id, 300000),
+        item(outlet, outlet.tarik_id, 1),
+    ])
+
+    assert [result['success'] for result in data['results']] == [True, True, False]
+    assert balances(app, outlet) == (5000000, 0)
+
+
+def test_batch_totals_match_single_posting(client, app, outlet):
+    single = client.post('/api/transactions', json=item(outlet, outlet.transfer_id, 125000, extra_fee=500),
+                         headers=outlet.kasir_headers).get_json()['data']
+    [batched] = post_batch(client, outlet, [item(outlet, outlet.transfer_id, 125000, extra_fee=500)])['results']
+
+    assert {name: batched[name] for name in FEE_FIELDS} == {name: single[name] for name in FEE_FIELDS}
+    assert batched['transaction_number'] != single['transaction_number']
+
+
+def post_single(client, outlet, body, **kwargs):
+    return client.post('/api/transactions', json=body, headers=outlet.kasir_headers, **kwargs)
+
+
+def test_single_posting_writes_fees_balances_and_cash_flow(client, app, outlet):
+    resp = post_single(client, outlet, item(outlet, outlet.transfer_id, 200000, extra_fee=1500, customer_name='Budi'))
+    assert resp.status_code == 201, resp.get_json()
+    data = resp.get_json()['data']
+
+    assert (data['service_fee'], data['bank_fee'], data['extra_fee']) == (5000, 2500, 1500)
+    assert data['total_received'] == 200000 + 5000 + 2500 + 1500
+    assert data['cashier_name'] and data['customer_name'] == 'Budi'
+    assert 'fee_calculation' in data
+    assert balances(app, outlet) == (5000000 - 200000, 200000)
+    assert row_counts(app) == (1, 1)
+
+    listed = client.get(f"/api/transactions/{data['id']}", headers=outlet.headers).get_json()['data']
+    assert {name: listed[name] for name in FEE_FIELDS} == {name: data[name] for name in FEE_FIELDS}
+
+
+def test_compact_profile_omits_fee_calculation(client, outlet):
+    resp = post_single(client, outlet, item(outlet, outlet.transfer_id, 100000), query_string={'profile': 'compact'})
+    assert resp.status_code == 201
+    assert 'fee_calculation' not in resp.get_json()['data']
+
+
+@pytest.mark.parametrize('overrides, status_code, error', [
+    ({'amount': 0}, 400, 'INVALID_INPUT'),
+    ({'edc_machine_id': 9999}, 404, 'NOT_FOUND'),
+    ({'service_id': 9999}, 404, 'NOT_FOUND'),
+    ({'agent_profile_id': 9999}, 404, 'NOT_FOUND'),
+    ({'amount': 6000000}, 400, 'INSUFFICIENT_BALANCE'),
+    ({'service': 'tarik', 'amount': 1}, 400, 'INSUFFICIENT_BALANCE'),
+])
+def test_rejected_posting_changes_nothing(client, app, outlet, overrides, status_code, error):
+    service_id = outlet.tarik_id if overrides.pop('service', None) == 'tarik' else outlet.transfer_id
+    resp = post_single(client, outlet, {**item(outlet, service_id, 100000), **overrides})
+
+    assert resp.status_code == status_code
+    assert resp.get_json()['error'] == error
+    assert balances(app, outlet) == (5000000, 0)
+    assert row_counts(app) == (0, 0)
+
+
+def posted_rows(app, transaction_id):
+    """Transaction, cash flow and ledger rows of one posting, without ids and numbers"""
+    with app.app_context():
+        transaction = db.session.get(Transaction, transaction_id)
+        entries = BalanceLedger.query.filter_by(transaction_id=transaction_id).order_by(BalanceLedger.id).all()
+        cash_flow_ids = {entry.cash_flow_id for entry in entries}
+        cash_flows = CashFlow.query.filter(CashFlow.description.endswith(transaction.transaction_number)).all()
+        assert cash_flow_ids == {cash_flow.id for cash_flow in cash_flows}
+
+        return {
+            'fees': {name: float(getattr(transaction, name)) for name in FEE_FIELDS if name != 'total_received'},
+            'updated_at': transaction.updated_at == transaction.created_at,
+            'cash_flows': [
+                (cash_flow.type, cash_flow.agent_profile_id, float(cash_flow.amount), cash_flow.created_at == transaction.created_at)
+                for cash_flow in cash_flows
+            ],
+            'ledger': [
+                (entry.kind, entry.owner_id, float(entry.delta), entry.source, entry.user_id,
+                 entry.created_at == transaction.created_at)
+                for entry in entries
+            ],
+        }
+
+
+@pytest.mark.parametrize('service', ['transfer', 'tarik'])
+def test_single_and_batch_posting_write_the_same_rows(client, app, outlet, service):
+    if service == 'tarik':
+        # Cash for the tarik tunai postings
+        post_batch(client, outlet, [item(outlet, outlet.transfer_id, 1000000)])
+    with app.app_context():
+        # Tier without a lower bound: matches neither path
+        fee = ServiceFee(service_id=outlet.tarik_id, max_amount=10000000, fee=7000)
+        db.session.add(fee)
+        db.session.flush()
+        db.session.execute(update(ServiceFee).where(ServiceFee.id == fee.id).values(min_amount=None))
+        db.session.commit()
+    body = item(outlet, outlet.transfer_id if service == 'transfer' else outlet.tarik_id, 150000, extra_fee=500)
+
+    single = post_single(client, outlet, body).get_json()['data']
+    [batched] = post_batch(client, outlet, [body])['results']
+
+    single_rows = posted_rows(app, single['id'])
+    assert single_rows == posted_rows(app, batched['id'])
+    assert len(single_rows['ledger']) == 2 and len(single_rows['cash_flows']) == 1
+    assert single_rows['fees']['service_fee'] == (5000 if service == 'transfer' else 0)
@@ -0,0 +1,241 @@
+"""
+Analytics store: salinan kolumnar transactions dan cash_flows per bulan
+tertutup, untuk laporan periode panjang (tahunan) tanpa memindai jutaan
+baris OLTP.
+
+Setiap bulan yang sudah lewat diekspor (export_analytics.py, misalnya cron
+harian) ke satu file Parquet terkompresi zstd:
+
+    ANALYTICS_STORE_DIR/<tabel>/month=YYYY-MM/data.parquet
+
+Isinya hanya kolom yang dipakai laporan. Nilai uang disimpan sebagai
+decimal128 sehingga hasil agregasinya sama persis dengan SUM di MySQL.
+utils/report_engine.py membaca file ini dengan scan vektor pyarrow untuk
+bulan yang sudah diekspor; bulan berjalan dan bulan yang belum diekspor
+tetap dari database.
+
+Transaksi/cash flow bulan tertutup masih bisa diubah atau dihapus. Setelah
+commit yang menyentuh baris bulan tertutup, file bulan itu dihapus dan
+ditandai `_stale`, sehingga laporan kembali ke database sampai bulan itu
+diekspor ulang. Ekspor yang sedang berjalan saat penandaan terjadi dibuang.
+
+pyarrow opsional: tanpa pyarrow (atau ANALYTICS_STORE_DIR kosong) store
+mati dan semua laporan dari database.
+"""
+import os
+from datetime import datetime, time
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect, select, func, BigInteger, Integer, Numeric, DateTime
+from sqlalchemy.orm import Session
+from models.transaction import Transaction
+from models.cash_flow import CashFlow
+from models.user import db
+from utils.partitioning import month_start, add_months, partitioned_entity
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow optional
+    pa = pc = None
+
+# Tabel -> (model, kolom yang diekspor)
+STORE_TABLES = {
+    Transaction.__tablename__: (Transaction, (
+        'id', 'created_at', 'service_id', 'edc_machine_id', 'agent_profile_id', 'user_id',
+        'amount', 'service_fee', 'bank_fee', 'extra_fee', 'net_profit'
+    )),
+    CashFlow.__tablename__: (CashFlow, (
+        'id', 'created_at', 'agent_profile_id', 'user_id', 'type', 'amount'
+    )),
+}
+DATA_FILE = 'data.parquet'
+STALE_MARKER = '_stale'
+
+class AnalyticsStoreError(Exception):
+    """Ekspor analytics store tidak bisa dijalankan"""
+    pass
+
+def store_dir():
+    return current_app.config.get('ANALYTICS_STORE_DIR') or None
+
+def store_enabled():
+    return pa is not None and store_dir() is not None
+
+def current_month():
+    return month_start(datetime.now())
+
+def month_dir(table, month):
+    return os.path.join(store_dir(), table, f'month={month:%Y-%m}')
+
+def month_path(table, month):
+    return os.path.join(month_dir(table, month), DATA_FILE)
+
+def is_exported(table, month):
+    return month < current_month() and os.path.exists(month_path(table, month))
+
+def exported_months(table):
+    """Bulan (date tanggal 1) yang sudah ada di store untuk `table`"""
+    root = os.path.join(store_dir(), table)
+    if not os.path.isdir(root):
+        return []
+    months = []
+    for name in sorted(os.listdir(root)):
+        try:
+            month = datetime.strptime(name, 'month=%Y-%m').date()
+        except ValueError:
+            continue
+        if is_exported(table, month):
+            months.append(month)
+    return months
+
+def _arrow_type(column):
+    if isinstance(column.type, Numeric):
+        return pa.decimal128(column.type.precision, column.type.scale)
+    if isinstance(column.type, DateTime):
+        return pa.timestamp('us')
+    if isinstance(column.type, (BigInteger, Integer)):
+        return pa.int64()
+    return pa.string()
+
+def table_schema(table):
+    model, names = STORE_TABLES[table]
+    return pa.schema([pa.field(name, _arrow_type(model.__table__.c[name])) for name in names])
+
+def export_month(table, month, batch_size=50000):
+    """
+    Tulis satu bulan tertutup `table` ke Parquet (termasuk data di tabel arsip).
+
+    Returns:
+        int: Jumlah baris, atau None jika bulan itu berubah selama ekspor
+             (file dibuang, ekspor ulang di run berikutnya)
+
+    Raises:
+        AnalyticsStoreError: pyarrow/ANALYTICS_STORE_DIR tidak tersedia atau bulan belum tertutup
+    """
+    if not store_enabled():
+        raise AnalyticsStoreError('Analytics store tidak aktif (pyarrow atau ANALYTICS_STORE_DIR tidak tersedia)')
+    if month >= current_month():
+        raise AnalyticsStoreError(f'Bulan {month:%Y-%m} belum tertutup')
+
+    model, names = STORE_TABLES[table]
+    directory = month_dir(table, month)
+    os.makedirs(directory, exist_ok=True)
+    marker = os.path.join(directory, STALE_MARKER)
+    if os.path.exists(marker):
+        os.remove(marker)
+
+    begin = datetime.combine(month, time.min)
+    end = datetime.combine(add_months(month, 1), time.min)
+    source = partitioned_entity(model, begin, end)
+    statement = (
+        select(*(getattr(source, name) for name in names))
+        .where(source.created_at >= begin, source.created_at < end)
+        .order_by(source.created_at)
+        .execution_options(yield_per=batch_size)
+    )
+    schema = table_schema(table)
+    temporary = os.path.join(directory, f'{DATA_FILE}.{os.getpid()}.tmp')
+    row_count = 0
+    try:
+        with pq.ParquetWriter(temporary, schema, compression='zstd') as writer:
+            for rows in db.session.execute(statement).partitions():
+                columns = zip(*rows)
+                writer.write_batch(pa.RecordBatch.from_arrays(
+                    [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                    schema=schema
+                ))
+                row_count += len(rows)
+        if os.path.exists(marker):
+            os.remove(temporary)
+            return None
+        os.replace(temporary, month_path(table, month))
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+    return row_count
+
+def export_closed_months(tables=None, force=False):
+    """
+    Ekspor semua bulan tertutup yang belum ada di store.
+
+    Returns:
+        list: (tabel, bulan, jumlah baris atau None) untuk setiap bulan yang diekspor
+    """
+    results = []
+    for table in tables or STORE_TABLES:
+        model, _ = STORE_TABLES[table]
+        source = partitioned_entity(model)
+        first = db.session.execute(select(func.min(source.created_at))).scalar()
+        if first is None:
+            continue
+        month = month_start(first)
+        while month < current_month():
+            if force or not is_exported(table, month):
+                results.append((table, month, export_month(table, month)))
+            month = add_months(month, 1)
+    return results
+
+def scan(table, months, start, end, columns):
+    """Baca kolom `columns` dari bulan `months` dengan created_at di [start, end] sebagai pyarrow.Table"""
+    dataset = ds.dataset([month_path(table, month) for month in months], schema=table_schema(table), format='parquet')
+    created_at = ds.field('created_at')
+    return dataset.to_table(
+        columns=list(columns),
+        filter=(created_at >= pa.scalar(start, pa.timestamp('us'))) & (created_at <= pa.scalar(end, pa.timestamp('us')))
+    )
+
+def invalidate_month(table, month):
+    """Hapus file bulan `month` (None = semua bulan) dan tandai stale"""
+    if month is None:
+        root = os.path.join(store_dir(), table)
+        for name in os.listdir(root) if os.path.isdir(root) else ():
+            try:
+                invalidate_month(table, datetime.strptime(name, 'month=%Y-%m').date())
+            except ValueError:
+                continue
+        return
+    directory = month_dir(table, month)
+    if not os.path.isdir(directory):
+        return
+    open(os.path.join(directory, STALE_MARKER), 'w').close()
+    path = month_path(table, month)
+    if os.path.exists(path):
+        os.remove(path)
+
+def _closed_months(obj):
+    """Bulan tertutup yang datanya ikut berubah oleh objek ini (nilai created_at lama dan baru)"""
+    state = inspect(obj)
+    values = [obj.created_at, *state.attrs.created_at.history.deleted]
+    first_open = datetime.combine(current_month(), time.min)
+    return {month_start(value) for value in values if value is not None and value < first_open}
+
+@event.listens_for(Session, 'after_flush')
+def _collect_closed_months(session, flush_context):
+    if not has_app_context() or not store_enabled():
+        return
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, '__tablename__', None)
+        if table in STORE_TABLES:
+            for month in _closed_months(obj):
+                session.info.setdefault('analytics_stale', set()).add((table, month))
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_changes(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        table = mapper.local_table.name if mapper is not None else None
+        if table in STORE_TABLES:
+            orm_execute_state.session.info.setdefault('analytics_stale', set()).add((table, None))
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    stale = session.info.pop('analytics_stale', None)
+    if stale and has_app_context() and store_enabled():
+        for table, month in stale:
+            invalidate_month(table, month)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('analytics_stale', None)
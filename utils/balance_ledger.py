@@ -0,0 +1,355 @@
+"""
+Ledger saldo EDC dan agent (append-only) dengan snapshot berkala.
+
+Setiap perubahan saldo edc_machines.saldo / agent_profiles.total_balance
+juga dicatat sebagai baris balance_ledger berisi delta bertanda, sumber
+perubahan dan referensi transaksi / cash flow. Kolom saldo tetap menjadi
+nilai "sekarang" yang dibaca endpoint lain; ledger menyimpan riwayatnya.
+
+balance_snapshots menyimpan saldo per EDC/agent setelah semua mutasi
+sampai ledger_id tertentu, sehingga saldo pada waktu T = snapshot terakhir
+sebelum T + SUM(delta) sesudahnya, tanpa memutar ulang seluruh riwayat.
+Mutasi yang men-set saldo absolut (edit manual, reset, koreksi
+rekonsiliasi) menyimpan balance_after dan menjadi titik awal baru.
+Snapshot dibuat oleh take_snapshots() (balance_snapshots.py / endpoint
+POST /api/balances/snapshots).
+
+Saldo yang sudah ada sebelum ledger dipakai dicatat sebagai mutasi
+'opening' oleh record_opening_balances(), dijalankan sekali lewat
+`python balance_snapshots.py --init` (idempotent: hanya EDC/agent yang
+belum punya mutasi absolut). EDC/agent tanpa mutasi
+absolut belum punya titik awal: saldonya menurut ledger tidak diketahui
+(balance_at() mengembalikan None, pengecekan melaporkannya sebagai
+no_baseline) dan tidak dibuat snapshot.
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import select, insert, func
+from models.user import db
+from models.balance_ledger import BalanceLedger
+from models.balance_snapshot import BalanceSnapshot
+from utils.balance_slots import KIND_EDC, KIND_AGENT, BALANCE_COLUMNS, current_balances
+
+SOURCE_TRANSACTION = 'transaction'
+SOURCE_ADD_SALDO = 'add_saldo'
+SOURCE_MANUAL_EDIT = 'manual_edit'
+SOURCE_RESET = 'reset'
+SOURCE_OPENING = 'opening'
+SOURCE_RECONCILE = 'reconcile'
+
+# Sumber yang men-set saldo absolut (balance_after terisi)
+ABSOLUTE_SOURCES = (SOURCE_OPENING, SOURCE_MANUAL_EDIT, SOURCE_RESET, SOURCE_RECONCILE)
+
+BALANCE_KINDS = (KIND_EDC, KIND_AGENT)
+
+ZERO = Decimal('0.00')
+
+# Mutasi yang lebih baru dari ini belum masuk snapshot (transaksi yang
+# belum commit bisa punya id lebih kecil dari id yang sudah terlihat)
+SNAPSHOT_SAFETY_SECONDS = 60
+
+def ledger_entry(kind, owner_id, delta, source, transaction_id=None, cash_flow_id=None, user_id=None,
+                 created_at=None, balance_after=None):
+    """Dict satu baris ledger untuk record_ledger_entries()"""
+    return {
+        'kind': kind,
+        'owner_id': owner_id,
+        'delta': delta,
+        'source': source,
+        'balance_after': balance_after,
+        'transaction_id': transaction_id,
+        'cash_flow_id': cash_flow_id,
+        'user_id': user_id,
+        'created_at': created_at or datetime.utcnow(),
+    }
+
+def record_ledger_entries(entries):
+    """
+    Insert baris ledger dengan satu multi-row INSERT (caller yang commit).
+    Delta 0 dilewati kecuali saldo di-set absolut.
+    """
+    entries = [entry for entry in entries if entry['delta'] or entry['balance_after'] is not None]
+    if entries:
+        db.session.execute(insert(BalanceLedger).values(entries))
+
+def record_balance_change(kind, owner_id, delta, source, **refs):
+    record_ledger_entries([ledger_entry(kind, owner_id, delta, source, **refs)])
+
+def record_balance_reset(kind, new_balances, source, user_id=None):
+    """
+    Catat saldo yang di-set absolut (edit manual, reset) sebagai delta
+    terhadap saldo sekarang. Panggil sebelum saldo baru ditulis.
+
+    Args:
+        new_balances: {owner_id: saldo_baru}, None = semua owner menjadi 0
+    """
+    if new_balances is None:
+        old_balances = current_balances(kind)
+        new_balances = {owner_id: ZERO for owner_id in old_balances}
+    else:
+        old_balances = current_balances(kind, list(new_balances))
+    entries = []
+    for owner_id, new_balance in new_balances.items():
+        new_balance = Decimal(str(new_balance))
+        entries.append(ledger_entry(
+            kind, owner_id, new_balance - old_balances.get(owner_id, ZERO), source,
+            user_id=user_id, balance_after=new_balance
+        ))
+    record_ledger_entries(entries)
+
+def baseline_times(kind, owner_ids=None):
+    """{owner_id: created_at mutasi absolut pertama} untuk owner yang punya titik awal di ledger"""
+    statement = (
+        select(BalanceLedger.owner_id, func.min(BalanceLedger.created_at))
+        .where(BalanceLedger.kind == kind, BalanceLedger.source.in_(ABSOLUTE_SOURCES))
+        .group_by(BalanceLedger.owner_id)
+    )
+    if owner_ids is not None:
+        statement = statement.where(BalanceLedger.owner_id.in_(owner_ids))
+    return dict(db.session.execute(statement).all())
+
+def _latest_snapshots(kind, owner_ids=None, before=None):
+    """Subquery (owner_id, balance, ledger_id) snapshot terakhir per owner"""
+    latest_ids = select(
+        BalanceSnapshot.owner_id, func.max(BalanceSnapshot.id).label('id')
+    ).where(BalanceSnapshot.kind == kind)
+    if owner_ids is not None:
+        latest_ids = latest_ids.where(BalanceSnapshot.owner_id.in_(owner_ids))
+    if before is not None:
+        latest_ids = latest_ids.where(BalanceSnapshot.taken_at <= before)
+    latest_ids = latest_ids.group_by(BalanceSnapshot.owner_id).subquery()
+    return (
+        select(BalanceSnapshot.owner_id, BalanceSnapshot.balance, BalanceSnapshot.ledger_id)
+        .join(latest_ids, BalanceSnapshot.id == latest_ids.c.id)
+        .subquery()
+    )
+
+def ledger_balances(kind, owner_ids=None, upto_id=None, at=None):
+    """
+    Saldo menurut ledger: snapshot terakhir, atau mutasi absolut terakhir
+    sesudahnya (balance_after), ditambah SUM(delta) sesudahnya.
+
+    Args:
+        owner_ids: Batasi ke owner tertentu (None = semua)
+        upto_id: Hanya mutasi dengan id <= upto_id
+        at: Saldo pada waktu ini (snapshot dan mutasi sampai `at`)
+
+    Returns:
+        {owner_id: (saldo, ledger_id terakhir yang dihitung)}
+    """
+    latest = _latest_snapshots(kind, owner_ids, before=at)
+    balances = {
+        row.owner_id: (row.balance or ZERO, row.ledger_id)
+        for row in db.session.execute(select(latest))
+    }
+
+    def after_snapshot(statement):
+        statement = (
+            statement
+            .outerjoin(latest, latest.c.owner_id == BalanceLedger.owner_id)
+            .where(
+                BalanceLedger.kind == kind,
+                BalanceLedger.id > func.coalesce(latest.c.ledger_id, 0)
+            )
+        )
+        if owner_ids is not None:
+            statement = statement.where(BalanceLedger.owner_id.in_(owner_ids))
+        if upto_id is not None:
+            statement = statement.where(BalanceLedger.id <= upto_id)
+        if at is not None:
+            statement = statement.where(BalanceLedger.created_at <= at)
+        return statement
+
+    # Saldo yang di-set absolut sesudah snapshot menggantikan saldo snapshot
+    absolute_ids = after_snapshot(
+        select(BalanceLedger.owner_id, func.max(BalanceLedger.id).label('id'))
+        .select_from(BalanceLedger)
+        .where(BalanceLedger.source.in_(ABSOLUTE_SOURCES))
+    ).group_by(BalanceLedger.owner_id).subquery()
+    absolute = (
+        select(BalanceLedger.owner_id, BalanceLedger.id, BalanceLedger.balance_after)
+        .join(absolute_ids, BalanceLedger.id == absolute_ids.c.id)
+    )
+    for row in db.session.execute(absolute):
+        balances[row.owner_id] = (row.balance_after or ZERO, row.id)
+
+    tail = after_snapshot(
+        select(BalanceLedger.owner_id, func.sum(BalanceLedger.delta), func.max(BalanceLedger.id))
+        .select_from(BalanceLedger)
+        .outerjoin(absolute_ids, absolute_ids.c.owner_id == BalanceLedger.owner_id)
+        .where(BalanceLedger.id > func.coalesce(absolute_ids.c.id, 0))
+    ).group_by(BalanceLedger.owner_id)
+    for owner_id, delta, last_id in db.session.execute(tail):
+        balance, _ = balances.get(owner_id, (ZERO, 0))
+        balances[owner_id] = (balance + (delta or ZERO), last_id)
+    return balances
+
+def balance_at(kind, owner_id, at):
+    """Saldo EDC/agent pada waktu `at` (UTC), None jika `at` sebelum titik awal ledger owner ini"""
+    baseline = baseline_times(kind, [owner_id]).get(owner_id)
+    if baseline is None or at < baseline:
+        return None
+    balance, _ = ledger_balances(kind, [owner_id], at=at).get(owner_id, (ZERO, 0))
+    return balance
+
+def daily_balances(kind, owner_id, start_date, end_date):
+    """
+    Saldo harian (UTC): saldo awal dari snapshot, lalu akumulasi delta
+    per hari dengan satu GROUP BY. Hari yang berisi saldo absolut (opening,
+    edit manual, reset) dihitung ulang dari mutasi absolut tersebut.
+
+    Returns:
+        List {'date', 'opening', 'change', 'closing'} per hari; bernilai
+        None untuk hari sebelum titik awal ledger owner ini
+    """
+    start = datetime.combine(start_date, datetime.min.time())
+    end = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+    opening = balance_at(kind, owner_id, start - timedelta(microseconds=1))
+
+    day = func.date(BalanceLedger.created_at)
+    in_range = (
+        BalanceLedger.kind == kind,
+        BalanceLedger.owner_id == owner_id,
+        BalanceLedger.created_at >= start,
+        BalanceLedger.created_at < end
+    )
+    changes = {
+        str(date): delta or ZERO
+        for date, delta in db.session.execute(
+            select(day, func.sum(BalanceLedger.delta)).where(*in_range).group_by(day)
+        )
+    }
+    absolute_days = {
+        str(date) for (date,) in db.session.execute(
+            select(day).where(*in_range, BalanceLedger.source.in_(ABSOLUTE_SOURCES)).distinct()
+        )
+    }
+
+    series = []
+    current = start_date
+    while current <= end_date:
+        key = current.isoformat()
+        if key in absolute_days:
+            closing = balance_at(kind, owner_id, datetime.combine(current + timedelta(days=1), datetime.min.time()) - timedelta(microseconds=1))
+        elif opening is not None:
+            closing = opening + changes.get(key, ZERO)
+        else:
+            closing = None
+        series.append({
+            'date': key,
+            'opening': float(opening) if opening is not None else None,
+            'change': float(closing - (opening or ZERO)) if closing is not None else None,
+            'closing': float(closing) if closing is not None else None,
+        })
+        opening = closing
+        current += timedelta(days=1)
+    return series
+
+def take_snapshots(kinds=BALANCE_KINDS):
+    """
+    Buat snapshot untuk setiap EDC/agent yang punya mutasi sejak snapshot
+    terakhir. Mutasi dalam SNAPSHOT_SAFETY_SECONDS terakhir ditunda ke
+    snapshot berikutnya; EDC/agent tanpa titik awal dilewati.
+
+    Returns:
+        {kind: jumlah snapshot baru}
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=SNAPSHOT_SAFETY_SECONDS)
+    upto_id = db.session.execute(
+        select(func.max(BalanceLedger.id)).where(BalanceLedger.created_at <= cutoff)
+    ).scalar()
+    if not upto_id:
+        return {kind: 0 for kind in kinds}
+
+    created = {}
+    taken_at = datetime.utcnow()
+    for kind in kinds:
+        latest_ids = {
+            owner_id: ledger_id for owner_id, ledger_id in db.session.execute(
+                select(BalanceSnapshot.owner_id, func.max(BalanceSnapshot.ledger_id))
+                .where(BalanceSnapshot.kind == kind)
+                .group_by(BalanceSnapshot.owner_id)
+            )
+        }
+        baselines = baseline_times(kind)
+        rows = [
+            {
+                'kind': kind,
+                'owner_id': owner_id,
+                'balance': balance,
+                'ledger_id': upto_id,
+                'taken_at': taken_at,
+            }
+            for owner_id, (balance, last_id) in ledger_balances(kind, upto_id=upto_id).items()
+            if owner_id in baselines and last_id > latest_ids.get(owner_id, 0)
+        ]
+        if rows:
+            db.session.execute(insert(BalanceSnapshot).values(rows))
+        created[kind] = len(rows)
+    db.session.commit()
+    return created
+
+def record_opening_balances(kinds=BALANCE_KINDS, user_id=None):
+    """
+    Catat saldo sekarang sebagai mutasi 'opening' untuk EDC/agent yang
+    belum punya mutasi absolut (data sebelum ledger ada). Dipanggil dari
+    `balance_snapshots.py --init`; aman dipanggil ulang.
+
+    Delta opening = saldo tersimpan - SUM(delta) yang sudah tercatat,
+    sehingga SUM(delta) seluruh ledger tetap sama dengan saldo. Baris
+    induk dikunci supaya debit yang berjalan bersamaan tidak terlewat.
+
+    Returns:
+        {kind: jumlah baris opening}
+    """
+    created = {}
+    for kind in kinds:
+        model, _ = BALANCE_COLUMNS[kind]
+        has_baseline = (
+            select(BalanceLedger.id)
+            .where(
+                BalanceLedger.kind == kind,
+                BalanceLedger.owner_id == model.id,
+                BalanceLedger.source.in_(ABSOLUTE_SOURCES)
+            )
+            .exists()
+        )
+        missing = list(db.session.execute(
+            select(model.id).where(~has_baseline).order_by(model.id).with_for_update()
+        ).scalars())
+        if not missing:
+            created[kind] = 0
+            continue
+        balances = current_balances(kind, missing)
+        recorded = dict(db.session.execute(
+            select(BalanceLedger.owner_id, func.sum(BalanceLedger.delta))
+            .where(BalanceLedger.kind == kind, BalanceLedger.owner_id.in_(missing))
+            .group_by(BalanceLedger.owner_id)
+        ).all())
+        now = datetime.utcnow()
+        # Delta 0 tetap dicatat karena balance_after terisi (titik awal)
+        entries = [
+            ledger_entry(
+                kind, owner_id, balance - (recorded.get(owner_id) or ZERO), SOURCE_OPENING,
+                user_id=user_id, created_at=now, balance_after=balance
+            )
+            for owner_id, balance in balances.items()
+        ]
+        record_ledger_entries(entries)
+        created[kind] = len(entries)
+    db.session.commit()
+    return created
+
+def ledger_expected_balances(kind, owner_ids):
+    """
+    Saldo yang diharapkan menurut ledger (mode 'ledger' di
+    utils/reconciliation.py).
+
+    Returns:
+        {owner_id: Decimal} untuk owner_ids yang punya titik awal
+    """
+    baselines = baseline_times(kind, owner_ids)
+    if not baselines:
+        return {}
+    ledger = ledger_balances(kind, list(baselines))
+    return {owner_id: ledger.get(owner_id, (ZERO, 0))[0] for owner_id in baselines}
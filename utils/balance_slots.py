@@ -0,0 +1,233 @@
+"""
+Sharded balance untuk saldo EDC dan uang tunai agent (opsional).
+
+Tanpa sharding setiap transaksi di satu outlet meng-UPDATE baris
+edc_machines / agent_profiles yang sama sehingga kasir-kasir antre di row
+lock baris tersebut. Dengan BALANCE_SHARDS > 1:
+
+- Penambahan saldo (kredit) ditulis ke salah satu dari N baris
+  balance_slots (slot acak atau per kasir) lewat upsert, tanpa menyentuh
+  baris induk.
+- Pengurangan saldo (debit) tetap UPDATE bersyarat di baris induk supaya
+  saldo tidak pernah minus. Jika saldo induk kurang, slot milik baris itu
+  dilipat dulu ke induk lalu debit dicoba sekali lagi.
+- Saldo efektif = saldo induk + SUM(slot), dijumlahkan saat dibaca.
+- compact_balance_slots() melipat semua slot kembali ke baris induk
+  (jalankan berkala lewat compact_balances.py, dan sebelum mematikan mode
+  sharding).
+
+Urutan lock selalu baris induk dulu baru slot, sehingga debit, kredit dan
+kompaksi tidak saling deadlock.
+"""
+import random
+from datetime import datetime
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import select, update, delete, func, case
+from models.user import db
+from models.agent_profile import AgentProfile
+from models.edc_machine import EdcMachine
+from models.balance_slot import BalanceSlot
+from utils.upsert import upsert_increment
+
+KIND_EDC = 'edc'
+KIND_AGENT = 'agent'
+
+BALANCE_COLUMNS = {
+    KIND_EDC: (EdcMachine, 'saldo'),
+    KIND_AGENT: (AgentProfile, 'total_balance'),
+}
+
+ZERO = Decimal('0.00')
+
+_slots = BalanceSlot.__table__
+
+def shard_count():
+    return current_app.config.get('BALANCE_SHARDS', 1)
+
+def sharding_enabled():
+    return shard_count() > 1
+
+def pick_slot(user_id=None):
+    """Slot per kasir (BALANCE_SLOT_STRATEGY=cashier) atau acak"""
+    shards = shard_count()
+    if user_id is not None and current_app.config.get('BALANCE_SLOT_STRATEGY') == 'cashier':
+        return user_id % shards
+    return random.randrange(shards)
+
+def _update_base(kind, owner_id, delta, required=None):
+    model, column = BALANCE_COLUMNS[kind]
+    balance = func.coalesce(getattr(model, column), ZERO)
+    statement = update(model).where(model.id == owner_id)
+    if required is not None:
+        statement = statement.where(balance >= required)
+    result = db.session.execute(
+        statement.values({column: balance + delta}).execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
+
+def adjust_balance(kind, owner_id, delta, required=None, user_id=None):
+    """
+    Tambah `delta` ke saldo EDC/agent. Dengan `required`, perubahan hanya
+    terjadi jika saldo efektif >= required.
+
+    Args:
+        kind: KIND_EDC atau KIND_AGENT
+        owner_id: Id EDC machine / agent profile
+        delta: Perubahan saldo (Decimal, boleh negatif)
+        required: Saldo minimal yang harus tersedia (untuk debit)
+        user_id: Kasir yang memposting (untuk strategi slot per kasir)
+
+    Returns:
+        True jika saldo berubah
+    """
+    if sharding_enabled() and required is None and delta >= 0:
+        upsert_increment(
+            _slots,
+            {
+                'kind': kind,
+                'owner_id': owner_id,
+                'slot': pick_slot(user_id),
+                'amount': delta,
+                'updated_at': datetime.utcnow(),
+            },
+            key_columns=('kind', 'owner_id', 'slot'),
+            increment_columns=('amount',),
+            set_columns=('updated_at',)
+        )
+        return True
+
+    if _update_base(kind, owner_id, delta, required):
+        return True
+    if required is not None and sharding_enabled() and fold_slots(kind, [owner_id]):
+        return _update_base(kind, owner_id, delta, required)
+    return False
+
+def pending_totals(kind, owner_ids=None):
+    """{owner_id: SUM(slot)} yang belum dilipat ke baris induk"""
+    if not sharding_enabled():
+        return {}
+    statement = (
+        select(BalanceSlot.owner_id, func.sum(BalanceSlot.amount))
+        .where(BalanceSlot.kind == kind)
+        .group_by(BalanceSlot.owner_id)
+    )
+    if owner_ids is not None:
+        statement = statement.where(BalanceSlot.owner_id.in_(owner_ids))
+    return {owner_id: total or ZERO for owner_id, total in db.session.execute(statement)}
+
+def current_balances(kind, owner_ids=None):
+    """{owner_id: saldo efektif (induk + slot)} untuk owner_ids (None = semua)"""
+    model, column = BALANCE_COLUMNS[kind]
+    statement = select(model.id, getattr(model, column))
+    if owner_ids is not None:
+        statement = statement.where(model.id.in_(owner_ids))
+    balances = {owner_id: balance or ZERO for owner_id, balance in db.session.execute(statement)}
+    for owner_id, pending in pending_totals(kind, owner_ids).items():
+        if owner_id in balances:
+            balances[owner_id] += pending
+    return balances
+
+def current_balance(kind, owner_id):
+    """Saldo efektif satu EDC/agent (induk + slot)"""
+    return current_balances(kind, [owner_id]).get(owner_id, ZERO)
+
+def pending_grand_total(kind):
+    """SUM semua slot untuk satu jenis saldo"""
+    if not sharding_enabled():
+        return ZERO
+    return db.session.execute(
+        select(func.coalesce(func.sum(BalanceSlot.amount), 0)).where(BalanceSlot.kind == kind)
+    ).scalar() or ZERO
+
+def with_pending(kind, items, field, id_field='id'):
+    """
+    Tambahkan saldo slot ke dict hasil to_dict()/listing (in place).
+    Dict tanpa field saldo atau tanpa id dibiarkan (ListingSpec dengan
+    `pending` selalu men-select id untuk keperluan ini).
+    """
+    if not items or field not in items[0] or id_field not in items[0]:
+        return items
+    totals = pending_totals(kind, [item[id_field] for item in items])
+    for item in items:
+        pending = totals.get(item[id_field])
+        if pending:
+            item[field] = float(Decimal(str(item[field] or 0)) + pending)
+    return items
+
+def fold_slots(kind, owner_ids):
+    """
+    Lipat slot milik `owner_ids` ke baris induk (caller yang commit).
+
+    Returns:
+        Jumlah baris induk yang saldonya berubah
+    """
+    model, column = BALANCE_COLUMNS[kind]
+    owner_ids = sorted(set(owner_ids))
+    if not owner_ids:
+        return 0
+
+    # Lock baris induk dulu, baru slot (urutan yang sama dengan debit)
+    db.session.execute(
+        select(model.id).where(model.id.in_(owner_ids)).order_by(model.id).with_for_update()
+    ).all()
+    totals = {}
+    for owner_id, amount in db.session.execute(
+        select(BalanceSlot.owner_id, BalanceSlot.amount)
+        .where(BalanceSlot.kind == kind, BalanceSlot.owner_id.in_(owner_ids))
+        .order_by(BalanceSlot.id).with_for_update()
+    ):
+        if amount:
+            totals[owner_id] = totals.get(owner_id, ZERO) + amount
+    totals = {owner_id: total for owner_id, total in totals.items() if total}
+    if not totals:
+        return 0
+
+    balance = func.coalesce(getattr(model, column), ZERO)
+    db.session.execute(
+        update(model)
+        .where(model.id.in_(totals.keys()))
+        .values({column: balance + case(totals, value=model.id, else_=ZERO)})
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        update(BalanceSlot)
+        .where(BalanceSlot.kind == kind, BalanceSlot.owner_id.in_(totals.keys()))
+        .values(amount=ZERO)
+        .execution_options(synchronize_session=False)
+    )
+    return len(totals)
+
+def clear_slots(kind, owner_ids=None):
+    """Buang slot (dipakai saat saldo induk di-set absolut: edit manual / reset)"""
+    statement = delete(BalanceSlot).where(BalanceSlot.kind == kind)
+    if owner_ids is not None:
+        statement = statement.where(BalanceSlot.owner_id.in_(owner_ids))
+    return db.session.execute(statement.execution_options(synchronize_session=False)).rowcount
+
+def compact_balance_slots(kinds=(KIND_EDC, KIND_AGENT), chunk_size=100):
+    """
+    Lipat semua slot ke baris induk, commit per `chunk_size` baris induk
+    supaya lock tidak ditahan lama.
+
+    Returns:
+        {kind: jumlah baris induk yang berubah}
+    """
+    folded = {}
+    for kind in kinds:
+        owner_ids = [
+            owner_id for (owner_id,) in db.session.execute(
+                select(BalanceSlot.owner_id).where(BalanceSlot.kind == kind, BalanceSlot.amount != 0)
+                .distinct().order_by(BalanceSlot.owner_id)
+            )
+        ]
+        db.session.commit()
+        folded[kind] = 0
+        for start in range(0, len(owner_ids), chunk_size):
+            try:
+                folded[kind] += fold_slots(kind, owner_ids[start:start + chunk_size])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+    return folded
@@ -0,0 +1,107 @@
+"""
+Conditional GET support (ETag) untuk endpoint katalog.
+
+ETag diturunkan dari database, bukan dari state proses: satu query agregat
+per request (COUNT, MAX(id), MAX(updated_at) dan SUM kolom uang tabel
+katalog, ditambah id catalog_changes terakhir). Perubahan dari proses mana
+pun (worker lain, CLI seperti reconcile.py --fix dan compact_balances.py,
+atau UPDATE lewat SQL mentah) langsung mengubah ETag tanpa listener session.
+
+- Edit lewat route katalog selalu menambah baris catalog_changes, jadi dua
+  edit di detik yang sama tetap menghasilkan ETag berbeda.
+- Perubahan saldo EDC (posting, reconcile, kompaksi slot) mengubah
+  SUM(saldo) dan/atau agregat balance_slots milik EDC.
+- Baris yang ikut terhapus lewat ON DELETE CASCADE mengubah COUNT tabelnya.
+
+Endpoint yang di-decorate dengan `conditional_catalog` menjawab
+`304 Not Modified` tanpa query data dan tanpa serialisasi ulang selama
+agregat tabelnya sama. Validasi hanya lewat ETag (If-None-Match):
+Last-Modified beresolusi detik tidak cukup untuk saldo yang berubah
+beberapa kali per detik.
+"""
+import hashlib
+from functools import wraps
+from flask import request, current_app, make_response
+from sqlalchemy import select, func
+from models.user import db
+from models.service import Service
+from models.service_fee import ServiceFee
+from models.bank_fee import BankFee
+from models.edc_machine import EdcMachine
+from models.balance_slot import BalanceSlot
+from models.catalog_change import CatalogChange
+
+# Tabel katalog -> (model, kolom uang yang ikut dijumlahkan)
+CATALOG_TABLES = {
+    'services': (Service, ()),
+    'service_fees': (ServiceFee, ('min_amount', 'max_amount', 'fee')),
+    'bank_fees': (BankFee, ('fee',)),
+    'edc_machines': (EdcMachine, ('saldo',)),
+}
+
+def _aggregates(model, money_columns):
+    return (
+        func.count(model.id),
+        func.max(model.id),
+        func.max(model.updated_at),
+        *(func.sum(getattr(model, name)) for name in money_columns),
+    )
+
+def catalog_fingerprint(table):
+    """Tuple agregat tabel katalog yang berubah setiap kali isi listing-nya berubah"""
+    model, money_columns = CATALOG_TABLES[table]
+    columns = [
+        *_aggregates(model, money_columns),
+        select(func.max(CatalogChange.id)).scalar_subquery(),
+    ]
+    if table == 'edc_machines':
+        # Saldo slot (balance sharding) ikut tampil di listing EDC
+        columns += [
+            select(aggregate).where(BalanceSlot.kind == 'edc').scalar_subquery()
+            for aggregate in (func.count(BalanceSlot.id), func.sum(BalanceSlot.amount), func.max(BalanceSlot.updated_at))
+        ]
+    return tuple(db.session.execute(select(*columns).select_from(model)).one())
+
+def _make_etag(table, fingerprint):
+    """ETag = tabel + hash agregat + hash query string (filter ikut membedakan)"""
+    args = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    digest = hashlib.sha1(repr(fingerprint).encode('utf-8')).hexdigest()[:16]
+    args_hash = hashlib.sha1(args.encode('utf-8')).hexdigest()[:10]
+    return f'{table}-{digest}-{args_hash}'
+
+def _apply_cache_headers(response, etag, private, max_age):
+    response.set_etag(etag)
+    scope = 'private' if private else 'public'
+    response.headers['Cache-Control'] = f'{scope}, max-age={max_age}, must-revalidate'
+    return response
+
+def conditional_catalog(table, private=False, max_age=None):
+    """
+    Decorator untuk GET endpoint katalog: tambahkan ETag dan Cache-Control,
+    dan jawab 304 bila client sudah punya versi terbaru.
+
+    Args:
+        table: Nama tabel katalog yang menjadi sumber data endpoint
+        private: True untuk endpoint yang butuh token (Cache-Control: private)
+        max_age: Override CATALOG_CACHE_MAX_AGE (detik) untuk endpoint ini
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if max_age is None:
+                ttl = current_app.config.get('CATALOG_CACHE_MAX_AGE', 0)
+            else:
+                ttl = max_age
+            etag = _make_etag(table, catalog_fingerprint(table))
+
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+                return _apply_cache_headers(response, etag, private, ttl)
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                _apply_cache_headers(response, etag, private, ttl)
+            return response
+
+        return decorated
+    return decorator
@@ -0,0 +1,180 @@
+"""
+Versioned catalog untuk terminal: snapshot lengkap dan delta sync.
+
+Route katalog (service, service_fee, bank_fee, edc) mencatat setiap
+perubahan ke tabel catalog_changes lewat `record_catalog_change` di dalam
+transaksi yang sama. Id change log terakhir adalah catalog version.
+
+Baris katalog yang ikut terhapus lewat ON DELETE CASCADE di database
+(fee milik service, bank fee milik EDC, EDC milik agent/user) dicatat oleh
+`record_catalog_delete` sebelum induknya dihapus.
+
+Id auto increment dialokasikan saat INSERT, bukan saat commit: change
+dengan id lebih kecil bisa baru terlihat setelah client membaca version
+yang lebih besar. Karena itu delta selalu membaca ulang
+CATALOG_SYNC_OVERLAP id sebelum `since`; change yang mungkin sudah pernah
+dikirim tidak pernah dianggap insert baru, jadi pengiriman ulang aman
+(upsert / delete idempotent).
+"""
+from flask import current_app
+from sqlalchemy import func, select
+from models.user import db
+from models.agent_profile import AgentProfile
+from models.catalog_change import CatalogChange
+from models.service import Service
+from models.service_fee import ServiceFee
+from models.bank_fee import BankFee
+from models.edc_machine import EdcMachine
+
+CATALOG_MODELS = {
+    'services': Service,
+    'service_fees': ServiceFee,
+    'bank_fees': BankFee,
+    'edc_machines': EdcMachine,
+}
+
+# Tabel induk -> kolom FK baris yang ikut terhapus (ON DELETE CASCADE)
+CATALOG_CASCADES = {
+    'users': (AgentProfile.user_id,),
+    'agent_profiles': (EdcMachine.agent_profile_id,),
+    'services': (ServiceFee.service_id, BankFee.service_id),
+    'edc_machines': (BankFee.edc_machine_id,),
+}
+
+def record_catalog_change(table_name, row_id, operation):
+    """
+    Catat perubahan katalog ke session aktif (ikut commit caller)
+
+    Args:
+        table_name: Salah satu key CATALOG_MODELS
+        row_id: Primary key baris yang berubah (panggil setelah flush untuk insert)
+        operation: insert, update, atau delete
+    """
+    db.session.add(CatalogChange(
+        table_name=table_name,
+        row_id=row_id,
+        operation=operation
+    ))
+
+def record_catalog_delete(table_name, row_id):
+    """
+    Catat delete baris beserta baris katalog yang ikut terhapus lewat
+    ON DELETE CASCADE. Panggil sebelum db.session.delete() induknya:
+    setelah DELETE di-flush, baris anak sudah tidak bisa dibaca.
+
+    Args:
+        table_name: Tabel katalog, atau users / agent_profiles (hanya turunannya yang dicatat)
+        row_id: Primary key baris yang dihapus
+    """
+    if table_name in CATALOG_MODELS:
+        record_catalog_change(table_name, row_id, 'delete')
+    for column in CATALOG_CASCADES.get(table_name, ()):
+        child = column.class_
+        for child_id in db.session.execute(select(child.id).where(column == row_id)).scalars().all():
+            record_catalog_delete(child.__tablename__, child_id)
+
+def current_catalog_version():
+    """Return catalog version (id change log terakhir, 0 jika kosong)"""
+    return db.session.query(func.max(CatalogChange.id)).scalar() or 0
+
+def edc_catalog_dict(machine):
+    """Representasi EDC untuk katalog terminal (tanpa saldo yang berubah tiap transaksi)"""
+    return {
+        'id': machine.id,
+        'agent_profile_id': machine.agent_profile_id,
+        'name': machine.name,
+        'bank_name': machine.bank_name,
+        'account_number': machine.account_number,
+        'status': machine.status,
+        'updated_at': machine.updated_at.isoformat() if machine.updated_at else None
+    }
+
+def _catalog_dict(table_name, row):
+    if table_name == 'edc_machines':
+        return edc_catalog_dict(row)
+    return row.to_dict()
+
+def _in_catalog(table_name, row):
+    # Hanya EDC aktif yang masuk katalog; EDC nonaktif dianggap terhapus
+    if table_name == 'edc_machines':
+        return row.status == 'active'
+    return True
+
+def build_catalog_snapshot():
+    """
+    Snapshot katalog lengkap beserta version-nya.
+
+    Version dibaca sebelum data; perubahan yang commit di antaranya akan
+    terkirim ulang pada delta berikutnya (upsert bersifat idempotent).
+    """
+    version = current_catalog_version()
+    edc_machines = EdcMachine.query.filter_by(status='active').all()
+
+    return {
+        'version': version,
+        'services': [service.to_dict() for service in Service.query.all()],
+        'service_fees': [fee.to_dict() for fee in ServiceFee.query.all()],
+        'bank_fees': [fee.to_dict() for fee in BankFee.query.all()],
+        'edc_machines': [edc_catalog_dict(machine) for machine in edc_machines]
+    }
+
+def build_catalog_changes(since):
+    """
+    Delta katalog sejak version `since`.
+
+    Beberapa perubahan pada baris yang sama digabung: insert lalu update
+    dikirim sebagai insert, insert lalu delete tidak dikirim sama sekali.
+    Insert dan update berisi data terbaru baris tersebut. Change di
+    jendela overlap (id <= since) dikirim ulang sebagai update/delete.
+    """
+    version = current_catalog_version()
+    overlap = current_app.config.get('CATALOG_SYNC_OVERLAP', 100)
+    changes = CatalogChange.query.filter(
+        CatalogChange.id > since - overlap,
+        CatalogChange.id <= version
+    ).order_by(CatalogChange.id.asc()).all()
+
+    # (table_name, row_id) -> [first_operation, last_operation]
+    merged = {}
+    for change in changes:
+        key = (change.table_name, change.row_id)
+        if key in merged:
+            merged[key][1] = change.operation
+        else:
+            # Insert yang mungkin sudah diterima client bukan insert baru
+            first = 'update' if change.id <= since and change.operation == 'insert' else change.operation
+            merged[key] = [first, change.operation]
+
+    result = {
+        table_name: {'inserts': [], 'updates': [], 'deletes': []}
+        for table_name in CATALOG_MODELS
+    }
+
+    # Bulk load current rows per table
+    wanted = {table_name: [] for table_name in CATALOG_MODELS}
+    for (table_name, row_id), (first_op, last_op) in merged.items():
+        if table_name in wanted and last_op != 'delete':
+            wanted[table_name].append(row_id)
+
+    rows = {}
+    for table_name, ids in wanted.items():
+        if ids:
+            model = CATALOG_MODELS[table_name]
+            for row in model.query.filter(model.id.in_(ids)).all():
+                rows[(table_name, row.id)] = row
+
+    for (table_name, row_id), (first_op, last_op) in merged.items():
+        if table_name not in result:
+            continue
+        row = rows.get((table_name, row_id))
+        if last_op == 'delete' or row is None or not _in_catalog(table_name, row):
+            if first_op != 'insert':
+                result[table_name]['deletes'].append(row_id)
+        elif first_op == 'insert':
+            result[table_name]['inserts'].append(_catalog_dict(table_name, row))
+        else:
+            result[table_name]['updates'].append(_catalog_dict(table_name, row))
+
+    result['since'] = since
+    result['version'] = version
+    return result
@@ -0,0 +1,52 @@
+"""
+User yang sedang login, di-load paling banyak sekali per request.
+
+token_required menaruh payload token di request. Token hasil login membawa
+claim role dan agent_profile_id, sehingga cek role (owner/admin) cukup
+membaca claim tanpa query ke DB. Object User hanya di-load bila handler
+butuh kolom lain (misalnya name untuk cashier_name) dan di-cache di
+flask.g untuk sisa request.
+
+Claim tidak dicek ulang ke DB: update_user menaikkan token_version (lihat
+utils/token_version.py) setiap kali role atau agent_profile_id user
+berubah, sehingga token dengan claim lama ditolak token_required di semua
+proses (proses lain setelah cache versinya berumur
+TOKEN_VERSION_CACHE_SECONDS).
+"""
+from flask import g, request, has_request_context
+from models.user import db, User
+
+def _token_claims():
+    payload = getattr(request, 'token_payload', None)
+    if not payload or 'role' not in payload:
+        return None
+    return payload
+
+def load_current_user():
+    """User yang sedang login (None jika sudah dihapus), di-cache di flask.g"""
+    if 'current_user' not in g:
+        g.current_user = db.session.get(User, request.user_id)
+    return g.current_user
+
+def current_user_role():
+    """Role user yang sedang login: dari claim token, atau dari DB untuk token tanpa claim"""
+    claims = _token_claims()
+    if claims is not None:
+        return claims['role']
+    user = load_current_user()
+    return user.role if user else None
+
+def current_agent_profile_id():
+    """agent_profile_id user yang sedang login: dari claim token, atau dari DB untuk token tanpa claim"""
+    claims = _token_claims()
+    if claims is not None:
+        return claims.get('agent_profile_id')
+    user = load_current_user()
+    return user.agent_profile_id if user else None
+
+def user_has_role(user_id, *roles):
+    """True jika user punya salah satu role (user yang sedang login tanpa query)"""
+    if has_request_context() and user_id == getattr(request, 'user_id', None):
+        return current_user_role() in roles
+    user = db.session.get(User, user_id)
+    return user is not None and user.role in roles
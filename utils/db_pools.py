@@ -0,0 +1,107 @@
+"""
+Connection pool terpisah per jenis beban kerja.
+
+Satu laporan bulanan atau PDF besar bisa menahan koneksi lama. Dengan satu
+pool bersama, kasir yang memposting transaksi ikut antre koneksi. Di sini
+database primary diakses lewat tiga engine dengan pool sendiri-sendiri
+(config DB_POOLS):
+
+- posting: transaksi dan cash flow (pool kecil tapi tidak pernah dipakai
+  laporan, timeout pendek supaya kasir cepat dapat error daripada hang)
+- interactive: endpoint lain (engine default db.engine)
+- reporting: laporan, dashboard, rekonsiliasi saldo, PDF (pool terbatas,
+  timeout statement panjang)
+
+Pool dipilih per blueprint (DB_POOL_BLUEPRINTS) atau per view dengan
+@use_db_pool('reporting'). Pilihan ditetapkan di before_request dari
+request.endpoint, sebelum query pertama (termasuk cek token_required). Di MySQL setiap koneksi memasang
+MAX_EXECUTION_TIME (batas waktu SELECT) dan innodb_lock_wait_timeout
+sesuai pool. Di SQLite semua pool memakai engine default.
+"""
+from flask import g, request, current_app, has_request_context
+from sqlalchemy import create_engine, event
+from models.user import db
+
+POOL_POSTING = 'posting'
+POOL_INTERACTIVE = 'interactive'
+POOL_REPORTING = 'reporting'
+
+ENGINE_OPTION_KEYS = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle', 'pool_pre_ping')
+
+def _install_timeouts(engine, options):
+    statement_timeout_ms = options.get('statement_timeout_ms')
+    lock_wait_timeout = options.get('lock_wait_timeout')
+    if engine.dialect.name != 'mysql' or not (statement_timeout_ms or lock_wait_timeout):
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_session_timeouts(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if statement_timeout_ms:
+            cursor.execute(f'SET SESSION MAX_EXECUTION_TIME = {int(statement_timeout_ms)}')
+        if lock_wait_timeout:
+            cursor.execute(f'SET SESSION innodb_lock_wait_timeout = {int(lock_wait_timeout)}')
+        cursor.close()
+
+def init_db_pools(app):
+    """Buat engine posting/reporting dan pasang pemilihan pool per request"""
+    pools = app.config.get('DB_POOLS', {})
+    engines = {}
+    with app.app_context():
+        default_engine = db.engine
+    _install_timeouts(default_engine, pools.get(POOL_INTERACTIVE, {}))
+    for name, options in pools.items():
+        if name == POOL_INTERACTIVE or default_engine.dialect.name == 'sqlite':
+            engines[name] = default_engine
+            continue
+        engine = create_engine(
+            app.config['SQLALCHEMY_DATABASE_URI'],
+            **{key: options[key] for key in ENGINE_OPTION_KEYS if key in options}
+        )
+        _install_timeouts(engine, options)
+        engines[name] = engine
+    app.extensions['db_pools'] = engines
+    with app.app_context():
+        replica_engine = db.engines.get('replica')
+    if replica_engine is not None:
+        _install_timeouts(replica_engine, pools.get(POOL_REPORTING, {}))
+
+    @app.before_request
+    def _select_db_pool():
+        view = app.view_functions.get(request.endpoint)
+        g.db_pool = getattr(view, 'db_pool', None) or \
+            app.config.get('DB_POOL_BLUEPRINTS', {}).get(request.blueprint, POOL_INTERACTIVE)
+
+def use_db_pool(name):
+    """
+    Decorator: view ini memakai pool `name` (mengganti pool blueprint).
+    Hanya menandai view; @wraps di decorator lain (token_required) ikut
+    menyalin tandanya ke view yang terdaftar.
+    """
+    def decorator(f):
+        f.db_pool = name
+        return f
+    return decorator
+
+def pool_engine(name=None):
+    """Engine pool `name`, atau pool request ini, atau engine default"""
+    engines = current_app.extensions.get('db_pools', {})
+    if name is None and has_request_context():
+        name = g.get('db_pool')
+    return engines.get(name) or db.engine
+
+def pool_status():
+    """Status setiap pool (ukuran, koneksi dipakai, overflow)"""
+    status = {}
+    for name, engine in current_app.extensions.get('db_pools', {}).items():
+        pool = engine.pool
+        if hasattr(pool, 'checkedout'):
+            status[name] = {
+                'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'overflow': pool.overflow(),
+                'idle': pool.checkedin(),
+            }
+        else:
+            status[name] = {'status': pool.status()}
+    return status
@@ -0,0 +1,193 @@
+"""
+Routing baca ke read replica untuk endpoint laporan/dashboard.
+
+Jika bind 'replica' dikonfigurasi (DB_REPLICA_HOST), SELECT di dalam view
+yang di-decorate @replica_reads dijalankan di replica. Semua yang lain
+tetap ke primary:
+
+- flush, INSERT/UPDATE/DELETE, dan SELECT ... FOR UPDATE
+- request dengan header `X-Read-Your-Writes: true`
+- user yang baru commit perubahan dalam REPLICA_READ_YOUR_WRITES_SECONDS
+  terakhir (supaya transaksi yang baru diposting langsung terlihat)
+- replica tidak bisa dihubungi atau tertinggal lebih dari
+  REPLICA_MAX_LAG_SECONDS (dicek paling sering tiap
+  REPLICA_CHECK_INTERVAL_SECONDS)
+
+SELECT yang gagal di replica (OperationalError / DisconnectionError, misalnya
+replica mati di antara dua health check) diulang sekali di primary dan
+replica ditandai tidak sehat sampai pengecekan berikutnya.
+"""
+import threading
+import time
+from functools import wraps
+from flask import g, request, current_app, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select, event, text
+from sqlalchemy.exc import OperationalError, DisconnectionError
+
+REPLICA_BIND = 'replica'
+
+_lock = threading.Lock()
+_last_write = {}
+_replica_state = {'checked_at': None, 'healthy': False, 'lag': None, 'error': None}
+
+def replica_reads(f):
+    """Decorator: SELECT di view ini boleh dijalankan di read replica"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        previous = g.get('replica_reads', False)
+        g.replica_reads = True
+        try:
+            return f(*args, **kwargs)
+        finally:
+            g.replica_reads = previous
+    return decorated
+
+def _replica_lag(engine):
+    """Detik replica tertinggal dari primary (0 untuk server yang bukan replica)"""
+    with engine.connect() as connection:
+        if engine.dialect.name != 'mysql':
+            connection.execute(text('SELECT 1'))
+            return 0
+        try:
+            row = connection.execute(text('SHOW REPLICA STATUS')).mappings().first()
+        except Exception:
+            # MySQL < 8.0.22
+            row = connection.execute(text('SHOW SLAVE STATUS')).mappings().first()
+        if row is None:
+            return 0
+        lag = row.get('Seconds_Behind_Source', row.get('Seconds_Behind_Master'))
+        # NULL = replikasi berhenti
+        return float('inf') if lag is None else float(lag)
+
+def _public_state():
+    return {key: _replica_state[key] for key in ('healthy', 'lag', 'error')}
+
+def replica_status(engine=None, force=False):
+    """Status replica (di-cache REPLICA_CHECK_INTERVAL_SECONDS)"""
+    config = current_app.config
+    now = time.monotonic()
+    with _lock:
+        checked_at = _replica_state['checked_at']
+        if not force and checked_at is not None and now - checked_at < config.get('REPLICA_CHECK_INTERVAL_SECONDS', 5):
+            return _public_state()
+        # Thread lain memakai status lama selama pengecekan berjalan
+        _replica_state['checked_at'] = now
+    engine = engine or current_app.extensions['sqlalchemy'].engines.get(REPLICA_BIND)
+    if engine is None:
+        state = {'healthy': False, 'lag': None, 'error': 'Replica tidak dikonfigurasi'}
+    else:
+        try:
+            lag = _replica_lag(engine)
+            state = {
+                'healthy': lag <= config.get('REPLICA_MAX_LAG_SECONDS', 5),
+                'lag': None if lag == float('inf') else lag,
+                'error': None if lag != float('inf') else 'Replikasi berhenti',
+            }
+        except Exception as e:
+            state = {'healthy': False, 'lag': None, 'error': str(e)}
+    with _lock:
+        _replica_state.update(state, checked_at=time.monotonic())
+        return _public_state()
+
+def mark_replica_unhealthy(error):
+    """Matikan routing ke replica sampai health check berikutnya (REPLICA_CHECK_INTERVAL_SECONDS)"""
+    with _lock:
+        _replica_state.update(healthy=False, error=str(error), checked_at=time.monotonic())
+
+def read_with_fallback(bind, fallback, run):
+    """
+    run(bind); jika bind (replica) gagal dihubungi, tandai replica tidak
+    sehat lalu ulang sekali dengan run(fallback) di primary. Tidak butuh
+    app context, bisa dipakai dari thread worker laporan.
+    """
+    try:
+        return run(bind)
+    except (OperationalError, DisconnectionError) as e:
+        if fallback is None or fallback is bind:
+            raise
+        mark_replica_unhealthy(e)
+        return run(fallback)
+
+def record_user_write(user_id):
+    with _lock:
+        _last_write[user_id] = time.monotonic()
+
+def _wants_primary():
+    if request.headers.get('X-Read-Your-Writes', '').lower() in ('1', 'true', 'yes'):
+        return True
+    user_id = getattr(request, 'user_id', None)
+    if user_id is None:
+        return False
+    with _lock:
+        last_write = _last_write.get(user_id)
+    window = current_app.config.get('REPLICA_READ_YOUR_WRITES_SECONDS', 10)
+    return last_write is not None and time.monotonic() - last_write < window
+
+class RoutingSession(Session):
+    """Session Flask-SQLAlchemy yang mengirim SELECT di @replica_reads ke replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and self._is_plain_select(clause):
+            engine = self._replica_engine()
+            if engine is not None:
+                return engine
+        elif bind is None:
+            self.info['has_writes'] = True
+        if bind is None:
+            engine = self._pool_engine()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def primary_bind(self, clause=None):
+        """Engine primary untuk clause (tanpa routing ke replica)"""
+        return self._pool_engine() or super().get_bind(clause=clause)
+
+    @staticmethod
+    def _is_plain_select(clause):
+        return isinstance(clause, Select) and clause._for_update_arg is None
+
+    @staticmethod
+    def _pool_engine():
+        # Pool primary per beban kerja (utils/db_pools.py)
+        if not has_request_context() or 'db_pool' not in g:
+            return None
+        return current_app.extensions.get('db_pools', {}).get(g.db_pool)
+
+    def _replica_engine(self):
+        if not has_request_context() or not g.get('replica_reads'):
+            return None
+        engine = self._db.engines.get(REPLICA_BIND)
+        if engine is None or _wants_primary():
+            return None
+        return engine if replica_status(engine)['healthy'] else None
+
+    def commit(self):
+        has_writes = self.info.pop('has_writes', False)
+        super().commit()
+        if has_writes and has_request_context() and getattr(request, 'user_id', None) is not None:
+            record_user_write(request.user_id)
+
+    def rollback(self):
+        self.info.pop('has_writes', None)
+        super().rollback()
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _retry_replica_read_on_primary(orm_execute_state):
+    session = orm_execute_state.session
+    if (
+        orm_execute_state.bind_arguments.get('bind') is not None
+        or not session._is_plain_select(orm_execute_state.statement)
+        or session._replica_engine() is None
+    ):
+        return None
+    try:
+        return orm_execute_state.invoke_statement()
+    except (OperationalError, DisconnectionError) as e:
+        mark_replica_unhealthy(e)
+        # Koneksi replica yang putus ikut di transaksi session; view
+        # @replica_reads hanya membaca, jadi aman dibuang sebelum mengulang
+        if not (session.info.get('has_writes') or session.new or session.dirty or session.deleted):
+            session.rollback()
+        return orm_execute_state.invoke_statement()
@@ -0,0 +1,340 @@
+"""
+Rollup transaksi per jam (tabel transaction_hourly) untuk heatmap jam x
+hari (GET /api/reports/heatmap) dan seri intraday (GET /api/reports/intraday).
+
+Rollup diperbarui di transaksi DB yang sama dengan penulisan transaksinya:
+
+- posting (utils/transaction_posting.py) memanggil record_transactions()
+  untuk INSERT Core-nya
+- objek Transaction yang dibuat, diubah atau dihapus lewat session ORM dan
+  INSERT banyak baris lewat session.execute(insert(Transaction), rows)
+  dicatat otomatis oleh listener session
+- UPDATE/DELETE massal lewat session menghitung ulang hanya bucket
+  (jam, agent) milik baris yang terkena, sebelum dan sesudah UPDATE
+  (refresh_hourly_buckets); tanpa WHERE seluruh rollup dihitung ulang
+
+Rollup untuk data lama diisi sekali lewat `python rebuild_hourly_rollup.py`
+(ensure_hourly_rollup), bukan saat app start.
+
+Baris rollup tidak pernah dihapus saat partisi transaksi diarsip, jadi
+heatmap periode panjang tidak perlu membaca tabel arsip.
+
+Pembacaan memakai NumPy: satu SELECT ber-GROUP BY jam, lalu np.bincount
+dengan minlength sejumlah sel (168 sel jam x hari, atau jumlah bucket
+dalam sehari) sehingga sel tanpa transaksi otomatis bernilai 0. Bucket 5
+dan 15 menit lebih halus dari rollup, jadi dihitung dari transaksi hari
+itu saja (range index created_at).
+"""
+from datetime import datetime, time, timedelta
+from flask import has_app_context
+from sqlalchemy import event, inspect, select, insert, delete, func, literal, and_, or_
+from sqlalchemy.orm import Session
+from models.user import db
+from models.transaction import Transaction
+from models.transaction_hourly import TransactionHourly
+from utils.balance_slots import pick_slot, sharding_enabled
+from utils.partitioning import partitioned_entity
+from utils.report_parts import ZERO, TRANSACTION_SUMS, to_decimal
+from utils.report_vectorized import np, cents, fetch_arrays, daily_series
+from utils.upsert import upsert_increment
+
+INTRADAY_INTERVALS = (5, 15, 60)
+WEEKDAYS = ('Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat', 'Sabtu', 'Minggu')
+FEE_COLUMNS = ('service_fee', 'bank_fee', 'extra_fee')
+ROLLUP_COLUMNS = ('created_at', 'agent_profile_id', *TRANSACTION_SUMS)
+
+_table = TransactionHourly.__table__
+
+def hour_start(value):
+    return value.replace(minute=0, second=0, microsecond=0)
+
+def _value(row, name):
+    return row.get(name) if isinstance(row, dict) else getattr(row, name)
+
+def record_transactions(rows, sign=1):
+    """
+    Tambahkan transaksi ke rollup (caller yang commit).
+
+    Args:
+        rows: Dict kolom transaksi atau objek Transaction (butuh created_at, agent_profile_id, user_id dan kolom uang)
+        sign: 1 untuk transaksi baru, -1 untuk transaksi yang dihapus / nilai lama
+    """
+    deltas = {}
+    for row in rows:
+        created_at = _value(row, 'created_at')
+        if created_at is None:
+            continue
+        # Pengurangan selalu ke slot 0; yang dibaca hanya SUM semua slot
+        slot = pick_slot(_value(row, 'user_id')) if sign > 0 and sharding_enabled() else 0
+        totals = deltas.setdefault(
+            (hour_start(created_at), _value(row, 'agent_profile_id') or 0, slot),
+            [0, *(ZERO for _ in TRANSACTION_SUMS)]
+        )
+        totals[0] += sign
+        for index, name in enumerate(TRANSACTION_SUMS, 1):
+            totals[index] += sign * to_decimal(_value(row, name))
+
+    now = datetime.utcnow()
+    # Urutan key tetap supaya dua posting tidak saling deadlock
+    for (bucket_start, agent_id, slot), (count, *sums) in sorted(deltas.items()):
+        upsert_increment(
+            _table,
+            {
+                'bucket_start': bucket_start,
+                'agent_profile_id': agent_id,
+                'slot': slot,
+                'transaction_count': count,
+                **dict(zip(TRANSACTION_SUMS, sums)),
+                'updated_at': now,
+            },
+            key_columns=('bucket_start', 'agent_profile_id', 'slot'),
+            increment_columns=('transaction_count', *TRANSACTION_SUMS),
+            set_columns=('updated_at',)
+        )
+
+def _hour_bucket(column):
+    if db.session.get_bind().dialect.name == 'mysql':
+        return func.date_format(column, '%Y-%m-%d %H:00:00')
+    # Format teks DateTime SQLAlchemy di SQLite (supaya perbandingan string tetap benar)
+    return func.strftime('%Y-%m-%d %H:00:00.000000', column)
+
+def rebuild_hourly_rollup():
+    """Hitung ulang seluruh rollup dari transactions, termasuk tabel arsip (caller yang commit)"""
+    source = partitioned_entity(Transaction)
+    bucket = _hour_bucket(source.created_at)
+    agent = func.coalesce(source.agent_profile_id, 0)
+    db.session.execute(delete(_table))
+    db.session.execute(insert(_table).from_select(
+        ['bucket_start', 'agent_profile_id', 'slot', 'transaction_count', *TRANSACTION_SUMS, 'updated_at'],
+        select(
+            bucket, agent, literal(0), func.count(source.id),
+            *(func.coalesce(func.sum(getattr(source, name)), 0) for name in TRANSACTION_SUMS),
+            literal(datetime.utcnow())
+        )
+        .where(source.created_at.isnot(None))
+        .group_by(bucket, agent)
+    ))
+
+REFRESH_CHUNK_BUCKETS = 200
+
+def _parse_bucket(value):
+    # _hour_bucket() menghasilkan teks di MySQL dan SQLite
+    return value if isinstance(value, datetime) else datetime.strptime(str(value)[:19], '%Y-%m-%d %H:%M:%S')
+
+def _buckets_where(*criteria):
+    """{(bucket_start, agent_profile_id)} transaksi (tabel utama) yang cocok dengan criteria"""
+    bucket = _hour_bucket(Transaction.created_at)
+    rows = db.session.execute(
+        select(bucket, func.coalesce(Transaction.agent_profile_id, 0))
+        .where(Transaction.created_at.isnot(None), *criteria)
+        .distinct()
+    )
+    return {(_parse_bucket(start), agent_id) for start, agent_id in rows}
+
+def refresh_hourly_buckets(buckets):
+    """
+    Hitung ulang baris rollup untuk pasangan (bucket_start, agent_profile_id)
+    tertentu dari transactions, termasuk tabel arsip (caller yang commit)
+    """
+    buckets = sorted(buckets)
+    now = datetime.utcnow()
+    for index in range(0, len(buckets), REFRESH_CHUNK_BUCKETS):
+        chunk = buckets[index:index + REFRESH_CHUNK_BUCKETS]
+        source = partitioned_entity(Transaction, chunk[0][0], max(start for start, _ in chunk) + timedelta(hours=1))
+        agent = func.coalesce(source.agent_profile_id, 0)
+        bucket = _hour_bucket(source.created_at)
+        db.session.execute(delete(_table).where(or_(*(
+            and_(_table.c.bucket_start == start, _table.c.agent_profile_id == agent_id) for start, agent_id in chunk
+        ))))
+        db.session.execute(insert(_table).from_select(
+            ['bucket_start', 'agent_profile_id', 'slot', 'transaction_count', *TRANSACTION_SUMS, 'updated_at'],
+            select(
+                bucket, agent, literal(0), func.count(source.id),
+                *(func.coalesce(func.sum(getattr(source, name)), 0) for name in TRANSACTION_SUMS),
+                literal(now)
+            )
+            .where(or_(*(
+                and_(
+                    source.created_at >= start,
+                    source.created_at < start + timedelta(hours=1),
+                    agent == agent_id
+                )
+                for start, agent_id in chunk
+            )))
+            .group_by(bucket, agent)
+        ))
+
+def ensure_hourly_rollup():
+    """Isi rollup sekali dari data lama jika tabelnya masih kosong (rebuild_hourly_rollup.py)"""
+    if db.session.execute(select(_table.c.id).limit(1)).first() is not None:
+        return
+    if db.session.execute(select(Transaction.id).limit(1)).first() is None:
+        return
+    rebuild_hourly_rollup()
+    db.session.commit()
+
+def _old_values(obj):
+    """Nilai kolom rollup sebelum perubahan, atau None jika tidak ada yang berubah"""
+    state = inspect(obj)
+    values = {'user_id': obj.user_id}
+    changed = False
+    for name in ROLLUP_COLUMNS:
+        history = state.attrs[name].history
+        if history.deleted:
+            values[name] = history.deleted[0]
+            changed = True
+        else:
+            values[name] = getattr(obj, name)
+    return values if changed else None
+
+@event.listens_for(Session, 'after_flush')
+def _record_orm_changes(session, flush_context):
+    if not has_app_context():
+        return
+    added, removed = [], []
+    for obj in session.new:
+        if isinstance(obj, Transaction):
+            added.append(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Transaction):
+            removed.append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, Transaction):
+            old = _old_values(obj)
+            if old is not None:
+                removed.append(old)
+                added.append(obj)
+    if removed:
+        record_transactions(removed, sign=-1)
+    if added:
+        record_transactions(added)
+
+@event.listens_for(Session, 'do_orm_execute')
+def _record_bulk_changes(orm_execute_state):
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ is not Transaction or not has_app_context():
+        return None
+    if orm_execute_state.is_insert:
+        # insert(Transaction) dengan list parameter; INSERT .values() dicatat pemanggilnya
+        parameters = orm_execute_state.parameters
+        if not parameters:
+            return None
+        rows = parameters if orm_execute_state.is_executemany else [parameters]
+        # created_at diisi di sini supaya rollup memakai jam yang sama dengan barisnya
+        now = datetime.utcnow()
+        stamps = [{'created_at': row.get('created_at') or now} for row in rows]
+        result = orm_execute_state.invoke_statement(
+            params=stamps if orm_execute_state.is_executemany else stamps[0]
+        )
+        record_transactions([{**row, **stamp} for row, stamp in zip(rows, stamps)])
+        return result
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        if orm_execute_state.is_executemany:
+            # UPDATE per primary key dengan list parameter
+            criteria = Transaction.id.in_([row['id'] for row in orm_execute_state.parameters])
+        else:
+            criteria = orm_execute_state.statement.whereclause
+        if criteria is None:
+            result = orm_execute_state.invoke_statement()
+            rebuild_hourly_rollup()
+            return result
+
+        # Bucket baris yang terkena sebelum perubahan, dan sesudahnya untuk UPDATE
+        # (created_at / agent_profile_id bisa ikut berubah)
+        buckets = _buckets_where(criteria)
+        ids = []
+        if orm_execute_state.is_update:
+            ids = list(db.session.execute(select(Transaction.id).where(criteria)).scalars())
+        result = orm_execute_state.invoke_statement()
+        if ids:
+            buckets |= _buckets_where(Transaction.id.in_(ids))
+        refresh_hourly_buckets(buckets)
+        return result
+    return None
+
+def _fees(table):
+    return sum((getattr(table, name) for name in FEE_COLUMNS[1:]), getattr(table, FEE_COLUMNS[0]))
+
+def _rollup_by_hour(start, end, agent_id=None):
+    """Structured array (bucket_start, count, amount, fees) per jam di [start, end]"""
+    statement = select(
+        TransactionHourly.bucket_start,
+        func.sum(TransactionHourly.transaction_count),
+        cents(func.sum(TransactionHourly.amount)),
+        cents(func.sum(_fees(TransactionHourly)))
+    ).where(TransactionHourly.bucket_start.between(hour_start(start), end))
+    if agent_id is not None:
+        statement = statement.where(TransactionHourly.agent_profile_id == agent_id)
+    rows, = fetch_arrays([(
+        statement.group_by(TransactionHourly.bucket_start),
+        [('bucket_start', 'datetime64[us]'), ('count', np.int64), ('amount', np.int64), ('fees', np.int64)]
+    )])
+    return rows
+
+def _cells(index, size, rows, count=None):
+    """
+    Jumlah transaksi, amount dan fee (float) per sel 0..size-1, sel kosong = 0.
+    `count` = jumlah transaksi per baris (baris rollup); tanpa itu satu baris = satu transaksi.
+    """
+    columns = [rows['amount'], rows['fees']]
+    counts, sums = daily_series(index, size, columns if count is None else columns + [count])
+    if count is not None:
+        counts = sums[2]
+    return counts, sums[0] / 100, sums[1] / 100
+
+def heatmap(start, end, agent_id=None):
+    """Jumlah transaksi, amount dan fee per hari (Senin..Minggu) x jam (0..23) di [start, end]"""
+    rows = _rollup_by_hour(start, end, agent_id)
+    hours = rows['bucket_start'].astype('datetime64[h]')
+    days = hours.astype('datetime64[D]')
+    # 1970-01-01 hari Kamis: +3 supaya 0 = Senin
+    weekday = (days.astype(np.int64) + 3) % 7
+    hour = (hours - days).astype(np.int64)
+    counts, amount, fees = _cells(weekday * 24 + hour, 7 * 24, rows, count=rows['count'])
+    return {
+        'weekdays': list(WEEKDAYS),
+        'hours': list(range(24)),
+        'transaction_count': counts.reshape(7, 24).tolist(),
+        'amount': amount.reshape(7, 24).tolist(),
+        'fees': fees.reshape(7, 24).tolist()
+    }
+
+def intraday(day, interval, agent_id=None):
+    """Bucket `interval` menit (5, 15 atau 60) sepanjang tanggal `day`"""
+    start = datetime.combine(day, time.min)
+    end = start + timedelta(days=1) - timedelta(microseconds=1)
+    size = 24 * 60 // interval
+
+    if interval == 60:
+        rows = _rollup_by_hour(start, end, agent_id)
+        index = (rows['bucket_start'].astype('datetime64[h]') - np.datetime64(day, 'h')).astype(np.int64)
+        counts, amount, fees = _cells(index, size, rows, count=rows['count'])
+        source = 'rollup'
+    else:
+        transactions = partitioned_entity(Transaction, start, end)
+        statement = select(
+            transactions.created_at, cents(transactions.amount), cents(_fees(transactions))
+        ).where(transactions.created_at.between(start, end))
+        if agent_id is not None:
+            statement = statement.where(transactions.agent_profile_id == agent_id)
+        rows, = fetch_arrays([(
+            statement, [('created_at', 'datetime64[us]'), ('amount', np.int64), ('fees', np.int64)]
+        )])
+        minutes = (rows['created_at'].astype('datetime64[m]') - np.datetime64(day, 'm')).astype(np.int64)
+        counts, amount, fees = _cells(minutes // interval, size, rows)
+        source = 'transactions'
+
+    offsets = np.arange(size) * interval
+    return {
+        'interval_minutes': interval,
+        'source': source,
+        'buckets': [
+            {
+                'time': f'{offset // 60:02d}:{offset % 60:02d}',
+                'transaction_count': count,
+                'amount': total,
+                'fees': fee
+            }
+            for offset, count, total, fee in zip(offsets.tolist(), counts.tolist(), amount.tolist(), fees.tolist())
+        ]
+    }
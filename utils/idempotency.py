@@ -0,0 +1,262 @@
+"""
+Idempotency-Key support untuk endpoint POST yang membuat data.
+
+Request pertama dengan key tertentu "mengklaim" key tersebut (status
+in_progress), menjalankan handler, lalu menyimpan response yang sudah
+di-commit. Request ulang dengan key yang sama mendapat response tersimpan
+tanpa menjalankan handler lagi (tidak ada lookup fee atau update saldo
+ulang). Request duplikat yang datang bersamaan menunggu request pertama
+selesai alih-alih ikut berjalan.
+
+Key store memakai koneksi terpisah (bukan db.session, dari pool yang sama
+dengan request) supaya klaim dan hasilnya langsung ter-commit, terlepas
+dari transaksi handler.
+
+Klaim in_progress yang lebih tua dari IDEMPOTENCY_LOCK_SECONDS dianggap
+ditinggal dan boleh diambil alih request lain. Supaya pengambilalihan itu
+tidak pernah menghasilkan data ganda, commit bisnis handler dipagari di
+transaksi DB yang sama (listener before_commit): baris key milik klaim ini
+di-UPDATE menjadi 'committed'. Jika klaimnya sudah diambil alih (baris
+dengan id itu hilang), commit dibatalkan dan request mendapat 409.
+Sebaliknya baris 'committed' tidak pernah diambil alih: jika proses mati
+sebelum response sempat disimpan, retry mendapat 409
+IDEMPOTENCY_RESPONSE_UNAVAILABLE, bukan eksekusi ulang.
+"""
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import request, current_app, make_response
+from sqlalchemy import select, insert, update, delete, event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from utils.db_pools import pool_engine
+from models.user import db
+from models.idempotency_key import IdempotencyKey
+from utils.response import error_response
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+_table = IdempotencyKey.__table__
+_events_lock = threading.Lock()
+_events = {}
+
+STATUS_IN_PROGRESS = 'in_progress'
+STATUS_COMMITTED = 'committed'
+STATUS_COMPLETED = 'completed'
+
+class IdempotencyClaimLost(Exception):
+    """Klaim Idempotency-Key sudah diambil alih request lain sebelum handler commit"""
+    pass
+
+def _wait_for_owner(identity, timeout):
+    """
+    Tunggu request pemilik klaim di proses ini selesai (maksimal `timeout`).
+    Event dibuat per identity dan dihitung jumlah penunggunya; penunggu
+    terakhir menghapusnya, termasuk jika pemiliknya ada di proses lain atau
+    sudah selesai sebelum penunggu mendaftar.
+    """
+    with _events_lock:
+        entry = _events.get(identity)
+        if entry is None:
+            entry = _events[identity] = [threading.Event(), 0]
+        entry[1] += 1
+    try:
+        entry[0].wait(timeout)
+    finally:
+        with _events_lock:
+            entry[1] -= 1
+            if entry[1] == 0 and _events.get(identity) is entry:
+                del _events[identity]
+
+def _notify(identity):
+    with _events_lock:
+        entry = _events.pop(identity, None)
+    if entry is not None:
+        entry[0].set()
+
+def _request_hash():
+    return hashlib.sha256(request.get_data()).hexdigest()
+
+def _where(user_id, scope, key):
+    return (
+        _table.c.user_id == user_id,
+        _table.c.scope == scope,
+        _table.c.idempotency_key == key,
+    )
+
+def _claim(user_id, scope, key, request_hash):
+    """
+    Coba klaim key.
+
+    Returns:
+        (claim_id, None) jika berhasil (request ini yang menjalankan
+        handler), atau (None, row) jika key sudah diklaim request lain
+    """
+    now = datetime.utcnow()
+    ttl = timedelta(hours=current_app.config.get('IDEMPOTENCY_KEY_TTL_HOURS', 24))
+    lock_timeout = timedelta(seconds=current_app.config.get('IDEMPOTENCY_LOCK_SECONDS', 60))
+
+    with pool_engine().begin() as conn:
+        # Key kedaluwarsa milik user ini, dan klaim yang ditinggal proses yang mati
+        conn.execute(delete(_table).where(_table.c.user_id == user_id, _table.c.expires_at < now))
+        conn.execute(delete(_table).where(
+            *_where(user_id, scope, key),
+            _table.c.status == STATUS_IN_PROGRESS,
+            _table.c.created_at < now - lock_timeout
+        ))
+
+    try:
+        with pool_engine().begin() as conn:
+            result = conn.execute(insert(_table).values(
+                idempotency_key=key,
+                user_id=user_id,
+                scope=scope,
+                request_hash=request_hash,
+                status=STATUS_IN_PROGRESS,
+                created_at=now,
+                expires_at=now + ttl
+            ))
+        return result.inserted_primary_key[0], None
+    except IntegrityError:
+        with pool_engine().connect() as conn:
+            existing = conn.execute(select(_table).where(*_where(user_id, scope, key))).first()
+        # Row bisa hilang lagi (pemilik gagal dan melepas key): coba klaim ulang
+        return (None, existing) if existing is not None else _claim(user_id, scope, key, request_hash)
+
+def _load(user_id, scope, key):
+    with pool_engine().connect() as conn:
+        return conn.execute(select(_table).where(*_where(user_id, scope, key))).first()
+
+def _complete(claim_id, response):
+    with pool_engine().begin() as conn:
+        conn.execute(update(_table).where(_table.c.id == claim_id).values(
+            status=STATUS_COMPLETED,
+            response_status=response.status_code,
+            response_body=response.get_data(as_text=True)
+        ))
+
+def _release(claim_id):
+    """Lepas klaim yang belum meng-commit data bisnis (retry boleh menjalankan ulang)"""
+    with pool_engine().begin() as conn:
+        conn.execute(delete(_table).where(_table.c.id == claim_id, _table.c.status == STATUS_IN_PROGRESS))
+
+@event.listens_for(Session, 'before_commit')
+def _fence_business_commit(session):
+    """Tandai klaim 'committed' di transaksi yang sama dengan data bisnis handler"""
+    claim_id = session.info.get('idempotency_claim')
+    if claim_id is None:
+        return
+    # Id baris ikut dicocokkan: klaim yang diambil alih punya baris baru
+    result = session.execute(
+        update(_table)
+        .where(_table.c.id == claim_id, _table.c.status.in_((STATUS_IN_PROGRESS, STATUS_COMMITTED)))
+        .values(status=STATUS_COMMITTED)
+    )
+    if result.rowcount == 0:
+        session.info['idempotency_claim_lost'] = True
+        raise IdempotencyClaimLost('Klaim Idempotency-Key sudah diambil alih request lain')
+
+def _replay(row):
+    response = current_app.response_class(
+        row.response_body,
+        status=row.response_status,
+        mimetype='application/json'
+    )
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def in_progress_response():
+    return error_response(
+        message='Request dengan Idempotency-Key ini masih diproses',
+        error='IDEMPOTENCY_IN_PROGRESS',
+        status_code=409
+    )
+
+def idempotent(scope):
+    """
+    Decorator untuk POST endpoint (dipasang di bawah @token_required).
+
+    Tanpa header Idempotency-Key handler berjalan seperti biasa. Dengan
+    header, hasil request pertama yang berhasil (status < 500) disimpan
+    selama IDEMPOTENCY_KEY_TTL_HOURS dan dikembalikan untuk request ulang.
+    Handler yang sudah commit tidak pernah dijalankan ulang, termasuk jika
+    response-nya 5xx.
+
+    Args:
+        scope: Nama endpoint, key hanya unik per (user, scope)
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER, '').strip()
+            if not key:
+                return f(*args, **kwargs)
+
+            if len(key) > 255:
+                return error_response(
+                    message='Idempotency-Key maksimal 255 karakter',
+                    error='INVALID_IDEMPOTENCY_KEY',
+                    status_code=400
+                )
+
+            user_id = request.user_id
+            request_hash = _request_hash()
+            identity = (user_id, scope, key)
+            wait_seconds = current_app.config.get('IDEMPOTENCY_WAIT_SECONDS', 10)
+            deadline = time.monotonic() + wait_seconds
+
+            claim_id, existing = _claim(user_id, scope, key, request_hash)
+            while existing is not None:
+                if existing.request_hash != request_hash:
+                    return error_response(
+                        message='Idempotency-Key sudah dipakai untuk request dengan isi berbeda',
+                        error='IDEMPOTENCY_KEY_REUSED',
+                        status_code=422
+                    )
+                if existing.status == STATUS_COMPLETED:
+                    return _replay(existing)
+                if time.monotonic() >= deadline:
+                    if existing.status == STATUS_COMMITTED:
+                        return error_response(
+                            message='Request dengan Idempotency-Key ini sudah diproses tetapi response-nya tidak tersimpan. '
+                                    'Cek data terbaru sebelum mengirim ulang dengan key baru',
+                            error='IDEMPOTENCY_RESPONSE_UNAVAILABLE',
+                            status_code=409
+                        )
+                    return in_progress_response()
+
+                # Tunggu request pertama: event in-process, atau polling DB untuk proses lain
+                _wait_for_owner(identity, 0.2)
+                existing = _load(user_id, scope, key)
+                if existing is None:
+                    claim_id, existing = _claim(user_id, scope, key, request_hash)
+
+            session = db.session()
+            session.info['idempotency_claim'] = claim_id
+            try:
+                response = make_response(f(*args, **kwargs))
+            except Exception:
+                _release(claim_id)
+                _notify(identity)
+                raise
+            finally:
+                session.info.pop('idempotency_claim', None)
+                claim_lost = session.info.pop('idempotency_claim_lost', False)
+
+            if claim_lost:
+                # Commit handler dibatalkan; request pemilik klaim baru yang menentukan hasilnya
+                _notify(identity)
+                return in_progress_response()
+            if response.status_code < 500:
+                _complete(claim_id, response)
+            else:
+                # Error server tidak disimpan supaya retry bisa menjalankan ulang
+                # (kecuali data bisnis sudah ter-commit: klaim tetap 'committed')
+                _release(claim_id)
+            _notify(identity)
+            return response
+
+        return decorated
+    return decorator
@@ -0,0 +1,90 @@
+"""
+Fast JSON provider untuk Flask.
+
+Memakai orjson bila terpasang (fallback ke json standar) dan meng-encode
+Decimal, datetime/date/time, SQLAlchemy Row serta scalar/array NumPy secara
+langsung, sehingga data dari database tidak perlu dikonversi manual per
+field sebelum dikirim. Provider 'default' (JSON_PROVIDER=default) memakai
+hook encode yang sama, jadi tipe di response tidak bergantung config.
+"""
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy.engine import Row
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson optional
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy optional
+    np = None
+
+def _default(obj):
+    """Encode tipe yang tidak didukung native oleh encoder"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, Row):
+        return obj._asdict()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if np is not None and isinstance(obj, (np.generic, np.ndarray)):
+        return obj.tolist()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+class StandardJSONProvider(DefaultJSONProvider):
+    """JSON provider bawaan Flask dengan hook encode yang sama dengan FastJSONProvider"""
+    default = staticmethod(_default)
+
+class FastJSONProvider(StandardJSONProvider):
+    """JSON provider berbasis orjson dengan fallback ke json standar"""
+
+    def _orjson_options(self, pretty=False):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if pretty:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps_bytes(self, obj, pretty=False):
+        """Serialize obj langsung ke bytes UTF-8"""
+        if orjson is not None:
+            return orjson.dumps(obj, default=_default, option=self._orjson_options(pretty))
+        return self.dumps(obj, indent=2 if pretty else None).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.dumps(obj, default=_default, option=self._orjson_options()).decode('utf-8')
+        kwargs.setdefault('default', _default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(
+            self.dumps_bytes(obj, pretty=pretty) + b'\n',
+            mimetype=self.mimetype
+        )
+
+JSON_PROVIDERS = {
+    'default': StandardJSONProvider,
+    'fast': FastJSONProvider,
+}
+
+def init_json_provider(app):
+    """Pasang JSON provider sesuai config JSON_PROVIDER (fast/default)"""
+    provider_class = JSON_PROVIDERS.get(app.config.get('JSON_PROVIDER', 'fast'), FastJSONProvider)
+    app.json = provider_class(app)
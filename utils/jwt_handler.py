@@ -2,24 +2,39 @@ import jwt
 import os
 from datetime import datetime, timedelta
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, current_app, has_app_context
 from models.user import TokenBlacklist
+from utils.token_version import check_token_version
 
 SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-here')
+TOKEN_EXPIRES_HOURS = 24
 
-def generate_token(user_id, user_email, expires_in_hours=24):
-    """Generate JWT token"""
+def generate_token(user_id, user_email, expires_in_hours=TOKEN_EXPIRES_HOURS, role=None, agent_profile_id=None, token_version=0):
+    """Generate JWT token (role dan agent_profile_id ikut sebagai claim jika diberikan)"""
     payload = {
         'user_id': user_id,
         'email': user_email,
         'iat': datetime.utcnow(),
-        'exp': datetime.utcnow() + timedelta(hours=expires_in_hours)
+        'exp': datetime.utcnow() + timedelta(hours=expires_in_hours),
+        'ver': token_version
     }
+    if role is not None:
+        payload['role'] = role
+        payload['agent_profile_id'] = agent_profile_id
     token = jwt.encode(payload, SECRET_KEY, algorithm='HS256')
     return token
 
+def _token_cache():
+    return current_app.extensions.get('token_cache') if has_app_context() else None
+
 def verify_token(token):
-    """Verify JWT token"""
+    """Verify JWT token (hasil verifikasi di-cache sebentar, lihat utils/token_cache.py)"""
+    cache = _token_cache()
+    if cache is not None:
+        payload = cache.get(token)
+        if payload is not None:
+            check_token_version(payload)
+            return payload
     try:
         # Check if token is blacklisted
         blacklisted = TokenBlacklist.query.filter_by(token=token).first()
@@ -27,12 +42,21 @@ def verify_token(token):
             raise ValueError('Token sudah logout')
         
         payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+        check_token_version(payload)
+        if cache is not None:
+            cache.put(token, payload)
         return payload
     except jwt.ExpiredSignatureError:
         raise ValueError('Token sudah expired')
     except jwt.InvalidTokenError:
         raise ValueError('Token tidak valid')
 
+def forget_verified_token(token):
+    """Buang token dari cache verifikasi (setelah token di-blacklist)"""
+    cache = _token_cache()
+    if cache is not None:
+        cache.forget(token)
+
 def token_required(f):
     """Decorator untuk protect endpoints"""
     @wraps(f)
@@ -62,6 +86,7 @@ def token_required(f):
             payload = verify_token(token)
             request.user_id = payload['user_id']
             request.user_email = payload['email']
+            request.token_payload = payload
         except ValueError as e:
             return jsonify({
                 'success': False,
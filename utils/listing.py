@@ -0,0 +1,217 @@
+"""
+Read path ringan untuk endpoint listing.
+
+Daripada memuat objek ORM penuh (identity map, state tracking) lalu
+memanggil to_dict(), `ListingSpec` menjalankan Core select() untuk kolom
+yang dibutuhkan saja dan memetakan tuple hasil query langsung ke dict
+lewat serializer yang sudah dikompilasi sekali per spec. Output identik
+dengan to_dict() model yang bersangkutan.
+
+Client bisa meminta sebagian field saja lewat `?fields=id,amount,...`;
+hanya kolom tersebut yang di-select dan di-serialize. Field saldo yang
+punya slot (balance sharding) tetap butuh id baris untuk menjumlahkan
+slotnya, jadi id selalu ikut di-select dan dibuang lagi dari output jika
+tidak diminta.
+"""
+from sqlalchemy import select, Numeric, DateTime
+from models.user import db, User
+from models.edc_machine import EdcMachine
+from utils.validators import ValidationError
+from models.transaction import Transaction
+from models.cash_flow import CashFlow
+from utils.balance_slots import KIND_EDC, with_pending
+
+def _money(value):
+    return float(value) if value else 0.00
+
+def _timestamp(value):
+    return value.isoformat() if value else None
+
+def _converter_for(column):
+    if isinstance(column.type, Numeric):
+        return _money
+    if isinstance(column.type, DateTime):
+        return _timestamp
+    return None
+
+class ListingSpec:
+    """
+    Definisi listing untuk satu model: kolom yang di-select dan cara
+    serialisasinya.
+
+    Args:
+        model: Model SQLAlchemy sumber data
+        fields: Urutan nama kolom yang dikirim ke client
+        computed: {nama_field: (kolom_dependensi, fungsi(dict) -> value)}
+        pending: {nama_field_saldo: kind} untuk saldo yang ditambah slot
+            balance_slots (lihat utils.balance_slots.with_pending)
+    """
+    __slots__ = (
+        'model', 'fields', 'computed', 'pending', 'columns',
+        '_steps', '_computed_steps', '_output_keys', '_subsets'
+    )
+
+    def __init__(self, model, fields, computed=None, pending=None):
+        self.model = model
+        self.fields = tuple(fields)
+        self.computed = dict(computed or {})
+        self.pending = {name: kind for name, kind in (pending or {}).items() if name in self.fields}
+
+        # Kolom yang perlu di-select: field biasa + dependensi computed field
+        # + id untuk menjumlahkan slot saldo
+        select_names = list(self.fields)
+        for dependencies, _ in self.computed.values():
+            for name in dependencies:
+                if name not in select_names:
+                    select_names.append(name)
+        if self.pending and 'id' not in select_names:
+            select_names.append('id')
+
+        table = model.__table__
+        self.columns = tuple(table.c[name] for name in select_names)
+        self._steps = tuple(
+            (name, index, _converter_for(column))
+            for index, (name, column) in enumerate(zip(select_names, self.columns))
+        )
+        self._computed_steps = tuple(
+            (name, function) for name, (_, function) in self.computed.items()
+        )
+        # Kolom yang hanya dipakai sebagai dependensi computed field dibuang dari output
+        if len(select_names) > len(self.fields):
+            self._output_keys = (*self.fields, *self.computed)
+        else:
+            self._output_keys = None
+        self._subsets = {}
+
+    @property
+    def available_fields(self):
+        return (*self.fields, *self.computed)
+
+    def only(self, names):
+        """
+        Spec baru yang hanya berisi field `names` (urutan mengikuti spec asli).
+        Hasil di-cache per kombinasi field.
+
+        Raises:
+            ValidationError: Jika ada nama field yang tidak dikenal
+        """
+        key = frozenset(names)
+        subset = self._subsets.get(key)
+        if subset is not None:
+            return subset
+
+        unknown = sorted(key.difference(self.available_fields))
+        if unknown:
+            raise ValidationError(
+                f'Field tidak dikenal: {", ".join(unknown)}. '
+                f'Field yang tersedia: {", ".join(self.available_fields)}'
+            )
+
+        subset = ListingSpec(
+            self.model,
+            fields=[name for name in self.fields if name in key],
+            computed={name: spec for name, spec in self.computed.items() if name in key},
+            pending=self.pending
+        )
+        if len(self._subsets) < 256:
+            self._subsets[key] = subset
+        return subset
+
+    def from_request(self, request_obj):
+        """Spec sesuai parameter `fields` (comma separated); tanpa parameter = semua field"""
+        fields_param = request_obj.args.get('fields')
+        if not fields_param:
+            return self
+        names = [name.strip() for name in fields_param.split(',') if name.strip()]
+        if not names:
+            return self
+        return self.only(names)
+
+    def select(self, source=None):
+        """
+        Core select() untuk kolom spec ini.
+
+        Args:
+            source: Entity pengganti model (misalnya hasil partitioned_entity())
+        """
+        if source is None or source is self.model:
+            return select(*self.columns)
+        return select(*(getattr(source, column.name) for column in self.columns))
+
+    def _build(self, row):
+        data = {}
+        for name, index, convert in self._steps:
+            value = row[index]
+            data[name] = convert(value) if convert is not None else value
+        for name, function in self._computed_steps:
+            data[name] = function(data)
+        return data
+
+    def _strip(self, data):
+        if self._output_keys is not None:
+            data = {key: data[key] for key in self._output_keys}
+        return data
+
+    def serialize(self, row):
+        """Satu baris ke dict (tanpa saldo slot; pakai fetch() untuk field pending)"""
+        return self._strip(self._build(row))
+
+    def fetch(self, statement):
+        """Eksekusi statement (hasil dari select()) dan serialize semua baris"""
+        if not self.pending:
+            serialize = self.serialize
+            return [serialize(row) for row in db.session.execute(statement)]
+
+        items = [self._build(row) for row in db.session.execute(statement)]
+        for field, kind in self.pending.items():
+            with_pending(kind, items, field)
+        return [self._strip(item) for item in items]
+
+def _total_received(data):
+    return data['amount'] + data['service_fee'] + data['bank_fee'] + data['extra_fee']
+
+def _agent_profile_id(data):
+    return data['agent_profile_id']
+
+# Sama dengan Transaction.to_dict()
+TRANSACTION_LISTING = ListingSpec(
+    Transaction,
+    fields=(
+        'id', 'transaction_number', 'edc_machine_id', 'service_id', 'agent_profile_id',
+        'user_id', 'cashier_name', 'customer_name', 'target_number', 'reference_number',
+        'amount', 'service_fee', 'bank_fee', 'extra_fee', 'net_profit',
+        'created_at', 'updated_at'
+    ),
+    computed={
+        'total_received': (('amount', 'service_fee', 'bank_fee', 'extra_fee'), _total_received)
+    }
+)
+
+# Sama dengan CashFlow.to_dict()
+CASH_FLOW_LISTING = ListingSpec(
+    CashFlow,
+    fields=(
+        'id', 'agent_profile_id', 'user_id', 'type', 'source', 'amount',
+        'description', 'created_at', 'updated_at'
+    )
+)
+
+# Sama dengan EdcMachine.to_dict()
+EDC_MACHINE_LISTING = ListingSpec(
+    EdcMachine,
+    fields=(
+        'id', 'agent_profile_id', 'name', 'bank_name', 'account_number', 'saldo',
+        'status', 'created_at', 'updated_at'
+    ),
+    pending={'saldo': KIND_EDC}
+)
+
+# Sama dengan User.to_dict(), ditambah agent_profile berisi agent_profile_id
+# (route mengganti id tersebut dengan profil agent-nya)
+USER_LISTING = ListingSpec(
+    User,
+    fields=('id', 'name', 'email', 'role', 'status', 'created_at', 'updated_at'),
+    computed={
+        'agent_profile': (('agent_profile_id',), _agent_profile_id)
+    }
+)
@@ -0,0 +1,123 @@
+"""
+Ringkasan owner multi-outlet (GET /api/owners/me/overview).
+
+Setiap angka dihitung dengan query ber-GROUP BY agent_profile_id untuk
+semua outlet owner sekaligus (filter subquery agent_profiles.owner_id),
+jadi jumlah query tetap berapa pun banyaknya outlet:
+
+- outlet + saldo tunai (agent_profiles.total_balance + slot)
+- jumlah EDC dan saldo EDC per outlet (+ slot)
+- transaksi dan fee per outlet: hari tertutup dari cache laporan
+  (grup by_agent, dipakai bersama GET /api/reports), hari berjalan dari
+  database dengan index agent_profile_id
+
+Query saldo dijalankan paralel (utils/report_runner.py).
+"""
+from flask import current_app
+from sqlalchemy import select, func
+from models.user import db
+from models.agent_profile import AgentProfile
+from models.edc_machine import EdcMachine
+from models.balance_slot import BalanceSlot
+from models.transaction import Transaction
+from utils.balance_slots import KIND_AGENT, KIND_EDC, sharding_enabled
+from utils.partitioning import partitioned_entity
+from utils.report_engine import ENGINE_SQL, cached_report_parts
+from utils.report_parts import ZERO, TRANSACTION_SUMS, AGENT_FIELDS, ReportParts, to_decimal
+from utils.report_runner import report_runner
+
+def _owner_outlets(owner_id):
+    return select(AgentProfile.id).where(AgentProfile.owner_id == owner_id)
+
+def outlet_parts(owner_id, start, end):
+    """ReportParts (grup by_agent saja) untuk outlet milik owner_id, created_at di [start, end]"""
+    transactions = partitioned_entity(Transaction, start, end)
+    parts = ReportParts()
+    parts.add_rows('by_agent', db.session.execute(
+        select(
+            transactions.agent_profile_id,
+            func.count(transactions.id),
+            *(func.sum(getattr(transactions, name)) for name in TRANSACTION_SUMS)
+        )
+        .where(transactions.agent_profile_id.in_(_owner_outlets(owner_id)), transactions.created_at.between(start, end))
+        .group_by(transactions.agent_profile_id)
+    ), AGENT_FIELDS)
+    return parts
+
+def _balance_statements(owner_id):
+    outlets = _owner_outlets(owner_id)
+    statements = [
+        select(AgentProfile.id, AgentProfile.agent_name, AgentProfile.total_balance)
+        .where(AgentProfile.owner_id == owner_id),
+        select(EdcMachine.agent_profile_id, func.count(EdcMachine.id), func.sum(EdcMachine.saldo))
+        .where(EdcMachine.agent_profile_id.in_(outlets))
+        .group_by(EdcMachine.agent_profile_id),
+    ]
+    if sharding_enabled():
+        statements += [
+            select(BalanceSlot.owner_id, func.sum(BalanceSlot.amount))
+            .where(BalanceSlot.kind == KIND_AGENT, BalanceSlot.owner_id.in_(outlets))
+            .group_by(BalanceSlot.owner_id),
+            select(EdcMachine.agent_profile_id, func.sum(BalanceSlot.amount))
+            .join(BalanceSlot, (BalanceSlot.kind == KIND_EDC) & (BalanceSlot.owner_id == EdcMachine.id))
+            .where(EdcMachine.agent_profile_id.in_(outlets))
+            .group_by(EdcMachine.agent_profile_id),
+        ]
+    return statements
+
+def _kpis(count, sums, balance, edc_count, edc_saldo):
+    fees = sums['service_fee'] + sums['bank_fee'] + sums['extra_fee']
+    return {
+        'transaction_count': count,
+        'revenue': float(sums['amount']),
+        'service_fee': float(sums['service_fee']),
+        'bank_fee': float(sums['bank_fee']),
+        'extra_fee': float(sums['extra_fee']),
+        'total_fees': float(fees),
+        'net_profit': float(sums['net_profit']),
+        'balance': float(balance),
+        'edc_count': edc_count,
+        'edc_saldo': float(edc_saldo)
+    }
+
+def owner_overview(owner_id, start, end):
+    """KPI per outlet dan gabungan untuk semua outlet milik owner_id"""
+    with report_runner().budget():
+        outlets, machines, *pending = report_runner().run(_balance_statements(owner_id))
+        parts = cached_report_parts(
+            start, end, daily=False, engine=current_app.config.get('REPORT_ENGINE', ENGINE_SQL),
+            live=lambda live_start, live_end: outlet_parts(owner_id, live_start, live_end)
+        )
+    agent_pending, edc_pending = (dict(rows) for rows in pending) if pending else ({}, {})
+    machines = {agent_id: (count, saldo) for agent_id, count, saldo in machines}
+
+    total_count, total_edc_count = 0, 0
+    total_sums = dict.fromkeys(TRANSACTION_SUMS, ZERO)
+    total_balance, total_edc_saldo = ZERO, ZERO
+    rows = []
+    for agent_id, agent_name, balance in outlets:
+        count, *values = parts.by_agent.get(agent_id, (0, *(ZERO for _ in TRANSACTION_SUMS)))
+        sums = dict(zip(TRANSACTION_SUMS, values))
+        balance = to_decimal(balance) + to_decimal(agent_pending.get(agent_id))
+        edc_count, edc_saldo = machines.get(agent_id, (0, None))
+        edc_saldo = to_decimal(edc_saldo) + to_decimal(edc_pending.get(agent_id))
+
+        total_count += count
+        for name in TRANSACTION_SUMS:
+            total_sums[name] += sums[name]
+        total_balance += balance
+        total_edc_count += edc_count
+        total_edc_saldo += edc_saldo
+        rows.append({
+            'agent_profile_id': agent_id,
+            'agent_name': agent_name,
+            **_kpis(count, sums, balance, edc_count, edc_saldo)
+        })
+
+    return {
+        'consolidated': {
+            'outlet_count': len(rows),
+            **_kpis(total_count, total_sums, total_balance, total_edc_count, total_edc_saldo)
+        },
+        'outlets': sorted(rows, key=lambda row: (-row['revenue'], row['agent_name']))
+    }
@@ -0,0 +1,361 @@
+"""
+Partisi bulanan dan arsip untuk transactions dan cash_flows (MySQL).
+
+Kedua tabel ini terus bertambah, padahal query harian hanya menyentuh hari
+ini atau bulan ini. partition_tables.py memakai fungsi di sini untuk:
+
+- convert_to_partitioned(): ubah tabel menjadi PARTITION BY RANGE COLUMNS
+  (created_at), satu partisi per bulan (pYYYYMM) ditambah p_future untuk
+  sisa waktu. Syarat MySQL untuk tabel terpartisi: tidak ada foreign key dan
+  setiap unique key memuat kolom partisi. Karena itu foreign key dari/ke
+  tabel ini dibuang, primary key menjadi (id, created_at), unique key lain
+  (transaction_number) diperluas dengan created_at, dan created_at menjadi
+  DATETIME NOT NULL.
+- ensure_future_partitions(): pecah p_future supaya N bulan ke depan sudah
+  punya partisi sendiri (jalankan berkala, misalnya dari cron bulanan).
+- archive_old_partitions(): partisi yang lebih tua dari N bulan ditukar ke
+  tabel <tabel>_archive_YYYYMM (EXCHANGE PARTITION, tanpa menyalin data),
+  lalu partisinya di-drop. Setiap arsip dicatat di archived_partitions.
+
+Query laporan dan listing membaca lewat partitioned_entity(). Jika rentang
+waktunya tidak menyentuh bulan yang diarsip, hasilnya model biasa dan query
+tidak berubah. Jika menyentuh, model di-alias ke UNION ALL tabel live dan
+tabel arsip yang relevan, masing-masing sudah difilter rentang waktunya.
+
+Daftar arsip di-cache per proses. partition_tables.py berjalan di proses
+lain, jadi setiap request mengecek generasi katalog (COUNT dan MAX(id)
+archived_partitions, sekali per request) dan memuat ulang daftar jika
+berubah. Arsip dicatat sebelum EXCHANGE PARTITION, sehingga server sudah
+membaca tabel arsip sebelum baris dipindah ke sana.
+
+Baris yang sudah diarsip hanya bisa dibaca: find_archived() dipakai
+endpoint GET per id, sedangkan PUT/DELETE menolaknya (ARCHIVED).
+"""
+import threading
+from datetime import date, datetime
+from flask import g, has_app_context
+from sqlalchemy import Column, MetaData, Table, func, select, text, union_all
+from sqlalchemy.orm import aliased
+from models.user import db
+from models.transaction import Transaction
+from models.cash_flow import CashFlow
+from models.archived_partition import ArchivedPartition
+
+PARTITIONED_MODELS = {
+    Transaction.__tablename__: Transaction,
+    CashFlow.__tablename__: CashFlow,
+}
+FUTURE_PARTITION = 'p_future'
+
+_lock = threading.Lock()
+_catalog = {'generation': None, 'rows': ()}
+_archive_metadata = MetaData()
+
+class PartitioningError(Exception):
+    """Operasi partisi tidak bisa dijalankan"""
+    pass
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+def add_months(month, count):
+    years, month_index = divmod(month.month - 1 + count, 12)
+    return date(month.year + years, month_index + 1, 1)
+
+def partition_name(month):
+    return f'p{month:%Y%m}'
+
+def archive_table_name(table, month):
+    return f'{table}_archive_{month:%Y%m}'
+
+def _partition_month(name):
+    try:
+        return datetime.strptime(name[1:], '%Y%m').date() if name.startswith('p') else None
+    except ValueError:
+        return None
+
+def _partition_clause(month):
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN ('{add_months(month, 1):%Y-%m-%d}')"
+
+def _model_for(table):
+    model = PARTITIONED_MODELS.get(table)
+    if model is None:
+        raise PartitioningError(f'Tabel {table} tidak dipartisi. Pilihan: {", ".join(PARTITIONED_MODELS)}')
+    return model
+
+def _require_mysql(connection):
+    if connection.dialect.name != 'mysql':
+        raise PartitioningError(f'Partisi hanya didukung di MySQL (database: {connection.dialect.name})')
+
+def _partitions(connection, table):
+    """Nama partisi tabel sesuai urutan; list kosong jika belum dipartisi"""
+    rows = connection.execute(text(
+        'SELECT PARTITION_NAME FROM information_schema.PARTITIONS '
+        'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table '
+        'ORDER BY PARTITION_ORDINAL_POSITION'
+    ), {'table': table}).scalars().all()
+    return [name for name in rows if name is not None]
+
+def partition_status(connection, table):
+    """Partisi tabel beserta perkiraan jumlah baris"""
+    _require_mysql(connection)
+    _model_for(table)
+    rows = connection.execute(text(
+        'SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS FROM information_schema.PARTITIONS '
+        'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL '
+        'ORDER BY PARTITION_ORDINAL_POSITION'
+    ), {'table': table}).all()
+    return [
+        {'partition': name, 'less_than': description.strip("'"), 'rows': table_rows}
+        for name, description, table_rows in rows
+    ]
+
+def _drop_foreign_keys(connection, table):
+    """Buang foreign key milik tabel dan yang mereferensikan tabel"""
+    rows = connection.execute(text(
+        'SELECT TABLE_NAME, CONSTRAINT_NAME FROM information_schema.REFERENTIAL_CONSTRAINTS '
+        'WHERE CONSTRAINT_SCHEMA = DATABASE() AND (TABLE_NAME = :table OR REFERENCED_TABLE_NAME = :table)'
+    ), {'table': table}).all()
+    for owner_table, constraint in rows:
+        connection.execute(text(f'ALTER TABLE `{owner_table}` DROP FOREIGN KEY `{constraint}`'))
+    return [constraint for _, constraint in rows]
+
+def _unique_keys(connection, table):
+    rows = connection.execute(text(
+        'SELECT INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS '
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND NON_UNIQUE = 0 AND INDEX_NAME <> 'PRIMARY' "
+        'ORDER BY INDEX_NAME, SEQ_IN_INDEX'
+    ), {'table': table}).all()
+    keys = {}
+    for index_name, column in rows:
+        keys.setdefault(index_name, []).append(column)
+    return keys
+
+def convert_to_partitioned(connection, table, months_ahead=3):
+    """
+    Ubah tabel menjadi partisi bulanan pada created_at.
+
+    Returns:
+        dict: Ringkasan perubahan, atau None jika tabel sudah dipartisi
+    """
+    _require_mysql(connection)
+    _model_for(table)
+    if _partitions(connection, table):
+        return None
+
+    dropped_foreign_keys = _drop_foreign_keys(connection, table)
+    connection.execute(text(
+        f'UPDATE `{table}` SET created_at = COALESCE(updated_at, NOW()) WHERE created_at IS NULL'
+    ))
+
+    alterations = [
+        'MODIFY created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP',
+        'DROP PRIMARY KEY',
+        'ADD PRIMARY KEY (id, created_at)',
+    ]
+    widened_keys = []
+    for index_name, columns in _unique_keys(connection, table).items():
+        if 'created_at' in columns:
+            continue
+        column_list = ', '.join(f'`{column}`' for column in (*columns, 'created_at'))
+        alterations.append(f'DROP INDEX `{index_name}`')
+        alterations.append(f'ADD UNIQUE KEY `{index_name}` ({column_list})')
+        widened_keys.append(index_name)
+    connection.execute(text(f'ALTER TABLE `{table}` ' + ', '.join(alterations)))
+
+    first = connection.execute(text(f'SELECT MIN(created_at) FROM `{table}`')).scalar()
+    month = month_start(first or datetime.now())
+    last = add_months(month_start(datetime.now()), months_ahead)
+    clauses = []
+    while month <= last:
+        clauses.append(_partition_clause(month))
+        month = add_months(month, 1)
+    clauses.append(f'PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE)')
+    connection.execute(text(
+        f'ALTER TABLE `{table}` PARTITION BY RANGE COLUMNS(created_at) ({", ".join(clauses)})'
+    ))
+    return {
+        'table': table,
+        'partitions': len(clauses),
+        'dropped_foreign_keys': dropped_foreign_keys,
+        'widened_unique_keys': widened_keys,
+    }
+
+def ensure_future_partitions(connection, table, months_ahead=3):
+    """
+    Pastikan bulan ini sampai `months_ahead` bulan ke depan punya partisi.
+
+    Returns:
+        list: Nama partisi baru
+    """
+    _require_mysql(connection)
+    _model_for(table)
+    names = _partitions(connection, table)
+    if not names:
+        raise PartitioningError(f'Tabel {table} belum dipartisi, jalankan --convert dulu')
+    months = [month for month in map(_partition_month, names) if month is not None]
+    month = add_months(max(months), 1) if months else month_start(datetime.now())
+    last = add_months(month_start(datetime.now()), months_ahead)
+    new_months = []
+    while month <= last:
+        new_months.append(month)
+        month = add_months(month, 1)
+    if not new_months:
+        return []
+    clauses = [_partition_clause(month) for month in new_months]
+    clauses.append(f'PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE)')
+    connection.execute(text(
+        f'ALTER TABLE `{table}` REORGANIZE PARTITION {FUTURE_PARTITION} INTO ({", ".join(clauses)})'
+    ))
+    return [partition_name(month) for month in new_months]
+
+def archive_old_partitions(connection, table, keep_months):
+    """
+    Pindahkan partisi yang berakhir sebelum `keep_months` bulan terakhir ke
+    tabel arsip. Bulan berjalan selalu dipertahankan.
+
+    Arsip dicatat sebelum EXCHANGE PARTITION: baris selalu berada di salah
+    satu dari tabel live atau tabel arsip, dan query membaca keduanya, jadi
+    tidak ada saat di mana data hilang atau terhitung dua kali.
+
+    Returns:
+        list: ArchivedPartition.to_dict() untuk setiap partisi yang diarsip
+    """
+    _require_mysql(connection)
+    _model_for(table)
+    names = _partitions(connection, table)
+    if not names:
+        raise PartitioningError(f'Tabel {table} belum dipartisi, jalankan --convert dulu')
+    cutoff = add_months(month_start(datetime.now()), -max(keep_months, 1) + 1)
+    archived = []
+    for position, name in enumerate(names):
+        month = _partition_month(name)
+        if month is None or add_months(month, 1) > cutoff:
+            continue
+        archive_table = archive_table_name(table, month)
+        connection.execute(text(f'CREATE TABLE `{archive_table}` LIKE `{table}`'))
+        connection.execute(text(f'ALTER TABLE `{archive_table}` REMOVE PARTITIONING'))
+        record = ArchivedPartition(
+            table_name=table,
+            partition_name=name,
+            archive_table=archive_table,
+            # Partisi paling awal juga memuat semua baris yang lebih lama
+            period_start=month if position > 0 else None,
+            period_end=add_months(month, 1),
+            row_count=0
+        )
+        db.session.add(record)
+        db.session.commit()
+        connection.execute(text(f'ALTER TABLE `{table}` EXCHANGE PARTITION {name} WITH TABLE `{archive_table}`'))
+        connection.execute(text(f'ALTER TABLE `{table}` DROP PARTITION {name}'))
+        record.row_count = connection.execute(text(f'SELECT COUNT(*) FROM `{archive_table}`')).scalar()
+        db.session.commit()
+        archived.append(record.to_dict())
+    clear_archive_catalog()
+    return archived
+
+def clear_archive_catalog():
+    with _lock:
+        _catalog['generation'] = None
+    if has_app_context():
+        g.pop('archive_catalog_generation', None)
+
+def _catalog_generation():
+    """(jumlah, id terakhir) archived_partitions, dibaca sekali per request / app context"""
+    if has_app_context() and 'archive_catalog_generation' in g:
+        return g.archive_catalog_generation
+    generation = tuple(db.session.execute(
+        select(func.count(ArchivedPartition.id), func.max(ArchivedPartition.id))
+    ).one())
+    if has_app_context():
+        g.archive_catalog_generation = generation
+    return generation
+
+def _archives(table):
+    generation = _catalog_generation()
+    with _lock:
+        if _catalog['generation'] == generation:
+            return [row for row in _catalog['rows'] if row[0] == table]
+    rows = tuple(db.session.execute(
+        select(
+            ArchivedPartition.table_name,
+            ArchivedPartition.archive_table,
+            ArchivedPartition.period_start,
+            ArchivedPartition.period_end
+        ).order_by(ArchivedPartition.period_end)
+    ).all())
+    with _lock:
+        _catalog.update(generation=generation, rows=rows)
+    return [row for row in rows if row[0] == table]
+
+def _archive_table(model, name):
+    table = _archive_metadata.tables.get(name)
+    if table is None:
+        table = Table(
+            name, _archive_metadata,
+            *(Column(column.name, column.type) for column in model.__table__.columns)
+        )
+    return table
+
+def _range_select(model, table, start, end):
+    statement = select(*(table.c[column.name] for column in model.__table__.columns))
+    if start is not None:
+        statement = statement.where(table.c.created_at >= start)
+    if end is not None:
+        statement = statement.where(table.c.created_at <= end)
+    return statement
+
+def partitioned_entity(model, start=None, end=None):
+    """
+    Entity untuk membaca `model` (Transaction/CashFlow) pada rentang
+    created_at [start, end], termasuk data di tabel arsip.
+
+    Dipakai seperti model biasa: T = partitioned_entity(Transaction, start, end)
+    lalu T.amount, T.created_at, dst. Filter rentang waktu tetap perlu ditulis
+    di query pemanggil.
+    """
+    start_day = start.date() if isinstance(start, datetime) else start
+    end_day = end.date() if isinstance(end, datetime) else end
+    archives = [
+        archive_table for _, archive_table, period_start, period_end in _archives(model.__tablename__)
+        if (start_day is None or period_end > start_day)
+        and (end_day is None or period_start is None or period_start <= end_day)
+    ]
+    if not archives:
+        return model
+    source = union_all(
+        _range_select(model, model.__table__, start, end),
+        *(_range_select(model, _archive_table(model, name), start, end) for name in archives)
+    ).subquery(f'{model.__tablename__}_all')
+    return aliased(model, source, adapt_on_names=True)
+
+def find_archived(model, row_id):
+    """
+    Baris `model` dengan id `row_id` di tabel arsip (objek transient, hanya
+    untuk dibaca), atau None jika tidak ada yang diarsip.
+    """
+    archives = [archive_table for _, archive_table, _, _ in _archives(model.__tablename__)]
+    if not archives:
+        return None
+    source = union_all(*(
+        _range_select(model, _archive_table(model, name), None, None)
+        .where(_archive_table(model, name).c.id == row_id)
+        for name in archives
+    )).subquery()
+    row = db.session.execute(select(source).limit(1)).mappings().first()
+    return model(**row) if row is not None else None
+
+def archive_summary():
+    """Jumlah partisi dan baris yang sudah diarsip per tabel"""
+    rows = db.session.execute(
+        select(
+            ArchivedPartition.table_name,
+            func.count(ArchivedPartition.id),
+            func.sum(ArchivedPartition.row_count),
+            func.max(ArchivedPartition.period_end)
+        ).group_by(ArchivedPartition.table_name)
+    ).all()
+    return {
+        table: {'partitions': count, 'rows': int(total or 0), 'archived_before': last.isoformat()}
+        for table, count, total, last in rows
+    }
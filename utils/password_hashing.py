@@ -0,0 +1,106 @@
+"""
+Hash dan verifikasi password di process pool.
+
+pbkdf2/scrypt sengaja mahal (puluhan ms CPU per login). Saat awal shift
+puluhan kasir login bersamaan, verifikasi di thread request membuat semua
+worker sibuk menghitung hash. Di sini hash dikerjakan di process pool
+berukuran tetap (PASSWORD_HASH_WORKERS, biasanya = jumlah core):
+
+- CPU untuk hash tidak pernah melebihi ukuran pool, request lain tetap
+  dilayani
+- antrean dibatasi PASSWORD_HASH_MAX_PENDING; jika penuh lebih dari
+  PASSWORD_HASH_QUEUE_TIMEOUT detik, PasswordHasherBusy dilempar (login
+  menjawab 503, klien boleh mencoba lagi)
+
+Metode dan cost diatur lewat PASSWORD_HASH_METHOD (format werkzeug,
+misalnya 'scrypt:32768:8:1' atau 'pbkdf2:sha256:600000'). Hash lama dengan
+metode/cost berbeda tetap bisa diverifikasi dan di-hash ulang saat login
+berhasil (needs_rehash). PASSWORD_HASH_WORKERS=0 menjalankan hash langsung
+di thread request.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+class PasswordHasherBusy(Exception):
+    """Antrean hash penuh"""
+    pass
+
+def _hash_method(password_hash):
+    return password_hash.split('$', 1)[0]
+
+class PasswordHasher:
+    def __init__(self, method=DEFAULT_METHOD, workers=None, max_pending=None, queue_timeout=5.0):
+        self.method = method
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_pending = max_pending or max(self.workers, 1) * 16
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._full_method = None
+
+    @property
+    def full_method(self):
+        """Method lengkap dengan cost default werkzeug, misalnya 'pbkdf2:sha256' -> 'pbkdf2:sha256:600000'"""
+        if self._full_method is None:
+            self._full_method = _hash_method(generate_password_hash('', method=self.method))
+        return self._full_method
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: aman dipakai dari server multi-thread dan sama di Windows (exe)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _run(self, function, *args):
+        if self.workers <= 0:
+            return function(*args)
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise PasswordHasherBusy('Server sedang sibuk, silakan coba lagi')
+        try:
+            return self._pool().submit(function, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True jika hash dibuat dengan metode/cost selain yang dikonfigurasi"""
+        return _hash_method(password_hash) != self.full_method
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+def init_password_hasher(app):
+    """Pasang hasher sesuai config PASSWORD_HASH_* (pool dibuat saat hash pertama)"""
+    app.extensions['password_hasher'] = PasswordHasher(
+        method=app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD),
+        workers=app.config.get('PASSWORD_HASH_WORKERS'),
+        max_pending=app.config.get('PASSWORD_HASH_MAX_PENDING'),
+        queue_timeout=app.config.get('PASSWORD_HASH_QUEUE_TIMEOUT', 5.0)
+    )
+
+_inline_hasher = PasswordHasher(workers=0)
+
+def password_hasher():
+    """Hasher app aktif; di luar app context hash dikerjakan langsung"""
+    if has_app_context() and 'password_hasher' in current_app.extensions:
+        return current_app.extensions['password_hasher']
+    return _inline_hasher
@@ -0,0 +1,269 @@
+"""
+Rekonsiliasi saldo EDC dan agent terhadap data sumber.
+
+Saldo yang diharapkan per EDC/agent dihitung ulang dari:
+- checkpoint: mutasi ledger terakhir yang men-set saldo absolut (opening,
+  edit manual, reset, koreksi rekonsiliasi) beserta balance_after-nya
+- transaksi sesudah checkpoint: transfer mengurangi saldo EDC dan menambah
+  uang tunai agent, tarik tunai sebaliknya (sesuai kategori service)
+- mutasi ledger non-transaksi sesudah checkpoint (add saldo)
+
+lalu dibandingkan dengan saldo tersimpan (induk + slot). EDC/agent tanpa
+checkpoint (saldo sebelum ledger ada dan opening belum dicatat, lihat
+record_opening_balances) tidak punya saldo acuan: dilaporkan sebagai
+no_baseline dan tidak pernah dikoreksi.
+
+Mode 'ledger' memakai saldo menurut balance ledger (snapshot + SUM delta,
+lihat utils/balance_ledger.py) sebagai saldo yang diharapkan, untuk
+memastikan kolom saldo dan ledger tidak menyimpang. Kedua mode memakai
+runner yang sama: paralel per rentang id (setiap worker memakai koneksi
+sendiri) dengan format laporan yang sama.
+Mode fix menerapkan koreksi dalam batch kecil: baris induk dikunci, saldo
+yang diharapkan dihitung ulang di dalam lock, lalu saldo di-set dan dicatat
+ke ledger sebagai mutasi 'reconcile'.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import select, update, func, case, and_
+from models.user import db
+from models.service import Service
+from models.transaction import Transaction
+from models.balance_ledger import BalanceLedger
+from utils.balance_slots import KIND_EDC, KIND_AGENT, BALANCE_COLUMNS, current_balances, clear_slots
+from utils.balance_ledger import (
+    BALANCE_KINDS, ABSOLUTE_SOURCES, SOURCE_TRANSACTION, SOURCE_RECONCILE, ledger_entry, record_ledger_entries,
+    ledger_expected_balances
+)
+from utils.transaction_posting import CATEGORY_TRANSFER, CATEGORY_TARIK_TUNAI
+from utils.partitioning import partitioned_entity
+
+ZERO = Decimal('0.00')
+
+# Kolom transaksi yang menunjuk EDC/agent, dan arah perubahan saldo untuk transfer
+TRANSACTION_OWNER_COLUMNS = {
+    KIND_EDC: (Transaction.edc_machine_id, -1),
+    KIND_AGENT: (Transaction.agent_profile_id, 1),
+}
+
+def _checkpoints(kind, owner_ids):
+    """Subquery (owner_id, ledger_id, created_at, balance_after) checkpoint terakhir per owner"""
+    latest = (
+        select(BalanceLedger.owner_id, func.max(BalanceLedger.id).label('id'))
+        .where(
+            BalanceLedger.kind == kind,
+            BalanceLedger.owner_id.in_(owner_ids),
+            BalanceLedger.source.in_(ABSOLUTE_SOURCES)
+        )
+        .group_by(BalanceLedger.owner_id)
+        .subquery()
+    )
+    return (
+        select(
+            BalanceLedger.owner_id,
+            BalanceLedger.id.label('ledger_id'),
+            BalanceLedger.created_at,
+            BalanceLedger.balance_after
+        )
+        .join(latest, BalanceLedger.id == latest.c.id)
+        .subquery()
+    )
+
+def expected_balances(kind, owner_ids):
+    """
+    Saldo yang diharapkan menurut data sumber.
+
+    Returns:
+        {owner_id: Decimal} untuk owner_ids yang punya checkpoint
+    """
+    owner_ids = list(owner_ids)
+    if not owner_ids:
+        return {}
+    checkpoints = _checkpoints(kind, owner_ids)
+    expected = {
+        row.owner_id: row.balance_after or ZERO
+        for row in db.session.execute(select(checkpoints.c.owner_id, checkpoints.c.balance_after))
+    }
+    if not expected:
+        return {}
+    owner_ids = list(expected)
+
+    # Mutasi non-transaksi sesudah checkpoint (add saldo)
+    for owner_id, delta in db.session.execute(
+        select(BalanceLedger.owner_id, func.sum(BalanceLedger.delta))
+        .join(checkpoints, checkpoints.c.owner_id == BalanceLedger.owner_id)
+        .where(
+            BalanceLedger.kind == kind,
+            BalanceLedger.owner_id.in_(owner_ids),
+            BalanceLedger.id > checkpoints.c.ledger_id,
+            BalanceLedger.source.notin_((SOURCE_TRANSACTION, *ABSOLUTE_SOURCES))
+        )
+        .group_by(BalanceLedger.owner_id)
+    ):
+        expected[owner_id] += delta or ZERO
+
+    # Transaksi sesudah checkpoint (termasuk yang sudah diarsip), arah sesuai kategori service
+    transactions = partitioned_entity(Transaction)
+    owner_column, transfer_sign = TRANSACTION_OWNER_COLUMNS[kind]
+    owner_column = getattr(transactions, owner_column.key)
+    category = func.lower(Service.category)
+    signed_amount = case(
+        (category == CATEGORY_TRANSFER, transactions.amount * transfer_sign),
+        (category == CATEGORY_TARIK_TUNAI, transactions.amount * -transfer_sign),
+        else_=0
+    )
+    for owner_id, delta in db.session.execute(
+        select(owner_column, func.sum(signed_amount))
+        .join(Service, Service.id == transactions.service_id)
+        .join(checkpoints, checkpoints.c.owner_id == owner_column)
+        .where(
+            owner_column.in_(owner_ids),
+            transactions.created_at > checkpoints.c.created_at
+        )
+        .group_by(owner_column)
+    ):
+        expected[owner_id] += Decimal(str(delta or 0)).quantize(ZERO)
+
+    return expected
+
+def _owner_ids_in_range(kind, first_id, last_id):
+    model, _ = BALANCE_COLUMNS[kind]
+    return list(db.session.execute(
+        select(model.id).where(model.id.between(first_id, last_id)).order_by(model.id)
+    ).scalars())
+
+MODE_SOURCE = 'source'
+MODE_LEDGER = 'ledger'
+
+# Mode rekonsiliasi -> fungsi(kind, owner_ids) -> {owner_id: saldo yang diharapkan}
+EXPECTED_BALANCES = {
+    MODE_SOURCE: expected_balances,
+    MODE_LEDGER: ledger_expected_balances,
+}
+
+def _check_range(app, expected_for, kind, first_id, last_id):
+    with app.app_context():
+        owner_ids = _owner_ids_in_range(kind, first_id, last_id)
+        if not owner_ids:
+            return 0, [], []
+        stored = current_balances(kind, owner_ids)
+        expected = expected_for(kind, owner_ids)
+        drift = []
+        no_baseline = []
+        for owner_id in owner_ids:
+            if owner_id not in expected:
+                no_baseline.append(owner_id)
+                continue
+            difference = stored.get(owner_id, ZERO) - expected[owner_id]
+            if difference:
+                drift.append({
+                    'owner_id': owner_id,
+                    'stored': float(stored.get(owner_id, ZERO)),
+                    'expected': float(expected[owner_id]),
+                    'difference': float(difference),
+                })
+        return len(owner_ids), drift, no_baseline
+
+def fix_drift(kind, owner_ids, user_id=None, expected_for=expected_balances):
+    """
+    Set saldo owner_ids ke saldo yang diharapkan (satu batch, satu commit).
+    Baris induk dikunci dulu dan saldo dihitung ulang di dalam lock. Owner
+    tanpa checkpoint tidak disentuh.
+
+    Args:
+        expected_for: Fungsi saldo yang diharapkan (lihat EXPECTED_BALANCES)
+
+    Returns:
+        Jumlah owner yang dikoreksi
+    """
+    model, column = BALANCE_COLUMNS[kind]
+    owner_ids = sorted(owner_ids)
+    db.session.execute(
+        select(model.id).where(model.id.in_(owner_ids)).order_by(model.id).with_for_update()
+    ).all()
+    stored = current_balances(kind, owner_ids)
+    expected = expected_for(kind, owner_ids)
+    corrections = {
+        owner_id: balance for owner_id, balance in expected.items()
+        if owner_id in stored and stored[owner_id] != balance
+    }
+    if not corrections:
+        db.session.rollback()
+        return 0
+
+    clear_slots(kind, list(corrections))
+    db.session.execute(
+        update(model)
+        .where(model.id.in_(corrections.keys()))
+        .values({column: case(corrections, value=model.id)})
+        .execution_options(synchronize_session=False)
+    )
+    now = datetime.utcnow()
+    record_ledger_entries([
+        ledger_entry(
+            kind, owner_id, balance - stored[owner_id], SOURCE_RECONCILE,
+            user_id=user_id, created_at=now, balance_after=balance
+        )
+        for owner_id, balance in corrections.items()
+    ])
+    db.session.commit()
+    return len(corrections)
+
+def reconcile_balances(app, kinds=BALANCE_KINDS, chunk_size=500, workers=4, fix=False, fix_batch_size=50, user_id=None,
+                       mode=MODE_SOURCE):
+    """
+    Cek (dan opsional koreksi) saldo EDC/agent terhadap data sumber atau ledger.
+
+    Args:
+        app: Flask app (setiap worker membuka app context sendiri)
+        chunk_size: Jumlah id per worker task
+        workers: Ukuran thread pool
+        fix: Terapkan koreksi untuk saldo yang selisih
+        fix_batch_size: Jumlah owner per commit koreksi
+        mode: MODE_SOURCE (transaksi sesudah checkpoint) atau MODE_LEDGER (saldo ledger)
+
+    Returns:
+        {kind: {'checked', 'drift_count', 'total_difference', 'drift', 'no_baseline', 'fixed'}}
+    """
+    expected_for = EXPECTED_BALANCES[mode]
+    report = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for kind in kinds:
+            model, _ = BALANCE_COLUMNS[kind]
+            low, high = db.session.execute(select(func.min(model.id), func.max(model.id))).one()
+            futures = []
+            if low is not None:
+                futures = [
+                    executor.submit(_check_range, app, expected_for, kind, first_id, first_id + chunk_size - 1)
+                    for first_id in range(low, high + 1, chunk_size)
+                ]
+            checked = 0
+            drift = []
+            no_baseline = []
+            for future in futures:
+                count, items, missing = future.result()
+                checked += count
+                drift.extend(items)
+                no_baseline.extend(missing)
+
+            fixed = 0
+            if fix and drift:
+                drift_ids = [item['owner_id'] for item in drift]
+                for start in range(0, len(drift_ids), fix_batch_size):
+                    try:
+                        fixed += fix_drift(
+                            kind, drift_ids[start:start + fix_batch_size], user_id=user_id, expected_for=expected_for
+                        )
+                    except Exception:
+                        db.session.rollback()
+                        raise
+
+            report[kind] = {
+                'checked': checked,
+                'drift_count': len(drift),
+                'total_difference': float(sum(Decimal(str(item['difference'])) for item in drift)),
+                'drift': drift,
+                'no_baseline': no_baseline,
+                'fixed': fixed,
+            }
+    return report
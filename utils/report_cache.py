@@ -0,0 +1,167 @@
+"""
+Cache hasil laporan untuk hari-hari yang sudah tertutup.
+
+Transaksi dan cash flow hari yang sudah lewat praktis tidak berubah, jadi
+agregatnya (ReportParts, termasuk seri harian) disimpan di tabel
+report_cache dengan key rentang hari yang dinormalisasi: [range_start,
+range_end) dalam tanggal. Periode apa pun (harian, mingguan, bulanan,
+tahunan, custom) yang mencakup hari yang sama memakai entri yang sama.
+
+build_report() memecah rentang laporan menjadi:
+
+- prefix tertutup (sebelum closed_before()) dari cache; jika belum ada,
+  entri terpanjang dengan awal yang sama diperpanjang dengan menghitung
+  hari sisanya saja, lalu disimpan sebagai entri baru
+- tail terbuka (hari ini) yang selalu dihitung live
+
+Entri tidak punya masa berlaku. Commit yang membuat, mengubah atau
+menghapus transaksi/cash flow dengan created_at (lama atau baru) di hari
+tertutup menghapus semua entri yang mencakup hari tersebut; UPDATE/DELETE
+massal lewat session menghapus semua entri. Perhitungan yang sudah berjalan
+saat commit semacam itu tidak disimpan (penghitung generasi per proses).
+
+Tabel cache ditulis lewat koneksi terpisah (seperti utils/idempotency.py)
+supaya tidak ikut transaksi request.
+"""
+import json
+import threading
+from datetime import datetime, time, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect, select, insert, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models.report_cache import ReportCacheEntry
+from models.transaction import Transaction
+from models.cash_flow import CashFlow
+from utils.db_pools import pool_engine
+from utils.report_parts import PARTS_VERSION, ReportParts
+
+CACHED_TABLES = (Transaction.__tablename__, CashFlow.__tablename__)
+
+_table = ReportCacheEntry.__table__
+_lock = threading.Lock()
+_generation = 0
+
+def cache_enabled():
+    return bool(current_app.config.get('REPORT_CACHE_ENABLED'))
+
+def closed_before():
+    """
+    Awal hari pertama yang masih terbuka.
+
+    created_at default memakai waktu UTC sedangkan rentang laporan memakai
+    waktu lokal; tanggal yang lebih awal dipakai supaya transaksi baru
+    tidak pernah jatuh di hari yang dianggap tertutup.
+    """
+    return datetime.combine(min(datetime.now().date(), datetime.utcnow().date()), time.min)
+
+def _decode(payload):
+    data = json.loads(payload)
+    return ReportParts.from_dict(data) if data.get('version') == PARTS_VERSION else None
+
+def _load(first_day, last_day):
+    """
+    (range_end, ReportParts) entri terpanjang yang dimulai di first_day dan
+    berakhir paling lambat last_day, atau None. Entri dengan bentuk payload
+    lama dihapus.
+    """
+    while True:
+        with pool_engine().connect() as conn:
+            row = conn.execute(
+                select(_table.c.range_end, _table.c.payload)
+                .where(_table.c.range_start == first_day, _table.c.range_end <= last_day)
+                .order_by(_table.c.range_end.desc())
+                .limit(1)
+            ).first()
+        if row is None:
+            return None
+        parts = _decode(row.payload)
+        if parts is not None:
+            return row.range_end, parts
+        with pool_engine().begin() as conn:
+            conn.execute(delete(_table).where(_table.c.range_start == first_day, _table.c.range_end == row.range_end))
+
+def _store(first_day, last_day, parts, generation):
+    with _lock:
+        # Ada commit yang menyentuh hari tertutup selama perhitungan: jangan simpan
+        if generation != _generation:
+            return
+        try:
+            with pool_engine().begin() as conn:
+                conn.execute(insert(_table).values(
+                    range_start=first_day,
+                    range_end=last_day,
+                    payload=json.dumps(parts.to_dict()),
+                    created_at=datetime.utcnow()
+                ))
+        except IntegrityError:
+            # Disimpan request lain lebih dulu
+            pass
+
+def closed_parts(first_day, last_day, compute):
+    """
+    ReportParts untuk hari [first_day, last_day) yang sudah tertutup.
+
+    Args:
+        compute: fungsi (start, end) -> ReportParts untuk menghitung hari yang belum ada di cache
+    """
+    generation = _generation
+    cached = _load(first_day, last_day)
+    if cached is not None:
+        gap_start, parts = cached
+        if gap_start == last_day:
+            return parts
+    else:
+        gap_start, parts = first_day, ReportParts()
+    parts.merge(compute(
+        datetime.combine(gap_start, time.min),
+        datetime.combine(last_day, time.min) - timedelta(microseconds=1)
+    ))
+    _store(first_day, last_day, parts, generation)
+    return parts
+
+def invalidate(days):
+    """Hapus entri yang mencakup salah satu `days` (None di dalamnya = semua entri)"""
+    global _generation
+    with _lock:
+        _generation += 1
+    with pool_engine().begin() as conn:
+        if None in days:
+            conn.execute(delete(_table))
+            return
+        for day in sorted(days):
+            conn.execute(delete(_table).where(_table.c.range_start <= day, _table.c.range_end > day))
+
+def _closed_days(obj, cutoff):
+    """Hari tertutup yang agregatnya ikut berubah oleh objek ini (nilai created_at lama dan baru)"""
+    state = inspect(obj)
+    values = [obj.created_at, *state.attrs.created_at.history.deleted]
+    return {value.date() for value in values if value is not None and value < cutoff}
+
+@event.listens_for(Session, 'after_flush')
+def _collect_closed_days(session, flush_context):
+    if not has_app_context() or not cache_enabled():
+        return
+    cutoff = closed_before()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if getattr(obj, '__tablename__', None) in CACHED_TABLES:
+            days = _closed_days(obj, cutoff)
+            if days:
+                session.info.setdefault('report_cache_stale', set()).update(days)
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_changes(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.local_table.name in CACHED_TABLES:
+            orm_execute_state.session.info.setdefault('report_cache_stale', set()).add(None)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    stale = session.info.pop('report_cache_stale', None)
+    if stale and has_app_context() and cache_enabled():
+        invalidate(stale)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('report_cache_stale', None)
@@ -0,0 +1,280 @@
+"""
+Perhitungan data laporan (GET /api/reports).
+
+Laporan dihitung sebagai agregat yang bisa dijumlahkan (ReportParts):
+total transaksi dan fee, cash in/out, lalu per service, per hari, per EDC
+dan per agent. Rentang laporan dipecah per bulan (plan_segments):
+
+- bulan tertutup yang sudah ada di analytics store (utils/analytics_store.py)
+  dihitung dengan scan vektor pyarrow atas file Parquet
+- bulan berjalan dan bulan yang belum diekspor dihitung dari database
+  (termasuk tabel arsip partisi), dengan GROUP BY SQL atau, untuk
+  engine=numpy, satu fetch per tabel yang diagregasi dengan NumPy
+
+Bulan yang berdampingan dengan sumber sama digabung menjadi satu segmen,
+jadi laporan tahunan biasanya berupa satu scan Parquet ditambah satu
+rangkaian query untuk bulan berjalan. Hasil semua segmen dijumlahkan, lalu
+nama service/EDC/agent diambil dari tabel masternya.
+
+Hari yang sudah tertutup diambil dari cache laporan (utils/report_cache.py);
+hanya hari berjalan yang dihitung ulang di setiap request. Query segmen
+database dijalankan paralel di koneksi terpisah dengan batas waktu per
+laporan (utils/report_runner.py).
+"""
+from datetime import datetime, time, timedelta
+from sqlalchemy import select, func
+from models.user import db
+from models.agent_profile import AgentProfile
+from models.edc_machine import EdcMachine
+from models.service import Service
+from models.transaction import Transaction
+from models.cash_flow import CashFlow
+from utils.partitioning import month_start, add_months, partitioned_entity
+from utils import analytics_store, report_cache, report_vectorized
+from utils.report_runner import report_runner
+from utils.report_parts import (
+    ZERO, TRANSACTION_SUMS, CASH_TYPES, SERVICE_FIELDS, DAY_FIELDS, OWNER_FIELDS, AGENT_FIELDS, ReportParts, to_decimal
+)
+
+SOURCE_DATABASE = 'database'
+SOURCE_STORE = 'analytics_store'
+
+# Engine untuk segmen database: GROUP BY SQL atau NumPy (utils/report_vectorized.py)
+ENGINE_SQL = 'sql'
+ENGINE_NUMPY = 'numpy'
+
+def available_engines():
+    return (ENGINE_SQL, ENGINE_NUMPY) if report_vectorized.np is not None else (ENGINE_SQL,)
+
+def database_parts(start, end, daily=True):
+    """ReportParts untuk created_at di [start, end] dari database (query dijalankan paralel)"""
+    transactions = partitioned_entity(Transaction, start, end)
+    cash_flows = partitioned_entity(CashFlow, start, end)
+    in_range = transactions.created_at.between(start, end)
+    parts = ReportParts()
+
+    def grouped(key, fields):
+        aggregates = [
+            func.count(transactions.id) if field == 'count' else func.sum(getattr(transactions, field))
+            for field in fields
+        ]
+        return select(key, *aggregates).where(in_range).group_by(key)
+
+    groups = [
+        ('by_service', transactions.service_id, SERVICE_FIELDS),
+        ('by_edc', transactions.edc_machine_id, OWNER_FIELDS),
+        ('by_agent', transactions.agent_profile_id, AGENT_FIELDS),
+    ]
+    if daily:
+        groups.append(('by_day', func.date(transactions.created_at), DAY_FIELDS))
+
+    totals, cash, *grouped_rows = report_runner().run([
+        select(func.count(transactions.id), *(func.sum(getattr(transactions, name)) for name in TRANSACTION_SUMS))
+        .where(in_range),
+        select(cash_flows.type, func.sum(cash_flows.amount))
+        .where(cash_flows.type.in_(CASH_TYPES), cash_flows.created_at.between(start, end))
+        .group_by(cash_flows.type),
+        *(grouped(key, fields) for _, key, fields in groups)
+    ])
+
+    row = totals[0]
+    parts.totals['count'] = int(row[0] or 0)
+    for name, value in zip(TRANSACTION_SUMS, row[1:]):
+        parts.totals[name] = to_decimal(value)
+    for cash_type, total in cash:
+        parts.cash[cash_type] = to_decimal(total)
+    for (name, _, fields), rows in zip(groups, grouped_rows):
+        if name == 'by_day':
+            rows = ((str(day), *values) for day, *values in rows)
+        parts.add_rows(name, rows, fields)
+    return parts
+
+def _arrow_groups(table, key, fields):
+    aggregates = [('id', 'count') if field == 'count' else (field, 'sum') for field in fields]
+    result = table.group_by(key).aggregate(aggregates)
+    columns = [result[key].to_pylist()] + [
+        result['id_count' if field == 'count' else f'{field}_sum'].to_pylist() for field in fields
+    ]
+    return zip(*columns)
+
+def store_parts(months, start, end, daily=True):
+    """ReportParts untuk created_at di [start, end] dari file Parquet bulan `months`"""
+    pa, pc = analytics_store.pa, analytics_store.pc
+    parts = ReportParts()
+    transactions = analytics_store.scan(
+        Transaction.__tablename__, months, start, end,
+        ('id', 'created_at', 'service_id', 'edc_machine_id', 'agent_profile_id', *TRANSACTION_SUMS)
+    )
+    parts.totals['count'] = transactions.num_rows
+    for name in TRANSACTION_SUMS:
+        parts.totals[name] = to_decimal(pc.sum(transactions[name]).as_py())
+
+    cash_flows = analytics_store.scan(CashFlow.__tablename__, months, start, end, ('type', 'amount'))
+    for cash_type, total in _arrow_groups(cash_flows, 'type', ('amount',)):
+        if cash_type in parts.cash:
+            parts.cash[cash_type] += to_decimal(total)
+
+    parts.add_rows('by_service', _arrow_groups(transactions, 'service_id', SERVICE_FIELDS), SERVICE_FIELDS)
+    if daily:
+        days = transactions.append_column('day', pc.cast(transactions['created_at'], pa.date32()))
+        parts.add_rows(
+            'by_day',
+            ((day.isoformat(), *values) for day, *values in _arrow_groups(days, 'day', DAY_FIELDS)),
+            DAY_FIELDS
+        )
+    parts.add_rows('by_edc', _arrow_groups(transactions, 'edc_machine_id', OWNER_FIELDS), OWNER_FIELDS)
+    parts.add_rows('by_agent', _arrow_groups(transactions, 'agent_profile_id', AGENT_FIELDS), AGENT_FIELDS)
+    return parts
+
+def plan_segments(start, end):
+    """
+    [(sumber, bulan, start, end)] untuk rentang laporan: bulan tertutup yang
+    kedua tabelnya sudah diekspor dibaca dari analytics store, sisanya dari
+    database. `bulan` = daftar bulan di segmen tersebut.
+    """
+    exported = set()
+    if analytics_store.store_enabled():
+        exported = set(analytics_store.exported_months(Transaction.__tablename__)).intersection(
+            analytics_store.exported_months(CashFlow.__tablename__)
+        )
+    segments = []
+    month = month_start(start)
+    while datetime.combine(month, time.min) <= end:
+        next_month = add_months(month, 1)
+        segment_start = max(start, datetime.combine(month, time.min))
+        segment_end = min(end, datetime.combine(next_month, time.min) - timedelta(microseconds=1))
+        source = SOURCE_STORE if month in exported else SOURCE_DATABASE
+        if segments and segments[-1][0] == source:
+            segments[-1][1].append(month)
+            segments[-1][3] = segment_end
+        else:
+            segments.append([source, [month], segment_start, segment_end])
+        month = next_month
+    return [tuple(segment) for segment in segments]
+
+def report_parts(start, end, daily=True, engine=ENGINE_SQL):
+    """ReportParts gabungan semua segmen rentang [start, end]"""
+    compute_database = report_vectorized.numpy_parts if engine == ENGINE_NUMPY else database_parts
+    parts = ReportParts()
+    for source, months, segment_start, segment_end in plan_segments(start, end):
+        if source == SOURCE_STORE:
+            parts.merge(store_parts(months, segment_start, segment_end, daily))
+        else:
+            parts.merge(compute_database(segment_start, segment_end, daily))
+    return parts
+
+def cached_report_parts(start, end, daily=True, engine=ENGINE_SQL, live=None):
+    """
+    report_parts() dengan prefix hari tertutup dari cache laporan dan tail
+    hari berjalan dihitung live. Cache hanya dipakai untuk rentang yang
+    dimulai tengah malam.
+
+    Args:
+        live: fungsi (start, end) -> ReportParts untuk bagian yang tidak dari
+              cache (default report_parts semua grup)
+    """
+    if live is None:
+        def live(live_start, live_end):
+            return report_parts(live_start, live_end, daily, engine)
+    if not report_cache.cache_enabled() or start.time() != time.min:
+        return live(start, end)
+    # Hari terakhir yang utuh di [start, end], dibatasi hari yang sudah tertutup
+    closed_end = min(report_cache.closed_before(), datetime.combine((end + timedelta(microseconds=1)).date(), time.min))
+    if closed_end <= start:
+        return live(start, end)
+
+    # Seri harian selalu ikut disimpan supaya entri bisa dipakai semua periode
+    parts = report_cache.closed_parts(
+        start.date(), closed_end.date(), lambda gap_start, gap_end: report_parts(gap_start, gap_end, True, engine)
+    )
+    if closed_end <= end:
+        parts.merge(live(closed_end, end))
+    return parts
+
+def _names(model, columns, ids):
+    if not ids:
+        return {}
+    return {
+        row[0]: row[1:]
+        for row in db.session.execute(select(model.id, *columns).where(model.id.in_(ids)))
+    }
+
+def _by_revenue(groups, names):
+    # Grup yang master datanya sudah dihapus tidak ditampilkan (sama dengan INNER JOIN)
+    rows = [(key, values) for key, values in groups.items() if key in names]
+    return sorted(rows, key=lambda item: item[1][1], reverse=True)
+
+def build_report(start, end, engine=ENGINE_SQL):
+    """Data laporan (tanpa 'period') untuk created_at di [start, end]"""
+    daily = (end - start).days > 1
+    with report_runner().budget():
+        parts = cached_report_parts(start, end, daily, engine)
+    totals = parts.totals
+
+    total_revenue = float(totals['amount'])
+    total_transactions = totals['count']
+    total_service_fee = float(totals['service_fee'])
+    total_bank_fee = float(totals['bank_fee'])
+    total_extra_fee = float(totals['extra_fee'])
+    cash_in = float(parts.cash['cash_in'])
+    cash_out = float(parts.cash['cash_out'])
+
+    services = _names(Service, (Service.name, Service.category), list(parts.by_service))
+    service_data = [
+        {
+            'service_id': service_id,
+            'name': services[service_id][0],
+            'category': services[service_id][1],
+            'revenue': float(amount),
+            'transaction_count': count,
+            'service_fee_total': float(service_fee),
+            'bank_fee_total': float(bank_fee),
+            'net_profit_total': float(net_profit)
+        }
+        for service_id, (count, amount, service_fee, bank_fee, net_profit) in _by_revenue(parts.by_service, services)
+    ]
+
+    daily_breakdown = []
+    if daily:
+        cursor = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        while cursor.date() <= end.date():
+            date_str = cursor.strftime('%Y-%m-%d')
+            count, amount, net_profit = parts.by_day.get(date_str, (0, ZERO, ZERO))
+            daily_breakdown.append({
+                'date': date_str,
+                'revenue': float(amount),
+                'transaction_count': count,
+                'net_profit': float(net_profit)
+            })
+            cursor += timedelta(days=1)
+
+    machines = _names(EdcMachine, (EdcMachine.name,), list(parts.by_edc))
+    agents = _names(AgentProfile, (AgentProfile.agent_name,), list(parts.by_agent))
+
+    return {
+        'summary': {
+            'total_revenue': total_revenue,
+            'total_transactions': total_transactions,
+            'avg_transaction_amount': total_revenue / total_transactions if total_transactions > 0 else 0.00,
+            'total_fees': total_service_fee + total_bank_fee + total_extra_fee,
+            'total_net_profit': float(totals['net_profit']),
+            'cash_in': cash_in,
+            'cash_out': cash_out,
+            'net_cash_flow': cash_in - cash_out
+        },
+        'fees_breakdown': {
+            'service_fee': total_service_fee,
+            'bank_fee': total_bank_fee,
+            'extra_fee': total_extra_fee
+        },
+        'service_breakdown': service_data,
+        'daily_breakdown': daily_breakdown,
+        'edc_performance': [
+            {'edc_id': edc_id, 'name': machines[edc_id][0], 'revenue': float(amount), 'transaction_count': count}
+            for edc_id, (count, amount) in _by_revenue(parts.by_edc, machines)
+        ],
+        'agent_performance': [
+            {'agent_id': agent_id, 'agent_name': agents[agent_id][0], 'revenue': float(amount), 'transaction_count': count}
+            for agent_id, (count, amount, *_) in _by_revenue(parts.by_agent, agents)
+        ]
+    }
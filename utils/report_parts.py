@@ -0,0 +1,98 @@
+"""
+Agregat laporan yang bisa dijumlahkan antar sumber dan engine.
+
+ReportParts menyimpan total transaksi dan fee, cash in/out, serta grup per
+service, per hari, per EDC dan per agent. Setiap engine (GROUP BY SQL,
+NumPy, scan Parquet) mengisi ReportParts untuk satu segmen waktu;
+utils/report_engine.py menjumlahkan semua segmen lalu menyusun respons.
+Nilai uang berupa Decimal sehingga hasil antar engine identik.
+"""
+from decimal import Decimal
+
+ZERO = Decimal('0.00')
+TRANSACTION_SUMS = ('amount', 'service_fee', 'bank_fee', 'extra_fee', 'net_profit')
+CASH_TYPES = ('cash_in', 'cash_out')
+# Urutan nilai per grup; 'count' = jumlah transaksi, sisanya SUM kolom
+SERVICE_FIELDS = ('count', 'amount', 'service_fee', 'bank_fee', 'net_profit')
+DAY_FIELDS = ('count', 'amount', 'net_profit')
+OWNER_FIELDS = ('count', 'amount')
+# Per agent juga fee, untuk ringkasan owner multi-outlet (/api/owners/me/overview)
+AGENT_FIELDS = ('count', *TRANSACTION_SUMS)
+# Naik setiap bentuk to_dict() berubah; payload versi lain diabaikan cache laporan
+PARTS_VERSION = 2
+
+def to_decimal(value):
+    if value is None:
+        return ZERO
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+def _values(row, fields):
+    return [int(value or 0) if field == 'count' else to_decimal(value) for field, value in zip(fields, row)]
+
+class ReportParts:
+    """Agregat laporan satu sumber/segmen; bisa dijumlahkan dengan merge()"""
+    __slots__ = ('totals', 'cash', 'by_service', 'by_day', 'by_edc', 'by_agent')
+
+    def __init__(self):
+        self.totals = {'count': 0, **{name: ZERO for name in TRANSACTION_SUMS}}
+        self.cash = {cash_type: ZERO for cash_type in CASH_TYPES}
+        self.by_service = {}
+        self.by_day = {}
+        self.by_edc = {}
+        self.by_agent = {}
+
+    @staticmethod
+    def _add(groups, key, values):
+        existing = groups.get(key)
+        if existing is None:
+            groups[key] = list(values)
+        else:
+            for index, value in enumerate(values):
+                existing[index] += value
+
+    def add_rows(self, name, rows, fields):
+        """Tambahkan baris (key, *nilai sesuai fields) ke grup `name`"""
+        groups = getattr(self, name)
+        for key, *values in rows:
+            if key is not None:
+                self._add(groups, key, _values(values, fields))
+
+    def merge(self, other):
+        for name in TRANSACTION_SUMS:
+            self.totals[name] += other.totals[name]
+        self.totals['count'] += other.totals['count']
+        for cash_type in CASH_TYPES:
+            self.cash[cash_type] += other.cash[cash_type]
+        for name in ('by_service', 'by_day', 'by_edc', 'by_agent'):
+            groups = getattr(self, name)
+            for key, values in getattr(other, name).items():
+                self._add(groups, key, values)
+        return self
+
+    def to_dict(self):
+        """Bentuk JSON (uang sebagai string Decimal) untuk cache laporan"""
+        def encode(values):
+            return [value if isinstance(value, int) else str(value) for value in values]
+        return {
+            'version': PARTS_VERSION,
+            'totals': {'count': self.totals['count'], **{name: str(self.totals[name]) for name in TRANSACTION_SUMS}},
+            'cash': {name: str(value) for name, value in self.cash.items()},
+            **{
+                name: [[key, *encode(values)] for key, values in getattr(self, name).items()]
+                for name in ('by_service', 'by_day', 'by_edc', 'by_agent')
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        parts = cls()
+        parts.totals['count'] = int(data['totals']['count'])
+        for name in TRANSACTION_SUMS:
+            parts.totals[name] = to_decimal(data['totals'][name])
+        for cash_type in CASH_TYPES:
+            parts.cash[cash_type] = to_decimal(data['cash'][cash_type])
+        for name, fields in (
+            ('by_service', SERVICE_FIELDS), ('by_day', DAY_FIELDS), ('by_edc', OWNER_FIELDS), ('by_agent', AGENT_FIELDS)
+        ):
+            parts.add_rows(name, data[name], fields)
+        return parts
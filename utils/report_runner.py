@@ -0,0 +1,138 @@
+"""
+Menjalankan query agregat laporan yang saling lepas secara paralel.
+
+Satu laporan terdiri dari beberapa SELECT yang tidak saling bergantung
+(total, cash flow, per service, per hari, per EDC, per agent). Dijalankan
+berurutan di satu koneksi, lamanya = jumlah semua query. ReportQueryRunner
+menjalankan setiap SELECT di koneksi sendiri dari engine yang sama dengan
+yang akan dipilih db.session (pool reporting atau read replica), di thread
+pool berukuran tetap (REPORT_QUERY_WORKERS) yang dipakai bersama semua
+request, sehingga lamanya kira-kira = query terlama.
+
+Satu laporan punya batas waktu total (REPORT_TIMEOUT_SECONDS, lewat
+budget()); jika terlewati ReportTimeout dilempar dan query yang belum mulai
+dibatalkan. Jumlah worker sebaiknya di bawah ukuran pool reporting supaya
+request lain masih mendapat koneksi. Query yang gagal di read replica
+diulang sekali di primary (utils/db_routing.read_with_fallback).
+
+REPORT_QUERY_WORKERS=0, atau engine yang koneksinya tidak bisa dipakai
+antar thread (SQLite in-memory), menjalankan query berurutan di db.session.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from flask import current_app, has_app_context
+from sqlalchemy.pool import StaticPool, SingletonThreadPool
+from models.user import db
+from utils.db_routing import read_with_fallback
+
+class ReportTimeout(Exception):
+    """Laporan melewati batas waktu REPORT_TIMEOUT_SECONDS"""
+    pass
+
+def fetch_rows(result):
+    return result.all()
+
+def _execute(bind, statement, fetch):
+    with bind.connect() as connection:
+        result = connection.execute(statement)
+        try:
+            return fetch(result)
+        finally:
+            result.close()
+
+class ReportQueryRunner:
+    def __init__(self, workers=3, timeout=None):
+        self.workers = workers
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='report-query')
+            return self._executor
+
+    @contextmanager
+    def budget(self):
+        """Batas waktu satu laporan untuk semua run() di thread ini (yang terluar berlaku)"""
+        if getattr(self._local, 'deadline', None) is not None or not self.timeout:
+            yield
+            return
+        self._local.deadline = time.monotonic() + self.timeout
+        try:
+            yield
+        finally:
+            self._local.deadline = None
+
+    def _remaining(self):
+        deadline = getattr(self._local, 'deadline', None)
+        if deadline is None:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise ReportTimeout('Laporan melewati batas waktu, persempit rentang tanggal')
+        return remaining
+
+    def run(self, statements, fetch=fetch_rows):
+        """
+        Jalankan SELECT `statements` dan return hasil fetch(result) masing-masing, sesuai urutan.
+
+        Raises:
+            ReportTimeout: Budget laporan habis sebelum semua query selesai
+        """
+        session = db.session()
+        binds = [session.get_bind(clause=statement) for statement in statements]
+        primaries = [session.primary_bind(clause=statement) for statement in statements]
+        if self.workers <= 0 or len(statements) < 2 or any(
+            isinstance(bind.pool, (StaticPool, SingletonThreadPool)) for bind in binds
+        ):
+            def execute_in_session(bind, statement):
+                result = session.connection(bind_arguments={'bind': bind}).execute(statement)
+                try:
+                    return fetch(result)
+                finally:
+                    result.close()
+
+            results = []
+            for bind, primary, statement in zip(binds, primaries, statements):
+                self._remaining()
+                results.append(read_with_fallback(bind, primary, lambda engine: execute_in_session(engine, statement)))
+            return results
+
+        futures = [
+            self._pool().submit(read_with_fallback, bind, primary, lambda engine, statement=statement: _execute(engine, statement, fetch))
+            for bind, primary, statement in zip(binds, primaries, statements)
+        ]
+        try:
+            _, pending = wait(futures, timeout=self._remaining())
+            if pending:
+                raise ReportTimeout('Laporan melewati batas waktu, persempit rentang tanggal')
+        finally:
+            for future in futures:
+                future.cancel()
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+def init_report_runner(app):
+    """Pasang runner sesuai config REPORT_QUERY_WORKERS dan REPORT_TIMEOUT_SECONDS (thread dibuat saat laporan pertama)"""
+    app.extensions['report_runner'] = ReportQueryRunner(
+        workers=app.config.get('REPORT_QUERY_WORKERS', 3),
+        timeout=app.config.get('REPORT_TIMEOUT_SECONDS')
+    )
+
+_inline_runner = ReportQueryRunner(workers=0)
+
+def report_runner():
+    """Runner app aktif; tanpa runner terpasang query dijalankan berurutan"""
+    if has_app_context() and 'report_runner' in current_app.extensions:
+        return current_app.extensions['report_runner']
+    return _inline_runner
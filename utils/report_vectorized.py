@@ -0,0 +1,140 @@
+"""
+Engine laporan NumPy (GET /api/reports?engine=numpy).
+
+Engine SQL menjalankan beberapa query GROUP BY per segmen. Engine ini
+mengambil setiap segmen database dengan satu SELECT per tabel yang hanya
+berisi kolom yang dibutuhkan (kedua SELECT berjalan paralel). Baris dari cursor DBAPI langsung diubah
+menjadi structured array NumPy (tanpa objek Row SQLAlchemy per baris):
+
+- uang sebagai int64 sen (ROUND(x * 100) di database) supaya penjumlahan
+  tetap eksak
+- tanggal created_at sebagai teks YYYY-MM-DD, di-parse NumPy ke datetime64
+
+Total memakai sum(). Grup service/EDC/agent memakai argsort lalu
+np.add.reduceat per blok key. Seri harian memakai np.bincount dengan
+minlength sejumlah hari, jadi hari tanpa transaksi otomatis bernilai 0.
+Hasilnya ReportParts yang sama persis dengan engine SQL.
+benchmarks/bench_report_engine.py membandingkan kedua engine.
+
+numpy opsional: tanpa numpy hanya engine SQL yang tersedia.
+"""
+from decimal import Decimal
+from sqlalchemy import select, func, cast, BigInteger, String
+from models.transaction import Transaction
+from models.cash_flow import CashFlow
+from utils.partitioning import partitioned_entity
+from utils.report_runner import report_runner
+from utils.report_parts import TRANSACTION_SUMS, CASH_TYPES, SERVICE_FIELDS, DAY_FIELDS, OWNER_FIELDS, AGENT_FIELDS, ReportParts
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy optional
+    np = None
+
+def cents(column):
+    """Kolom uang sebagai int64 sen (ROUND(x * 100))"""
+    return cast(func.round(func.coalesce(column, 0) * 100), BigInteger)
+
+def from_cents(value):
+    return Decimal(int(value)).scaleb(-2)
+
+def _fetch_cursor(result):
+    return result.cursor.fetchall()
+
+def fetch_arrays(queries):
+    """
+    Jalankan [(statement, dtype)] paralel (utils/report_runner.py); setiap
+    hasil diambil langsung dari cursor DBAPI ke structured array `dtype`
+    (konversi kolom di NumPy)
+    """
+    results = report_runner().run([statement for statement, _ in queries], fetch=_fetch_cursor)
+    return [
+        np.array(rows, dtype=dtype) if rows else np.zeros(0, dtype=dtype)
+        for rows, (_, dtype) in zip(results, queries)
+    ]
+
+def group_sums(keys, columns):
+    """
+    Jumlah setiap array `columns` per key unik.
+
+    Returns:
+        tuple: (key unik terurut, jumlah baris per key, [jumlah per key untuk setiap kolom])
+    """
+    if keys.size == 0:
+        return keys, np.zeros(0, np.int64), [np.zeros(0, np.int64) for _ in columns]
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+    counts = np.diff(np.append(starts, keys.size))
+    return sorted_keys[starts], counts, [np.add.reduceat(column[order], starts) for column in columns]
+
+def daily_series(day_index, days, columns):
+    """
+    Jumlah baris dan jumlah setiap kolom per hari 0..days-1.
+
+    bincount menjumlah dalam float64; eksak selama total per hari di bawah
+    2**53 sen.
+    """
+    counts = np.bincount(day_index, minlength=days)
+    sums = [np.bincount(day_index, weights=column, minlength=days).round().astype(np.int64) for column in columns]
+    return counts, sums
+
+def _add_groups(parts, name, keys, money, fields):
+    unique, counts, sums = group_sums(keys, [money[field] for field in fields[1:]])
+    parts.add_rows(
+        name,
+        # key 0 = NULL (COALESCE), tidak ikut grup seperti di engine SQL
+        ((key or None, count, *map(from_cents, values))
+         for key, count, *values in zip(unique.tolist(), counts.tolist(), *(column.tolist() for column in sums))),
+        fields
+    )
+
+def numpy_parts(start, end, daily=True):
+    """ReportParts untuk created_at di [start, end] dari database, dihitung dengan NumPy"""
+    transactions = partitioned_entity(Transaction, start, end)
+    cash_flows = partitioned_entity(CashFlow, start, end)
+    parts = ReportParts()
+
+    rows, cash = fetch_arrays([(
+        select(
+            func.coalesce(transactions.service_id, 0),
+            func.coalesce(transactions.edc_machine_id, 0),
+            func.coalesce(transactions.agent_profile_id, 0),
+            cast(func.date(transactions.created_at), String),
+            *(cents(getattr(transactions, name)) for name in TRANSACTION_SUMS)
+        ).where(transactions.created_at.between(start, end)),
+        [
+            ('service_id', np.int64), ('edc_machine_id', np.int64), ('agent_profile_id', np.int64),
+            ('day', 'datetime64[D]'), *((name, np.int64) for name in TRANSACTION_SUMS)
+        ]
+    ), (
+        select(cash_flows.type, cents(cash_flows.amount))
+        .where(cash_flows.type.in_(CASH_TYPES), cash_flows.created_at.between(start, end)),
+        [('type', f'U{max(map(len, CASH_TYPES))}'), ('amount', np.int64)]
+    )])
+    money = {name: rows[name] for name in TRANSACTION_SUMS}
+
+    parts.totals['count'] = int(rows.size)
+    for name in TRANSACTION_SUMS:
+        parts.totals[name] = from_cents(money[name].sum())
+
+    _add_groups(parts, 'by_service', rows['service_id'], money, SERVICE_FIELDS)
+    _add_groups(parts, 'by_edc', rows['edc_machine_id'], money, OWNER_FIELDS)
+    _add_groups(parts, 'by_agent', rows['agent_profile_id'], money, AGENT_FIELDS)
+
+    if daily and rows.size:
+        first_day = np.datetime64(start.date(), 'D')
+        day_index = (rows['day'] - first_day).astype(np.int64)
+        days = (end.date() - start.date()).days + 1
+        counts, sums = daily_series(day_index, days, [money[field] for field in DAY_FIELDS[1:]])
+        parts.add_rows(
+            'by_day',
+            ((str(first_day + int(index)), int(counts[index]), *(from_cents(column[index]) for column in sums))
+             for index in np.flatnonzero(counts)),
+            DAY_FIELDS
+        )
+
+    is_cash_in = cash['type'] == 'cash_in'
+    parts.cash['cash_in'] = from_cents(cash['amount'][is_cash_in].sum())
+    parts.cash['cash_out'] = from_cents(cash['amount'][~is_cash_in].sum())
+    return parts
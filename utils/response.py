@@ -1,4 +1,4 @@
-from flask import jsonify
+from flask import current_app, request
 from typing import Any, Dict, Optional
 
 def success_response(
@@ -10,7 +10,7 @@ def success_response(
     Return a success response
     
     Args:
-        data: Response data
+        data: Response data (Decimal, datetime dan Row di-encode oleh app JSON provider)
         message: Response message
         status_code: HTTP status code
     
@@ -22,7 +22,7 @@ def success_response(
         'message': message,
         'data': data
     }
-    return jsonify(response), status_code
+    return current_app.json.response(response), status_code
 
 def error_response(
     message: str = 'Error',
@@ -50,4 +50,14 @@ def error_response(
     if details:
         response['details'] = details
     
-    return jsonify(response), status_code
+    return current_app.json.response(response), status_code
+
+def wants_compact_response() -> bool:
+    """
+    Check if client asked for the compact response profile
+    (`?profile=compact` atau header `Prefer: return=minimal`), yaitu
+    response tanpa teks penjelasan tambahan.
+    """
+    if request.args.get('profile', '').lower() == 'compact':
+        return True
+    return 'return=minimal' in request.headers.get('Prefer', '').lower()
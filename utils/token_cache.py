@@ -0,0 +1,95 @@
+"""
+Cache token JWT yang sudah diverifikasi.
+
+Tanpa cache setiap request membayar verifikasi signature HS256, decode
+JSON, dan query ke token_blacklist. Cache ini menyimpan payload hasil
+verify_token per hash token (sha256, token asli tidak disimpan) sampai
+yang lebih dulu dari:
+
+- exp token
+- TOKEN_CACHE_TTL_SECONDS sejak diverifikasi
+
+Ukuran dibatasi TOKEN_CACHE_SIZE (LRU). Logout membuang token dari cache
+lewat forget(), sehingga token yang di-revoke langsung ditolak di proses
+ini. Di proses lain token yang di-revoke paling lama diterima sampai TTL
+habis, jadi TTL sebaiknya pendek. TOKEN_CACHE_SIZE=0 mematikan cache.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+def token_key(token):
+    return hashlib.sha256(token.encode()).digest()
+
+class VerifiedTokenCache:
+    """LRU thread-safe: hash token -> (payload, berlaku sampai epoch detik)"""
+
+    def __init__(self, max_size=10000, ttl_seconds=60, clock=time.time):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, token):
+        """Payload token jika masih ada di cache dan belum kedaluwarsa, selain itu None"""
+        key = token_key(token)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, token, payload):
+        if self.max_size <= 0:
+            return
+        now = self.clock()
+        expires_at = min(payload.get('exp', now), now + self.ttl_seconds)
+        if expires_at <= now:
+            return
+        key = token_key(token)
+        with self._lock:
+            self._entries[key] = (payload, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def forget(self, token):
+        """Buang token dari cache (dipanggil saat logout/revoke)"""
+        with self._lock:
+            self._entries.pop(token_key(token), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+def init_token_cache(app):
+    """Pasang cache sesuai config TOKEN_CACHE_SIZE / TOKEN_CACHE_TTL_SECONDS"""
+    app.extensions['token_cache'] = VerifiedTokenCache(
+        max_size=app.config.get('TOKEN_CACHE_SIZE', 10000),
+        ttl_seconds=app.config.get('TOKEN_CACHE_TTL_SECONDS', 60)
+    )
@@ -0,0 +1,87 @@
+"""
+Versi token per user untuk mencabut semua sesi sekaligus.
+
+Token hasil login membawa claim `ver` = users.token_version saat login.
+verify_token menolak token yang `ver`-nya lebih kecil dari versi user
+sekarang, jadi mencabut semua token user cukup menaikkan satu counter
+(revoke_user_tokens) tanpa menambah baris token_blacklist. Token lama
+tanpa claim `ver` dianggap versi 0.
+
+Versi per user di-cache in-process: request berikutnya tidak query ke DB
+sampai entri berumur TOKEN_VERSION_CACHE_SECONDS (supaya perubahan dari
+proses lain tetap terbaca). Kenaikan versi dari proses ini langsung
+masuk cache setelah commit.
+"""
+import threading
+import time
+from flask import current_app
+from sqlalchemy import select, update, inspect, text, event
+from sqlalchemy.orm import Session
+from models.user import db, User
+
+_lock = threading.Lock()
+_versions = {}
+
+def _cache_seconds():
+    return current_app.config.get('TOKEN_VERSION_CACHE_SECONDS', 300)
+
+def remember_token_version(user_id, version):
+    with _lock:
+        _versions[user_id] = (version, time.monotonic())
+
+def current_token_version(user_id):
+    """Versi token user sekarang, atau None jika user tidak ada"""
+    with _lock:
+        entry = _versions.get(user_id)
+    if entry is not None and time.monotonic() - entry[1] < _cache_seconds():
+        return entry[0]
+    version = db.session.execute(
+        select(User.token_version).where(User.id == user_id)
+    ).scalar_one_or_none()
+    remember_token_version(user_id, version)
+    return version
+
+def check_token_version(payload):
+    """Raise ValueError jika token sudah dicabut lewat kenaikan versi"""
+    version = current_token_version(payload['user_id'])
+    if version is None:
+        raise ValueError('User tidak ditemukan')
+    if payload.get('ver', 0) < version:
+        raise ValueError('Token sudah dicabut, silakan login ulang')
+
+def revoke_user_tokens(user_id):
+    """
+    Cabut semua token user: naikkan token_version (caller yang commit).
+    Cache versi diperbarui setelah commit.
+
+    Returns:
+        Versi token baru
+    """
+    db.session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(token_version=User.token_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    version = db.session.execute(
+        select(User.token_version).where(User.id == user_id)
+    ).scalar_one_or_none()
+    db.session.info.setdefault('token_versions', {})[user_id] = version
+    return version
+
+@event.listens_for(Session, 'after_commit')
+def _remember_committed_versions(session):
+    versions = session.info.pop('token_versions', None)
+    for user_id, version in (versions or {}).items():
+        remember_token_version(user_id, version)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_versions(session):
+    session.info.pop('token_versions', None)
+
+def ensure_token_version_column():
+    """Tambahkan kolom users.token_version di database lama (create_all tidak mengubah tabel yang sudah ada)"""
+    columns = {column['name'] for column in inspect(db.engine).get_columns('users')}
+    if 'token_version' not in columns:
+        with db.engine.begin() as connection:
+            connection.execute(text('ALTER TABLE users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0'))
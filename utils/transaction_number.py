@@ -0,0 +1,101 @@
+"""
+Generator transaction_number yang bisa diganti lewat config.
+
+- random: format lama, TRX- + 12 hex acak (uuid4). Insert mendarat di
+  posisi acak index unique transaction_number.
+- time_ordered (default): TRX- + 13 karakter Crockford base32 dari id
+  64-bit gaya snowflake (41 bit milidetik sejak 2024-01-01, 10 bit worker
+  id, 12 bit sequence). Nomor naik monoton per proses sehingga insert
+  selalu di ujung kanan B-tree index.
+
+Worker id harus unik per proses yang berjalan bersamaan
+(TRANSACTION_NUMBER_WORKER_ID); default diturunkan dari hostname + pid.
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+import zlib
+
+PREFIX = 'TRX-'
+
+CROCKFORD_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+ENCODED_LENGTH = 13  # 13 x 5 bit >= 64 bit
+
+def encode_crockford(value, length=ENCODED_LENGTH):
+    """Encode integer ke Crockford base32 dengan panjang tetap (urutan string = urutan angka)"""
+    chars = []
+    for _ in range(length):
+        chars.append(CROCKFORD_ALPHABET[value & 0x1F])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+def default_worker_id():
+    """Worker id dari hostname + pid (set TRANSACTION_NUMBER_WORKER_ID untuk jaminan unik)"""
+    seed = f'{socket.gethostname()}:{os.getpid()}'.encode('utf-8')
+    return zlib.crc32(seed) & MAX_WORKER_ID
+
+class RandomTransactionNumber:
+    """Format lama: TRX- + 12 hex acak"""
+
+    def __call__(self):
+        return f"{PREFIX}{uuid.uuid4().hex[:12].upper()}"
+
+class TimeOrderedTransactionNumber:
+    """Nomor transaksi gaya snowflake, monoton per proses dan thread-safe"""
+
+    def __init__(self, worker_id=None, clock=None):
+        if worker_id is None:
+            worker_id = default_worker_id()
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f'worker_id harus 0..{MAX_WORKER_ID}')
+        self.worker_id = worker_id
+        self._clock = clock or (lambda: int(time.time() * 1000))
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._sequence = 0
+
+    def next_id(self):
+        """Id 64-bit berikutnya"""
+        with self._lock:
+            now_ms = self._clock() - EPOCH_MS
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            else:
+                # Milidetik sama atau jam mundur: tetap di atas id terakhir
+                self._sequence += 1
+                if self._sequence > MAX_SEQUENCE:
+                    self._last_ms += 1
+                    self._sequence = 0
+            return (self._last_ms << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | self._sequence
+
+    def __call__(self):
+        return f'{PREFIX}{encode_crockford(self.next_id())}'
+
+TRANSACTION_NUMBER_SCHEMES = {
+    'random': RandomTransactionNumber,
+    'time_ordered': TimeOrderedTransactionNumber,
+}
+
+def build_generator(scheme, worker_id=None):
+    """Buat generator sesuai nama scheme"""
+    if scheme not in TRANSACTION_NUMBER_SCHEMES:
+        raise ValueError(f'TRANSACTION_NUMBER_SCHEME tidak dikenal: {scheme}')
+    if scheme == 'time_ordered':
+        return TimeOrderedTransactionNumber(worker_id=worker_id)
+    return TRANSACTION_NUMBER_SCHEMES[scheme]()
+
+def init_transaction_number_generator(app):
+    """Pasang generator sesuai config TRANSACTION_NUMBER_SCHEME / TRANSACTION_NUMBER_WORKER_ID"""
+    worker_id = app.config.get('TRANSACTION_NUMBER_WORKER_ID')
+    app.extensions['transaction_number'] = build_generator(
+        app.config.get('TRANSACTION_NUMBER_SCHEME', 'time_ordered'),
+        worker_id=int(worker_id) if worker_id not in (None, '') else None
+    )
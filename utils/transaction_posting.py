@@ -0,0 +1,523 @@
+"""
+Posting transaksi ke database.
+
+post_transaction (POST /api/transactions): user, EDC, service, agent dan
+kedua fee di-resolve dalam satu SELECT, saldo divalidasi sekaligus diubah
+lewat UPDATE bersyarat, dan semua tulisan masuk dalam satu commit tanpa
+reload objek ORM.
+
+post_transaction_batch (sync terminal): semua EDC, service, agent, tier
+service fee dan bank fee yang direferensikan batch dimuat sekaligus,
+perubahan saldo per EDC/agent diakumulasi lalu diterapkan dengan satu
+UPDATE per tabel, dan transaksi serta cash flow di-insert dengan multi-row
+INSERT dalam satu DB transaction.
+
+Kedua jalur mencatat setiap perubahan saldo ke balance ledger dan
+menambahkan transaksinya ke rollup per jam (utils/hourly_rollup.py).
+"""
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import select, insert, update, case, null
+from models.user import db, User
+from models.agent_profile import AgentProfile
+from models.edc_machine import EdcMachine
+from models.service import Service
+from models.service_fee import ServiceFee
+from models.bank_fee import BankFee
+from models.transaction import Transaction
+from models.cash_flow import CashFlow
+from utils.balance_slots import KIND_EDC, KIND_AGENT, adjust_balance, current_balance, fold_slots, sharding_enabled
+from utils.balance_ledger import ledger_entry, record_ledger_entries, SOURCE_TRANSACTION
+from utils.hourly_rollup import record_transactions
+
+CENT = Decimal('0.01')
+ZERO = Decimal('0.00')
+
+CATEGORY_TRANSFER = 'transfer'
+CATEGORY_TARIK_TUNAI = 'tarik tunai'
+
+class PostingError(Exception):
+    """Item transaksi tidak bisa diposting"""
+    def __init__(self, message, error='INVALID_INPUT', status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.error = error
+        self.status_code = status_code
+
+def to_decimal(value):
+    """Konversi angka dari request ke Decimal 2 digit"""
+    try:
+        return Decimal(str(value)).quantize(CENT)
+    except (InvalidOperation, TypeError, ValueError):
+        raise PostingError('Amount harus berupa angka')
+
+def service_category(service):
+    return service.category.lower() if service.category else ''
+
+def select_service_fee(tiers, amount):
+    """
+    Pilih fee dari tier (min_amount, max_amount, fee) pertama yang cocok
+    dengan amount, 0 jika tidak ada yang cocok
+    """
+    for min_amount, max_amount, fee in tiers:
+        if min_amount <= amount <= max_amount:
+            return fee or ZERO
+    return ZERO
+
+def _parse_item(item):
+    """Validasi field satu item batch, return dict yang sudah dinormalisasi"""
+    if not isinstance(item, dict):
+        raise PostingError('Item transaksi harus berupa object', error='INVALID_REQUEST')
+
+    edc_machine_id = item.get('edc_machine_id')
+    service_id = item.get('service_id')
+    if not edc_machine_id or not service_id:
+        raise PostingError('edc_machine_id dan service_id wajib diisi', error='MISSING_FIELDS')
+
+    try:
+        edc_machine_id = int(edc_machine_id)
+        service_id = int(service_id)
+        agent_profile_id = item.get('agent_profile_id')
+        if agent_profile_id is not None:
+            agent_profile_id = int(agent_profile_id)
+    except (ValueError, TypeError):
+        raise PostingError('edc_machine_id, service_id dan agent_profile_id harus berupa angka')
+
+    amount = to_decimal(item.get('amount', 0))
+    extra_fee = to_decimal(item.get('extra_fee', 0))
+    if amount <= 0:
+        raise PostingError('Amount harus lebih dari 0')
+    if extra_fee < 0:
+        raise PostingError('Extra fee tidak boleh negatif')
+
+    customer_name = (item.get('customer_name') or '').strip()
+    target_number = (item.get('target_number') or '').strip()
+    reference_number = (item.get('reference_number') or '').strip()
+
+    return {
+        'edc_machine_id': edc_machine_id,
+        'service_id': service_id,
+        'agent_profile_id': agent_profile_id,
+        'customer_name': customer_name or None,
+        'target_number': target_number or None,
+        'reference_number': reference_number or None,
+        'amount': amount,
+        'extra_fee': extra_fee,
+    }
+
+def _scalar(statement, label):
+    return statement.limit(1).scalar_subquery().label(label)
+
+def _resolve_single(item, user_id):
+    """User, EDC, service, agent, service fee dan bank fee dalam satu SELECT"""
+    edc_id = item['edc_machine_id']
+    service_id = item['service_id']
+    agent_id = item['agent_profile_id']
+    amount = item['amount']
+
+    columns = [
+        _scalar(select(User.name).where(User.id == user_id), 'cashier_name'),
+        _scalar(select(EdcMachine.id).where(EdcMachine.id == edc_id), 'edc_id'),
+        _scalar(select(Service.id).where(Service.id == service_id), 'service_id'),
+        _scalar(select(Service.name).where(Service.id == service_id), 'service_name'),
+        _scalar(select(Service.category).where(Service.id == service_id), 'service_category'),
+        _scalar(
+            select(ServiceFee.fee).where(
+                ServiceFee.service_id == service_id,
+                ServiceFee.min_amount <= amount,
+                ServiceFee.max_amount >= amount
+            ).order_by(ServiceFee.id),
+            'service_fee'
+        ),
+        _scalar(
+            select(BankFee.fee).where(
+                BankFee.edc_machine_id == edc_id,
+                BankFee.service_id == service_id
+            ).order_by(BankFee.id),
+            'bank_fee'
+        ),
+    ]
+    if agent_id is not None:
+        columns.append(_scalar(select(AgentProfile.id).where(AgentProfile.id == agent_id), 'agent_id'))
+    else:
+        columns.append(null().label('agent_id'))
+
+    return db.session.execute(select(*columns)).one()
+
+def post_transaction(data, user_id, generate_number):
+    """
+    Posting satu transaksi (caller yang commit, rollback jika PostingError).
+
+    Args:
+        data: Payload POST /api/transactions
+        user_id: User yang memposting
+        generate_number: Callable pembuat transaction_number
+
+    Returns:
+        Dict transaksi (format sama dengan Transaction.to_dict())
+
+    Raises:
+        PostingError: Input tidak valid, referensi tidak ada, atau saldo tidak cukup
+    """
+    item = _parse_item(data)
+    refs = _resolve_single(item, user_id)
+
+    if refs.edc_id is None:
+        raise PostingError('EDC machine tidak ditemukan', error='NOT_FOUND', status_code=404)
+    if refs.service_id is None:
+        raise PostingError('Service tidak ditemukan', error='NOT_FOUND', status_code=404)
+    agent_id = item['agent_profile_id']
+    if agent_id is not None and refs.agent_id is None:
+        raise PostingError('Agent profile tidak ditemukan', error='NOT_FOUND', status_code=404)
+
+    edc_id = item['edc_machine_id']
+    amount = item['amount']
+    extra_fee = item['extra_fee']
+    category = refs.service_category.lower() if refs.service_category else ''
+    cash_flow = None
+    balance_changes = []
+    transaction_number = generate_number()
+
+    if category == CATEGORY_TRANSFER:
+        # Transfer: saldo EDC berkurang, uang tunai agent bertambah (cash_in)
+        if not adjust_balance(KIND_EDC, edc_id, -amount, required=amount):
+            raise PostingError(
+                f'Saldo EDC tidak cukup. Saldo tersedia: {float(current_balance(KIND_EDC, edc_id))}, Amount dibutuhkan: {float(amount)}',
+                error='INSUFFICIENT_BALANCE'
+            )
+        balance_changes.append((KIND_EDC, edc_id, -amount))
+        if agent_id is not None:
+            adjust_balance(KIND_AGENT, agent_id, amount, user_id=user_id)
+            balance_changes.append((KIND_AGENT, agent_id, amount))
+            cash_flow = {
+                'agent_profile_id': agent_id,
+                'type': 'cash_in',
+                'source': f'Transfer EDC - {refs.service_name}',
+                'description': f'Transfer dari EDC. Transaction: {transaction_number}',
+            }
+    elif category == CATEGORY_TARIK_TUNAI:
+        # Tarik tunai: uang tunai berkurang (jika ada agent), saldo EDC bertambah (cash_out)
+        if agent_id is not None and not adjust_balance(KIND_AGENT, agent_id, -amount, required=amount):
+            raise PostingError(
+                f'Uang tunai tidak cukup. Saldo tersedia: {float(current_balance(KIND_AGENT, agent_id))}, Amount dibutuhkan: {float(amount)}',
+                error='INSUFFICIENT_BALANCE'
+            )
+        if agent_id is not None:
+            balance_changes.append((KIND_AGENT, agent_id, -amount))
+        adjust_balance(KIND_EDC, edc_id, amount, user_id=user_id)
+        balance_changes.append((KIND_EDC, edc_id, amount))
+        cash_flow = {
+            'agent_profile_id': agent_id,
+            'type': 'cash_out',
+            'source': f'Tarik Tunai - {refs.service_name}',
+            'description': f'Tarik tunai. Transaction: {transaction_number}',
+        }
+
+    now = datetime.utcnow()
+    service_fee = refs.service_fee or ZERO
+    bank_fee = refs.bank_fee or ZERO
+    net_profit = amount - extra_fee
+    row = {
+        'transaction_number': transaction_number,
+        'edc_machine_id': edc_id,
+        'service_id': item['service_id'],
+        'agent_profile_id': agent_id,
+        'user_id': user_id,
+        'cashier_name': refs.cashier_name or 'Unknown',
+        'customer_name': item['customer_name'],
+        'target_number': item['target_number'],
+        'reference_number': item['reference_number'],
+        'amount': amount,
+        'service_fee': service_fee,
+        'bank_fee': bank_fee,
+        'extra_fee': extra_fee,
+        'net_profit': net_profit,
+        'created_at': now,
+        'updated_at': now,
+    }
+    result = db.session.execute(insert(Transaction).values(row))
+    transaction_id = result.inserted_primary_key[0]
+    record_transactions([row])
+
+    cash_flow_id = None
+    if cash_flow is not None:
+        cash_flow_id = db.session.execute(insert(CashFlow).values(
+            user_id=user_id, amount=amount, created_at=now, updated_at=now, **cash_flow
+        )).inserted_primary_key[0]
+
+    record_ledger_entries([
+        ledger_entry(
+            kind, owner_id, delta, SOURCE_TRANSACTION,
+            transaction_id=transaction_id, cash_flow_id=cash_flow_id, user_id=user_id, created_at=now
+        )
+        for kind, owner_id, delta in balance_changes
+    ])
+
+    # Response dibangun dari nilai yang sudah diketahui, tanpa SELECT ulang
+    transaction = {'id': transaction_id}
+    for key, value in row.items():
+        if isinstance(value, Decimal):
+            value = float(value) if value else 0.00
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        transaction[key] = value
+    transaction['total_received'] = (
+        transaction['amount'] + transaction['service_fee'] + transaction['bank_fee'] + transaction['extra_fee']
+    )
+    return transaction
+
+def _load_references(parsed_items):
+    """Bulk load semua EDC, service, agent dan fee yang direferensikan batch"""
+    edc_ids = {item['edc_machine_id'] for item in parsed_items}
+    service_ids = {item['service_id'] for item in parsed_items}
+    agent_ids = {item['agent_profile_id'] for item in parsed_items if item['agent_profile_id'] is not None}
+
+    if sharding_enabled():
+        # Saldo di slot dilipat dulu ke baris induk supaya validasi memakai saldo lengkap
+        fold_slots(KIND_EDC, edc_ids)
+        fold_slots(KIND_AGENT, agent_ids)
+
+    # Baris saldo dikunci sampai commit supaya validasi saldo tidak race dengan kasir lain
+    edcs = {
+        row.id: row for row in db.session.execute(
+            select(EdcMachine.id, EdcMachine.saldo)
+            .where(EdcMachine.id.in_(edc_ids)).with_for_update()
+        )
+    }
+    agents = {}
+    if agent_ids:
+        agents = {
+            row.id: row for row in db.session.execute(
+                select(AgentProfile.id, AgentProfile.total_balance)
+                .where(AgentProfile.id.in_(agent_ids)).with_for_update()
+            )
+        }
+    services = {
+        row.id: row for row in db.session.execute(
+            select(Service.id, Service.name, Service.category).where(Service.id.in_(service_ids))
+        )
+    }
+
+    # Tier dengan batas NULL tidak pernah cocok, sama seperti perbandingan SQL di _resolve_single
+    service_fee_tiers = {}
+    for row in db.session.execute(
+        select(ServiceFee.service_id, ServiceFee.min_amount, ServiceFee.max_amount, ServiceFee.fee)
+        .where(
+            ServiceFee.service_id.in_(service_ids),
+            ServiceFee.min_amount.isnot(None),
+            ServiceFee.max_amount.isnot(None)
+        ).order_by(ServiceFee.id)
+    ):
+        service_fee_tiers.setdefault(row.service_id, []).append((row.min_amount, row.max_amount, row.fee))
+
+    bank_fees = {}
+    for row in db.session.execute(
+        select(BankFee.edc_machine_id, BankFee.service_id, BankFee.fee)
+        .where(BankFee.edc_machine_id.in_(edc_ids), BankFee.service_id.in_(service_ids))
+        .order_by(BankFee.id)
+    ):
+        bank_fees.setdefault((row.edc_machine_id, row.service_id), row.fee or ZERO)
+
+    return edcs, agents, services, service_fee_tiers, bank_fees
+
+def _aggregate_update(model, column, deltas):
+    """UPDATE model SET column = column + CASE id ... END untuk semua id sekaligus"""
+    if not deltas:
+        return
+    db.session.execute(
+        update(model)
+        .where(model.id.in_(deltas.keys()))
+        .values({column: getattr(model, column) + case(deltas, value=model.id, else_=ZERO)})
+        .execution_options(synchronize_session=False)
+    )
+
+def post_transaction_batch(items, user_id, cashier_name, generate_number):
+    """
+    Posting banyak transaksi dalam satu DB transaction (caller yang commit).
+
+    Item yang gagal validasi (referensi tidak ada, saldo tidak cukup, input
+    tidak valid) dilewati dan dilaporkan; item lain tetap diposting. Saldo
+    divalidasi berurutan sesuai urutan item, memperhitungkan item
+    sebelumnya dalam batch yang sama.
+
+    Args:
+        items: List payload transaksi (format sama dengan POST /api/transactions)
+        user_id: User yang memposting
+        cashier_name: Nama kasir yang dicatat di transaksi
+        generate_number: Callable pembuat transaction_number
+
+    Returns:
+        List hasil per item, urut sesuai input
+    """
+    results = [None] * len(items)
+    parsed = []
+    for index, item in enumerate(items):
+        try:
+            parsed.append((index, _parse_item(item)))
+        except PostingError as e:
+            results[index] = {'index': index, 'success': False, 'error': e.error, 'message': e.message}
+
+    if not parsed:
+        return results
+
+    edcs, agents, services, service_fee_tiers, bank_fees = _load_references([item for _, item in parsed])
+    edc_balance = {edc_id: row.saldo or ZERO for edc_id, row in edcs.items()}
+    agent_balance = {agent_id: row.total_balance or ZERO for agent_id, row in agents.items()}
+    edc_deltas = {}
+    agent_deltas = {}
+    transaction_rows = []
+    cash_flow_rows = []
+    cash_flow_numbers = {}
+    ledger_changes = []
+    now = datetime.utcnow()
+
+    for index, item in parsed:
+        edc_id = item['edc_machine_id']
+        agent_id = item['agent_profile_id']
+        service = services.get(item['service_id'])
+        amount = item['amount']
+
+        if edc_id not in edcs:
+            results[index] = {'index': index, 'success': False, 'error': 'NOT_FOUND', 'message': 'EDC machine tidak ditemukan'}
+            continue
+        if service is None:
+            results[index] = {'index': index, 'success': False, 'error': 'NOT_FOUND', 'message': 'Service tidak ditemukan'}
+            continue
+        if agent_id is not None and agent_id not in agents:
+            results[index] = {'index': index, 'success': False, 'error': 'NOT_FOUND', 'message': 'Agent profile tidak ditemukan'}
+            continue
+
+        category = service_category(service)
+        if category == CATEGORY_TRANSFER and edc_balance[edc_id] < amount:
+            results[index] = {
+                'index': index, 'success': False, 'error': 'INSUFFICIENT_BALANCE',
+                'message': f'Saldo EDC tidak cukup. Saldo tersedia: {float(edc_balance[edc_id])}, Amount dibutuhkan: {float(amount)}'
+            }
+            continue
+        if category == CATEGORY_TARIK_TUNAI and agent_id is not None and agent_balance[agent_id] < amount:
+            results[index] = {
+                'index': index, 'success': False, 'error': 'INSUFFICIENT_BALANCE',
+                'message': f'Uang tunai tidak cukup. Saldo tersedia: {float(agent_balance[agent_id])}, Amount dibutuhkan: {float(amount)}'
+            }
+            continue
+
+        service_fee = select_service_fee(service_fee_tiers.get(service.id, ()), amount)
+        bank_fee = bank_fees.get((edc_id, service.id), ZERO)
+        extra_fee = item['extra_fee']
+        net_profit = amount - extra_fee
+        transaction_number = generate_number()
+
+        transaction_rows.append({
+            'transaction_number': transaction_number,
+            'edc_machine_id': edc_id,
+            'service_id': service.id,
+            'agent_profile_id': agent_id,
+            'user_id': user_id,
+            'cashier_name': cashier_name,
+            'customer_name': item['customer_name'],
+            'target_number': item['target_number'],
+            'reference_number': item['reference_number'],
+            'amount': amount,
+            'service_fee': service_fee,
+            'bank_fee': bank_fee,
+            'extra_fee': extra_fee,
+            'net_profit': net_profit,
+            'created_at': now,
+            'updated_at': now,
+        })
+
+        if category == CATEGORY_TRANSFER:
+            # Transfer: saldo EDC berkurang, uang tunai agent bertambah (cash_in)
+            edc_balance[edc_id] -= amount
+            edc_deltas[edc_id] = edc_deltas.get(edc_id, ZERO) - amount
+            ledger_changes.append((transaction_number, KIND_EDC, edc_id, -amount))
+            if agent_id is not None:
+                agent_balance[agent_id] += amount
+                agent_deltas[agent_id] = agent_deltas.get(agent_id, ZERO) + amount
+                ledger_changes.append((transaction_number, KIND_AGENT, agent_id, amount))
+                cash_flow_rows.append({
+                    'agent_profile_id': agent_id,
+                    'user_id': user_id,
+                    'type': 'cash_in',
+                    'source': f'Transfer EDC - {service.name}',
+                    'amount': amount,
+                    'description': f'Transfer dari EDC. Transaction: {transaction_number}',
+                    'created_at': now,
+                    'updated_at': now,
+                })
+                cash_flow_numbers[cash_flow_rows[-1]['description']] = transaction_number
+        elif category == CATEGORY_TARIK_TUNAI:
+            # Tarik tunai: uang tunai berkurang (jika ada agent), saldo EDC bertambah (cash_out)
+            if agent_id is not None:
+                agent_balance[agent_id] -= amount
+                agent_deltas[agent_id] = agent_deltas.get(agent_id, ZERO) - amount
+                ledger_changes.append((transaction_number, KIND_AGENT, agent_id, -amount))
+            edc_balance[edc_id] += amount
+            edc_deltas[edc_id] = edc_deltas.get(edc_id, ZERO) + amount
+            ledger_changes.append((transaction_number, KIND_EDC, edc_id, amount))
+            cash_flow_rows.append({
+                'agent_profile_id': agent_id,
+                'user_id': user_id,
+                'type': 'cash_out',
+                'source': f'Tarik Tunai - {service.name}',
+                'amount': amount,
+                'description': f'Tarik tunai. Transaction: {transaction_number}',
+                'created_at': now,
+                'updated_at': now,
+            })
+            cash_flow_numbers[cash_flow_rows[-1]['description']] = transaction_number
+
+        results[index] = {
+            'index': index,
+            'success': True,
+            'transaction_number': transaction_number,
+            'amount': float(amount),
+            'service_fee': float(service_fee),
+            'bank_fee': float(bank_fee),
+            'extra_fee': float(extra_fee),
+            'total_received': float(amount + service_fee + bank_fee + extra_fee),
+            'net_profit': float(net_profit),
+        }
+
+    if transaction_rows:
+        db.session.execute(insert(Transaction).values(transaction_rows))
+        record_transactions(transaction_rows)
+        if cash_flow_rows:
+            db.session.execute(insert(CashFlow).values(cash_flow_rows))
+        _aggregate_update(EdcMachine, 'saldo', edc_deltas)
+        _aggregate_update(AgentProfile, 'total_balance', agent_deltas)
+
+        # Id transaksi baru dalam satu query
+        numbers = [row['transaction_number'] for row in transaction_rows]
+        ids = dict(db.session.execute(
+            select(Transaction.transaction_number, Transaction.id)
+            .where(Transaction.transaction_number.in_(numbers))
+        ).all())
+        for result in results:
+            if result['success']:
+                result['id'] = ids.get(result['transaction_number'])
+
+        # Id cash flow baru: description memuat transaction_number, jadi unik per transaksi
+        cash_flow_for = {}
+        if cash_flow_rows:
+            cash_flow_for = {
+                cash_flow_numbers[description]: cash_flow_id
+                for description, cash_flow_id in db.session.execute(
+                    select(CashFlow.description, CashFlow.id).where(
+                        CashFlow.user_id == user_id,
+                        CashFlow.created_at == now,
+                        CashFlow.description.in_(list(cash_flow_numbers))
+                    )
+                )
+            }
+
+        record_ledger_entries([
+            ledger_entry(
+                kind, owner_id, delta, SOURCE_TRANSACTION,
+                transaction_id=ids.get(number), cash_flow_id=cash_flow_for.get(number),
+                user_id=user_id, created_at=now
+            )
+            for number, kind, owner_id, delta in ledger_changes
+        ])
+
+    return results
@@ -0,0 +1,45 @@
+"""
+INSERT ... ON DUPLICATE KEY UPDATE / ON CONFLICT DO UPDATE lintas dialect.
+"""
+from sqlalchemy import insert, update
+from models.user import db
+
+def upsert_increment(table, values, key_columns, increment_columns, set_columns=()):
+    """
+    Insert satu baris, atau jika unique key sudah ada tambahkan nilai
+    `increment_columns` ke baris yang ada, dalam satu statement.
+
+    Args:
+        table: Table SQLAlchemy
+        values: Dict nilai baris
+        key_columns: Kolom unique key (dipakai ON CONFLICT)
+        increment_columns: Kolom yang dijumlahkan saat konflik
+        set_columns: Kolom yang ditimpa nilainya saat konflik
+    """
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        statement = mysql_insert(table).values(values)
+        changes = {name: table.c[name] + statement.inserted[name] for name in increment_columns}
+        changes.update({name: statement.inserted[name] for name in set_columns})
+        return db.session.execute(statement.on_duplicate_key_update(changes))
+
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        statement = dialect_insert(table).values(values)
+        changes = {name: table.c[name] + statement.excluded[name] for name in increment_columns}
+        changes.update({name: statement.excluded[name] for name in set_columns})
+        return db.session.execute(statement.on_conflict_do_update(index_elements=list(key_columns), set_=changes))
+
+    # Dialect lain: UPDATE dulu, INSERT jika belum ada baris
+    key_filter = [table.c[name] == values[name] for name in key_columns]
+    changes = {name: table.c[name] + values[name] for name in increment_columns}
+    changes.update({name: values[name] for name in set_columns})
+    result = db.session.execute(update(table).where(*key_filter).values(changes))
+    if result.rowcount == 0:
+        result = db.session.execute(insert(table).values(values))
+    return result
@@ -1,5 +1,5 @@
 import re
-from werkzeug.security import generate_password_hash, check_password_hash
+from utils.password_hashing import password_hasher
 
 class ValidationError(Exception):
     """Custom validation error"""
@@ -28,9 +28,13 @@ def validate_name(name):
     return True
 
 def hash_password(password):
-    """Hash password using werkzeug"""
-    return generate_password_hash(password, method='pbkdf2:sha256')
+    """Hash password (metode dari config PASSWORD_HASH_METHOD, dikerjakan di process pool)"""
+    return password_hasher().hash(password)
 
 def check_password(password_hash, password):
     """Check password against hash"""
-    return check_password_hash(password_hash, password)
+    return password_hasher().verify(password_hash, password)
+
+def password_needs_rehash(password_hash):
+    """True jika hash memakai metode/cost lama"""
+    return password_hasher().needs_rehash(password_hash)